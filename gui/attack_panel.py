@@ -0,0 +1,72 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+from tkinter import messagebox
+
+import customtkinter as ctk
+
+from gui.autocomplete import AutocompleteEntry
+from gui.virtual_list import VirtualList
+
+
+class AttackPanel(ctk.CTkFrame):
+    """Техники MITRE ATT&CK инцидента и рекомендуемые меры в окне паспорта"""
+
+    def __init__(self, master, db, incident_id, user: dict, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.kb = db.attack
+        self.incident_id = incident_id
+        self.user = user
+
+        self.grid_columnconfigure(0, weight=1)
+        ctk.CTkLabel(self, text="Техники ATT&CK:", anchor="w").grid(row=0, column=0, columnspan=3, sticky="w")
+
+        self.technique_var = ctk.StringVar()
+        self.entry = AutocompleteEntry(self, self.technique_var, source=self.kb.techniques,
+                                       placeholder_text="T1566 или название техники")
+        self.entry.grid(row=1, column=0, sticky="ew", pady=5)
+        ctk.CTkButton(self, text="Добавить", width=90, command=self._add).grid(row=1, column=1, padx=5)
+        ctk.CTkButton(self, text="Удалить", width=80, fg_color="red", command=self._delete).grid(row=1, column=2)
+
+        self.listbox = VirtualList(self, height=70, empty_text="Техники не указаны")
+        self.listbox.grid(row=2, column=0, columnspan=3, sticky="ew")
+
+        self.mitigations_box = ctk.CTkTextbox(self, height=70)
+        self.mitigations_box.grid(row=3, column=0, columnspan=3, sticky="ew", pady=(5, 0))
+
+        self._reload()
+
+    def _reload(self):
+        self.listbox.set_items([
+            (technique_id, f"{technique_id} {name or '(нет в базе ATT&CK)'}")
+            for technique_id, name in self.kb.techniques_of(self.incident_id)
+        ])
+        mitigations = self.kb.suggested_mitigations(self.incident_id)
+        text = "Рекомендуемые меры:\n" + "\n".join(
+            f"• {mitigation_id} {name} (техник: {count})" for mitigation_id, name, count in mitigations
+        ) if mitigations else "Рекомендуемых мер нет"
+        self.mitigations_box.configure(state="normal")
+        self.mitigations_box.delete("1.0", "end")
+        self.mitigations_box.insert("1.0", text)
+        self.mitigations_box.configure(state="disabled")
+
+    def _add(self):
+        text = self.technique_var.get().strip()
+        if not text:
+            return
+        # Выбор из подсказок даёт "T1566 Название", ручной ввод — ID
+        technique_id = self.kb.techniques().id(text) or text.split()[0]
+        try:
+            self.kb.tag(self.incident_id, [technique_id], self.user['username'])
+        except ValueError as e:
+            messagebox.showerror("ATT&CK", str(e), parent=self)
+            return
+        self.technique_var.set("")
+        self._reload()
+
+    def _delete(self):
+        if self.listbox.selected_id is None:
+            messagebox.showwarning("ATT&CK", "Выберите технику", parent=self)
+            return
+        self.kb.untag(self.incident_id, self.listbox.selected_id, self.user['username'])
+        self._reload()
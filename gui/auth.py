@@ -27,9 +27,31 @@ class AuthDialog(ctk.CTkFrame):
         master.resizable(False, False)
 
     def _login(self):
+        # БД расшифровывается в фоне: проверяем учётные данные, когда она готова
+        if not self.db.ready.is_set():
+            self.login_btn.configure(state="disabled", text="Загрузка БД…")
+            self.after(50, self._login)
+            return
+        self.login_btn.configure(state="normal", text="Войти")
+        if self.db.load_error is not None:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить базу данных:\n"
+                                           f"{type(self.db.load_error).__name__}: {self.db.load_error}\n\n"
+                                           "Проверьте ключ шифрования и файл БД.")
+            return
+
         username = self.username_entry.get()
         password = self.password_entry.get()
+
+        # Блокировка пользователя проверяется по счётчикам в памяти, до вычисления хэша пароля
+        wait = self.db.auth.check(username)
+        if wait:
+            self.db.auth.record_blocked(username)
+            messagebox.showerror("Ошибка", f"Слишком много неудачных попыток входа. "
+                                           f"Повторите через {int(wait) + 1} с")
+            return
+
         user = self.db.get_user(username, password)
+        self.db.auth.record(username, success=bool(user))
 
         if user:
             logging.info("Успешный вход")
@@ -0,0 +1,138 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import tkinter as tk
+
+import customtkinter as ctk
+
+
+class AutocompleteEntry(ctk.CTkEntry):
+    """
+    Поле ввода с автодополнением вместо CTkComboBox для больших справочников.
+
+    При вводе показывает не более max_results совпадений из индекса
+    (см. src.text_index.NameIndex), а не весь список значений.
+    source — функция без аргументов, возвращающая актуальный справочник
+    (Reference), поэтому фильтр, например по организации, задаёт вызывающий код.
+    """
+
+    def __init__(self, master, variable: tk.StringVar, source, on_select=None,
+                 max_results: int = 15, **kwargs):
+        super().__init__(master, textvariable=variable, **kwargs)
+        self.variable = variable
+        self.source = source
+        self.on_select = on_select
+        self.max_results = max_results
+
+        self._popup = None
+        self._listbox = None
+        self._matches = []
+
+        self.bind("<KeyRelease>", self._on_key)
+        self.bind("<Down>", self._on_down)
+        self.bind("<Return>", self._on_return)
+        self.bind("<Escape>", lambda e: self._hide())
+        self.bind("<FocusOut>", lambda e: self.after(150, self._hide_unless_focused))
+        self.bind("<Button-1>", lambda e: self._show(self.variable.get()))
+
+    def set(self, value: str):
+        self.variable.set(value)
+
+    def is_valid(self) -> bool:
+        """Введённое значение есть в справочнике"""
+        return self.source().id(self.variable.get()) is not None
+
+    # --- Всплывающий список ---
+    def _on_key(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        self._show(self.variable.get())
+
+    def _show(self, query):
+        if str(self.cget("state")) == "disabled":
+            return
+
+        reference = self.source()
+        # Точное совпадение — показываем все варианты, а не один
+        if reference.id(query) is not None:
+            query = ""
+        self._matches = reference.index.search(query, self.max_results)
+        if not self._matches:
+            self._hide()
+            return
+
+        if self._popup is None:
+            self._popup = tk.Toplevel(self)
+            self._popup.wm_overrideredirect(True)
+            self._listbox = tk.Listbox(
+                self._popup, activestyle="none", exportselection=False,
+                background="#2b2b2b", foreground="white",
+                selectbackground="#1f6aa5", borderwidth=0, highlightthickness=1
+            )
+            self._listbox.pack(fill="both", expand=True)
+            self._listbox.bind("<ButtonRelease-1>", self._on_click)
+            self._listbox.bind("<Return>", self._on_return)
+            self._listbox.bind("<Escape>", lambda e: self._hide())
+            self._listbox.bind("<FocusOut>", lambda e: self.after(150, self._hide_unless_focused))
+
+        self._listbox.delete(0, "end")
+        for _, name in self._matches:
+            self._listbox.insert("end", name)
+        self._listbox.configure(height=len(self._matches))
+
+        x = self.winfo_rootx()
+        y = self.winfo_rooty() + self.winfo_height()
+        self._popup.wm_geometry(f"{max(self.winfo_width(), 200)}x{len(self._matches) * 20 + 4}+{x}+{y}")
+        self._popup.deiconify()
+        self._popup.lift()
+
+    def _hide(self):
+        if self._popup is not None:
+            self._popup.withdraw()
+
+    def _hide_unless_focused(self):
+        """Скрывает список, если фокус ушёл и из поля, и из списка (Down переводит фокус в список)"""
+        try:
+            focus = self.focus_get()
+        except (KeyError, tk.TclError):
+            focus = None
+        if focus is not None:
+            path = str(focus)
+            if focus is self._listbox or path == str(self) or path.startswith(f"{self}."):
+                return
+        self._hide()
+
+    def _choose(self, index):
+        if 0 <= index < len(self._matches):
+            self.variable.set(self._matches[index][1])
+            self.icursor("end")
+        self._hide()
+        self.focus_set()
+        if self.on_select:
+            self.on_select(self.variable.get())
+
+    def _on_down(self, event):
+        if self._popup is None or not self._popup.winfo_viewable():
+            self._show(self.variable.get())
+        if self._listbox is not None and self._matches:
+            self._listbox.focus_set()
+            self._listbox.selection_clear(0, "end")
+            self._listbox.selection_set(0)
+            self._listbox.activate(0)
+        return "break"
+
+    def _on_click(self, event):
+        self._choose(self._listbox.nearest(event.y))
+
+    def _on_return(self, event):
+        if self._listbox is not None and self._listbox.curselection():
+            self._choose(self._listbox.curselection()[0])
+        elif self._matches:
+            self._choose(0)
+        return "break"
+
+    def destroy(self):
+        if self._popup is not None:
+            self._popup.destroy()
+            self._popup = None
+        super().destroy()
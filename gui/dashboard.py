@@ -0,0 +1,144 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import customtkinter as ctk
+
+from gui.refresh import AutoRefreshMixin
+
+
+class DashboardView(AutoRefreshMixin, ctk.CTkFrame):
+    """
+    Панель статистики инцидентов.
+    Данные берутся из сводных таблиц (SecureDB.get_statistics), поэтому
+    обновление не зависит от числа инцидентов; разбивка по неделям — из
+    колоночного снимка (SecureDB.get_incident_series, пересчёт только после
+    изменения инцидентов).
+    """
+    refresh_sources = ("statistics", "response_metrics", "incident_series")
+    refresh_interval = 5000
+
+    TOP = 8          # строк в каждом разделе
+    BAR_WIDTH = 20   # длина самой длинной полосы в символах
+
+    SECTIONS = (
+        ("статус", "По статусам"),
+        ("критичность", "По критичности"),
+        ("организация", "По организациям"),
+        ("ответственный", "По ответственным"),
+    )
+
+    def __init__(self, master, db, user_info):
+        super().__init__(master)
+        self.db = db
+        self.user = user_info
+        self._shown = None
+
+        self.grid_columnconfigure((0, 1), weight=1)
+        mono = ctk.CTkFont(family="Courier", size=12)
+
+        self.total_label = ctk.CTkLabel(self, text="Всего инцидентов: 0", font=ctk.CTkFont(size=18, weight="bold"))
+        self.total_label.grid(row=0, column=0, columnspan=2, pady=(10, 5))
+
+        self.section_labels = {}
+        for index, (dimension, title) in enumerate(self.SECTIONS):
+            frame = ctk.CTkFrame(self)
+            frame.grid(row=1 + index // 2, column=index % 2, padx=5, pady=5, sticky="nsew")
+            ctk.CTkLabel(frame, text=title, font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w", padx=10, pady=(5, 0))
+            label = ctk.CTkLabel(frame, text="", font=mono, justify="left", anchor="w")
+            label.pack(anchor="w", padx=10, pady=5)
+            self.section_labels[dimension] = label
+
+        days_frame = ctk.CTkFrame(self)
+        days_frame.grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
+        ctk.CTkLabel(days_frame, text="По дням обнаружения", font=ctk.CTkFont(size=14, weight="bold")).pack(
+            anchor="w", padx=10, pady=(5, 0))
+        self.days_label = ctk.CTkLabel(days_frame, text="", font=mono, justify="left", anchor="w")
+        self.days_label.pack(anchor="w", padx=10, pady=5)
+
+        times_frame = ctk.CTkFrame(self)
+        times_frame.grid(row=4, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
+        ctk.CTkLabel(times_frame, text="Время реагирования (MTTA / MTTR) по критичности",
+                     font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w", padx=10, pady=(5, 0))
+        self.times_label = ctk.CTkLabel(times_frame, text="", font=mono, justify="left", anchor="w")
+        self.times_label.pack(anchor="w", padx=10, pady=5)
+
+        weeks_frame = ctk.CTkFrame(self)
+        weeks_frame.grid(row=5, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
+        ctk.CTkLabel(weeks_frame, text="По неделям и критичности (12 недель)",
+                     font=ctk.CTkFont(size=14, weight="bold")).pack(anchor="w", padx=10, pady=(5, 0))
+        self.weeks_label = ctk.CTkLabel(weeks_frame, text="", font=mono, justify="left", anchor="w")
+        self.weeks_label.pack(anchor="w", padx=10, pady=5)
+
+        self._refresh({"statistics": self.db.get_statistics(),
+                       "response_metrics": self.db.get_response_metrics("критичность"),
+                       "incident_series": self.db.get_incident_series()})
+
+    def _refresh(self, data):
+        stats = data["statistics"]
+        # Пересобираем текст, только если сводка или справочники изменились
+        refs = self.db.refs
+        state = (stats, data["response_metrics"], data["incident_series"],
+                 refs.statuses.version, refs.organizations.version, refs.responsibles.version)
+        if state == self._shown:
+            return
+        self._shown = state
+
+        self.total_label.configure(text=f"Всего инцидентов: {stats['всего']}")
+        names = {
+            "статус": refs.statuses.name,
+            "организация": refs.organizations.name,
+            "ответственный": refs.responsibles.name,
+            "критичность": lambda level: level or "Не указана",
+        }
+        for dimension, _ in self.SECTIONS:
+            rows = [(names[dimension](key), count) for key, count in stats[dimension][:self.TOP]]
+            self.section_labels[dimension].configure(text=self._bars(rows))
+        self.days_label.configure(text=self._bars(stats["по_дням"]))
+        self.times_label.configure(text=self._times(data["response_metrics"]))
+        self.weeks_label.configure(text=self._weeks(data["incident_series"]))
+
+    @staticmethod
+    def _duration(seconds):
+        if seconds is None:
+            return "—"
+        minutes = int(seconds // 60)
+        if minutes < 60:
+            return f"{minutes} мин"
+        hours, minutes = divmod(minutes, 60)
+        if hours < 24:
+            return f"{hours} ч {minutes} мин"
+        days, hours = divmod(hours, 24)
+        return f"{days} д {hours} ч"
+
+    def _times(self, rows):
+        """Строки 'уровень: MTTA (n) / MTTR (n)'"""
+        if not rows:
+            return "Нет данных"
+        return "\n".join(
+            f"{(level or 'Не указана')[:30]:<30} MTTA {self._duration(mtta)} ({mtta_n}) / "
+            f"MTTR {self._duration(mttr)} ({mttr_n})"
+            for level, mtta, mtta_n, mttr, mttr_n in rows
+        )
+
+    def _weeks(self, rows):
+        """Полоса за неделю и разбивка по уровням критичности"""
+        if not rows:
+            return "Нет данных"
+        bars = self._bars([(start, total) for start, total, _ in rows]).split("\n")
+        return "\n".join(
+            bar + ("  (" + ", ".join(f"{level}: {count}" for level, count in sorted(levels.items())) + ")"
+                   if levels else "")
+            for bar, (_, _, levels) in zip(bars, rows)
+        )
+
+    def _bars(self, rows):
+        """Текстовая гистограмма: название, полоса, количество"""
+        if not rows:
+            return "Нет данных"
+        peak = max(count for _, count in rows) or 1
+        width = max(len(str(name)) for name, _ in rows)
+        lines = []
+        for name, count in rows:
+            bar = "█" * max(1, round(count / peak * self.BAR_WIDTH)) if count else ""
+            lines.append(f"{str(name)[:30]:<{min(width, 30)}} {bar} {count}")
+        return "\n".join(lines)
@@ -0,0 +1,212 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import logging
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tkinter import filedialog, messagebox
+
+import customtkinter as ctk
+
+from gui.virtual_list import VirtualList
+
+
+def _format_size(size: int) -> str:
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
+
+class EvidencePanel(ctk.CTkFrame):
+    """
+    Улики инцидента в окне паспорта: список, прикрепление, сохранение и
+    просмотр. Шифрование и расшифровка файлов идут в фоновом потоке,
+    запись метаданных в БД — в UI-потоке.
+    """
+    POLL_MS = 100
+
+    def __init__(self, master, db, incident_id, user: dict, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.db = db
+        self.store = db.evidence
+        self.incident_id = incident_id
+        self.user = user
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evidence")
+        self._pending = []   # (future, on_done)
+        self._poll_job = None
+
+        self.grid_columnconfigure(0, weight=1)
+        ctk.CTkLabel(self, text="Улики:", anchor="w").grid(row=0, column=0, sticky="w")
+
+        self.listbox = VirtualList(self, height=100, empty_text="Нет улик",
+                                   on_double_click=lambda key: self._view())
+        self.listbox.grid(row=1, column=0, sticky="ew", pady=5)
+
+        buttons = ctk.CTkFrame(self, fg_color="transparent")
+        buttons.grid(row=2, column=0, sticky="ew")
+        self.attach_button = ctk.CTkButton(buttons, text="Прикрепить...", width=110, command=self._attach)
+        self.attach_button.pack(side="left", padx=(0, 5))
+        ctk.CTkButton(buttons, text="Сохранить как...", width=110, command=self._export).pack(side="left", padx=5)
+        ctk.CTkButton(buttons, text="Просмотр", width=90, command=self._view).pack(side="left", padx=5)
+        self.delete_button = ctk.CTkButton(buttons, text="Удалить", width=80, fg_color="red", command=self._delete)
+        self.delete_button.pack(side="left", padx=5)
+        if user['role'] != 'admin':
+            self.delete_button.configure(state="disabled")
+
+        self.status_label = ctk.CTkLabel(buttons, text="")
+        self.status_label.pack(side="left", padx=5)
+
+        self._reload()
+
+    def _reload(self):
+        self.listbox.set_items([
+            (evidence_id, f"{name} | {_format_size(size)} | {added} | {user}")
+            for evidence_id, name, size, _, added, user in self.store.list(self.incident_id)
+        ])
+
+    def _selected(self):
+        if self.listbox.selected_id is None:
+            messagebox.showwarning("Улики", "Выберите улику", parent=self)
+        return self.listbox.selected_id
+
+    # --- Фоновые операции ---
+    def _submit(self, text, work, on_done):
+        self.status_label.configure(text=text)
+        self._pending.append((self._executor.submit(work), on_done))
+        if self._poll_job is None:
+            self._poll_job = self.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_job = None
+        still_running = []
+        for future, on_done in self._pending:
+            if not future.done():
+                still_running.append((future, on_done))
+                continue
+            try:
+                on_done(future.result())
+            except Exception as e:
+                logging.error(f"Ошибка операции с уликой: {e}")
+                messagebox.showerror("Улики", f"Ошибка: {e}", parent=self)
+        self._pending = still_running
+        if self._pending:
+            self._poll_job = self.after(self.POLL_MS, self._poll)
+        else:
+            self.status_label.configure(text="")
+
+    def _attach(self):
+        path = filedialog.askopenfilename(parent=self, title="Прикрепить улику")
+        if not path:
+            return
+        path = Path(path)
+
+        def write():
+            with open(path, "rb") as f:
+                return self.store.write_chunks(f)
+
+        def done(manifest):
+            self.store.register(self.incident_id, manifest, path.name, self.user['username'],
+                                mimetypes.guess_type(path.name)[0])
+            self._reload()
+
+        self._submit(f"Шифрование {path.name}...", write, done)
+
+    def _export(self):
+        evidence_id = self._selected()
+        if evidence_id is None:
+            return
+        plan = self.store.export_plan(evidence_id)
+        destination = filedialog.asksaveasfilename(parent=self, initialfile=plan["имя_файла"])
+        if not destination:
+            return
+        self._submit("Сохранение...", lambda: self.store.write_export(plan, destination),
+                     lambda _: messagebox.showinfo("Улики", f"Сохранено: {destination}", parent=self))
+
+    def _view(self):
+        evidence_id = self._selected()
+        if evidence_id is not None:
+            EvidenceViewer(self, self.store, evidence_id)
+
+    def _delete(self):
+        evidence_id = self._selected()
+        if evidence_id is None:
+            return
+        if messagebox.askyesno("Улики", "Удалить улику?", parent=self):
+            self.store.delete(evidence_id, self.user['username'])
+            self._reload()
+
+    def destroy(self):
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        self._executor.shutdown(wait=False)
+        super().destroy()
+
+
+class EvidenceViewer(ctk.CTkToplevel):
+    """Постраничный просмотр улики (hex или текст): читается только текущая страница"""
+    PAGE_SIZE = 4096
+    BYTES_PER_LINE = 16
+
+    def __init__(self, master, store, evidence_id):
+        super().__init__(master)
+        self.store = store
+        self.evidence_id = evidence_id
+        _, _, self.name, self.size, _, _ = store.get(evidence_id)
+        self.offset = 0
+
+        self.title(f"Улика: {self.name}")
+        self.geometry("760x560")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        controls = ctk.CTkFrame(self, fg_color="transparent")
+        controls.grid(row=0, column=0, sticky="ew", padx=10, pady=(10, 5))
+        ctk.CTkButton(controls, text="⏮", width=40, command=lambda: self._go(0)).pack(side="left")
+        ctk.CTkButton(controls, text="◀", width=40,
+                      command=lambda: self._go(self.offset - self.PAGE_SIZE)).pack(side="left", padx=5)
+        ctk.CTkButton(controls, text="▶", width=40,
+                      command=lambda: self._go(self.offset + self.PAGE_SIZE)).pack(side="left")
+        self.mode_var = ctk.StringVar(value="hex")
+        ctk.CTkSegmentedButton(controls, values=["hex", "текст"], variable=self.mode_var,
+                               command=lambda _: self._render()).pack(side="left", padx=10)
+        self.position_label = ctk.CTkLabel(controls, text="")
+        self.position_label.pack(side="left", padx=5)
+
+        self.textbox = ctk.CTkTextbox(self, font=("Courier New", 12), wrap="none")
+        self.textbox.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
+
+        self._render()
+
+    def _go(self, offset):
+        last_page = max(0, (self.size - 1) // self.PAGE_SIZE * self.PAGE_SIZE)
+        self.offset = min(max(0, offset), last_page)
+        self._render()
+
+    def _render(self):
+        try:
+            data = self.store.read_range(self.evidence_id, self.offset, self.PAGE_SIZE)
+        except Exception as e:
+            logging.error(f"Не удалось прочитать улику {self.evidence_id}: {e}")
+            data = b""
+            text = f"Ошибка чтения: {e}"
+        else:
+            text = self._hex(data) if self.mode_var.get() == "hex" else data.decode("utf-8", errors="replace")
+
+        self.position_label.configure(
+            text=f"{self.offset}–{self.offset + len(data)} из {self.size} байт")
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("1.0", text)
+        self.textbox.configure(state="disabled")
+
+    def _hex(self, data: bytes) -> str:
+        lines = []
+        for start in range(0, len(data), self.BYTES_PER_LINE):
+            row = data[start:start + self.BYTES_PER_LINE]
+            printable = "".join(chr(b) if 32 <= b < 127 else "." for b in row)
+            lines.append(f"{self.offset + start:08x}  {row.hex(' '):<47}  {printable}")
+        return "\n".join(lines)
@@ -3,12 +3,23 @@ from tkinter import ttk
 
 import customtkinter as ctk
 
+from gui.refresh import AutoRefreshMixin
+
+
+class HistoryViewer(AutoRefreshMixin, ctk.CTkFrame):
+    PAGE_SIZE = 200      # записей за одну подгрузку
+    PREVIEW_LEN = 120    # длина значений в таблице; полный текст — в панели деталей
 
-class HistoryViewer(ctk.CTkFrame):
     def __init__(self, master, db_manager, user_info):
         super().__init__(master)
         self.db = db_manager
         self.user = user_info
+
+        # Границы загруженного окна журнала по история_изменения_id
+        self._newest_id = None
+        self._oldest_id = None
+        self._exhausted = False
+        self._loading_more = False
         
         # Конфигурация сетки
         self.grid_columnconfigure(0, weight=1)
@@ -16,8 +27,7 @@ class HistoryViewer(ctk.CTkFrame):
         
         self._setup_ui()
         self._load_data()
-        
-        self._start_auto_refresh()
+        self._load_hot_spots()
         
         # Установка заголовка окна
         # master.title(f"Журнал изменений (пользователь: {self.user['username']} | Роль: {self.user['role']})")
@@ -152,36 +162,93 @@ class HistoryViewer(ctk.CTkFrame):
             command=self.tree.yview,
             style="Vertical.TScrollbar"
         )
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self._scrollbar = scrollbar
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
         
         self.tree.grid(row=0, column=0, sticky="nsew")
         scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+        # Панель деталей: полный текст выбранной записи загружается по запросу
+        self.details = ctk.CTkTextbox(self, height=110, wrap="word")
+        self.details.grid(row=2, column=0, padx=10, pady=(0, 10), sticky="ew")
+        self.details.insert("1.0", "Выберите запись, чтобы увидеть полные значения.")
+        self.details.configure(state="disabled")
+
+        # Горячие точки входа: неудачные попытки за скользящее окно (src.auth_telemetry)
+        hot_frame = ctk.CTkFrame(self)
+        hot_frame.grid(row=3, column=0, padx=10, pady=(0, 10), sticky="ew")
+        hot_frame.grid_columnconfigure(0, weight=1)
+        self.hot_label = ctk.CTkLabel(hot_frame, text="Попытки входа", anchor="w")
+        self.hot_label.grid(row=0, column=0, padx=5, sticky="ew")
+        self.hot_tree = ttk.Treeview(
+            hot_frame,
+            columns=("kind", "key", "failed", "attempts", "status"),
+            show="headings",
+            height=4,
+            style="Treeview"
+        )
+        for col_id, heading, width in (
+            ("kind", "Источник", 110),
+            ("key", "Пользователь / узел", 220),
+            ("failed", "Неудач за окно", 110),
+            ("attempts", "Попыток за окно", 110),
+            ("status", "Состояние", 200)
+        ):
+            self.hot_tree.heading(col_id, text=heading)
+            self.hot_tree.column(col_id, width=width, anchor="w")
+        self.hot_tree.grid(row=1, column=0, padx=5, pady=(0, 5), sticky="ew")
         
         # Теги для чередования строк
         self.tree.tag_configure("oddrow", background="#333333")
         self.tree.tag_configure("evenrow", background=BG_COLOR)
 
 
-    def _start_auto_refresh(self):
-        self._load_data()
-        self.after(10000, self._start_auto_refresh)
+    def _refresh(self, data):
+        # Запрос зависит от фильтров вкладки, поэтому выполняется здесь
+        self._load_new_entries()
+        self._load_hot_spots()
+
+    def _load_hot_spots(self):
+        """Горячие точки входа из счётчиков в памяти, без запросов к журналу"""
+        auth = self.db.auth
+        self.hot_tree.delete(*self.hot_tree.get_children())
+        for kind, key, failures, attempts, wait, flagged in auth.hot_spots():
+            if wait:
+                status = f"заблокирован ещё {int(wait) + 1} с"
+            else:
+                status = "подозрительная активность" if flagged else "—"
+            self.hot_tree.insert("", "end", values=(kind, key or "(пусто)", failures,
+                                                    attempts if attempts is not None else "", status))
+        self.hot_label.configure(
+            text=f"Попытки входа с запуска: всего {auth.total}, неудачных {auth.failed}, "
+                 f"отклонено блокировкой {auth.blocked}"
+        )
+
+    def _filters(self):
+        """Текущие значения фильтров в виде аргументов get_audit_logs"""
+        return {
+            "table_filter": self.table_filter.get() if self.table_filter.get() != "Все" else None,
+            "user_filter": self.user_filter.get() if self.user_filter.get() != "Все" else None,
+            "date_from": self.date_from.get() or None,
+            "date_to": self.date_to.get() or None,
+        }
+
+    def _fetch(self, **kwargs):
+        return self.db.get_audit_logs(preview_len=self.PREVIEW_LEN, **self._filters(), **kwargs)
 
     def _load_data(self):
-        """Загрузка данных с учетом фильтров"""
+        """Загрузка первой страницы журнала с учетом фильтров"""
         try:
-            table = self.table_filter.get() if self.table_filter.get() != "Все" else None
-            user = self.user_filter.get() if self.user_filter.get() != "Все" else None
-            
-            logs = self.db.get_audit_logs(
-                table_filter=table,
-                user_filter=user,
-                date_from=self.date_from.get() or None,
-                date_to=self.date_to.get() or None
-            )
-            
+            logs = self._fetch(limit=self.PAGE_SIZE)
+
             self.tree.delete(*self.tree.get_children())
             for log in logs:
-                self.tree.insert("", "end", values=log)
+                self.tree.insert("", "end", iid=log[0], values=log)
+
+            self._newest_id = logs[0][0] if logs else None
+            self._oldest_id = logs[-1][0] if logs else None
+            self._exhausted = len(logs) < self.PAGE_SIZE
                 
         except Exception as e:
             logging.error(f"Ошибка загрузки журнала: {e}")
@@ -190,3 +257,65 @@ class HistoryViewer(ctk.CTkFrame):
                 message=f"Не удалось загрузить данные журнала:\n{str(e)}",
                 icon="cancel"
             )
+
+    def _load_more(self):
+        """Подгружает следующую (более старую) страницу журнала"""
+        self._loading_more = False
+        if self._exhausted or self._oldest_id is None:
+            return
+        try:
+            logs = self._fetch(limit=self.PAGE_SIZE, before_id=self._oldest_id)
+        except Exception as e:
+            logging.error(f"Ошибка подгрузки журнала: {e}")
+            return
+
+        for log in logs:
+            self.tree.insert("", "end", iid=log[0], values=log)
+        if logs:
+            self._oldest_id = logs[-1][0]
+        self._exhausted = len(logs) < self.PAGE_SIZE
+
+    def _load_new_entries(self):
+        """Добавляет в начало таблицы записи, появившиеся после последней загрузки"""
+        if self._newest_id is None:
+            self._load_data()
+            return
+        try:
+            logs = self._fetch(after_id=self._newest_id)
+        except Exception as e:
+            logging.error(f"Ошибка загрузки новых записей журнала: {e}")
+            return
+
+        # logs отсортированы от новых к старым: вставляем с конца, каждый раз в начало
+        for log in reversed(logs):
+            self.tree.insert("", 0, iid=log[0], values=log)
+        if logs:
+            self._newest_id = logs[0][0]
+
+    def _on_tree_scroll(self, first, last):
+        """Подгружает страницу, когда прокрутка подходит к концу таблицы"""
+        self._scrollbar.set(first, last)
+        if float(last) > 0.95 and not self._exhausted and not self._loading_more:
+            self._loading_more = True
+            self.after_idle(self._load_more)
+
+    def _on_select(self, event):
+        """Показывает полные значения выбранной записи"""
+        selected = self.tree.selection()
+        if not selected:
+            return
+        entry = self.db.get_audit_entry(int(selected[0]))
+        if entry is None:
+            return
+
+        entry_id, username, table, action, field, old_value, new_value, date = entry
+        text = (
+            f"#{entry_id} | {date} | {username} | {table} | {action}\n"
+            f"Поле: {field or '-'}\n"
+            f"Старое значение: {old_value or '-'}\n"
+            f"Новое значение: {new_value or '-'}"
+        )
+        self.details.configure(state="normal")
+        self.details.delete("1.0", "end")
+        self.details.insert("1.0", text)
+        self.details.configure(state="disabled")
@@ -1,21 +1,72 @@
-from tkinter import messagebox
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import filedialog, messagebox
 
 import customtkinter as ctk
 
+from gui.autocomplete import AutocompleteEntry
+from gui.attack_panel import AttackPanel
+from gui.evidence_panel import EvidencePanel
+from gui.ioc_panel import IOCPanel
+from gui.measure_recommendations import MeasureRecommendationsPanel
+from gui.similar_window import SimilarIncidentsWindow
+from gui.refresh import AutoRefreshMixin
+from gui.virtual_list import VirtualList
 from src.database import SecureDB
+from src.ioc import IOCStore, iter_feed
+from src.similarity import cluster
+from src.metrics import LatencyHistogram
 
 
-class IncidentTracker(ctk.CTkFrame):
+class IncidentTracker(AutoRefreshMixin, ctk.CTkFrame):
+    refresh_sources = ("statuses", "organizations", "responsibles", "incidents")
+
+    SEARCH_DEBOUNCE_MS = 250   # пауза после нажатия клавиши перед поиском
+    SEARCH_POLL_MS = 30        # как часто UI забирает результаты воркера
+    SEARCH_CHUNK = 5000        # строк за шаг воркера (между проверками отмены)
+
     def __init__(self, master, db: SecureDB, user_info: dict):
         super().__init__(master)
         self.db = db
         self.user = user_info
         self.selected_incident_id = None
+        self.incidents_by_id = {}
+
+        # Снимок списка для поиска: строки списка и названия в нижнем регистре
+        self._all_items = []
+        self._search_names = []
+        self._loaded_state = None
+        self._refs_versions = None
+
+        # Живой поиск: дебаунс в UI-потоке, фильтрация в фоновом воркере.
+        # Новый запрос увеличивает поколение, и воркер бросает устаревший.
+        self._search_term = ""
+        self._search_generation = 0
+        self._search_pending = None
+        self._search_job = None
+        self._drain_job = None
+        self._search_started = 0.0
+        self._search_first_chunk = False
+        self._search_results = queue.Queue()
+        self._search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="incident-search")
+        self.search_first_latency = LatencyHistogram("Поиск: первые результаты")
+        self.search_latency = LatencyHistogram("Поиск: полный результат")
+
+        # Сверка фида IOC: разбор файла и поиск по индексу — в фоне
+        self._feed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ioc-feed")
+        self._feed_future = None
+        self._feed_job = None
+
+        # Поиск дубликатов по всей истории: кластеризация сигнатур — в фоне
+        self._cluster_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="similar")
+        self._cluster_future = None
+        self._cluster_job = None
+
         self._setup_ui()
         self._load_reference_data()
-        self._load_incidents()
         self._update_ui_permissions()
-        self._start_auto_refresh()
 
     def _update_ui_permissions(self):
         """Обновляет доступные действия в зависимости от роли пользователя"""
@@ -24,6 +75,9 @@ class IncidentTracker(ctk.CTkFrame):
         # Разрешаем редактирование/удаление только админам
         self.edit_button.configure(state="normal" if is_admin else "disabled")
         self.delete_button.configure(state="normal" if is_admin else "disabled")
+        for button in (self.bulk_status_button, self.bulk_assign_button,
+                       self.bulk_measure_button, self.bulk_delete_button):
+            button.configure(state="normal" if is_admin else "disabled")
         
         # Для обычных пользователей делаем поля только для чтения
         readonly_state = "normal" if is_admin else "disabled"
@@ -31,6 +85,7 @@ class IncidentTracker(ctk.CTkFrame):
         self.status_combo.configure(state=readonly_state)
         self.org_combo.configure(state=readonly_state)
         self.resp_combo.configure(state=readonly_state)
+        self.auto_assign_check.configure(state=readonly_state)
 
     def _setup_ui(self):
         self.grid_columnconfigure((0, 1, 2, 3, 4, 5), weight=1)
@@ -43,12 +98,19 @@ class IncidentTracker(ctk.CTkFrame):
         self.status_combo = ctk.CTkComboBox(self, variable=self.status_var)
         self.status_combo.grid(row=0, column=1, padx=5, pady=5)
 
+        # Организации и ответственные: автодополнение по индексу вместо полного
+        # выпадающего списка; ответственные фильтруются по выбранной организации
         self.org_var = ctk.StringVar()
-        self.org_combo = ctk.CTkComboBox(self, variable=self.org_var)
+        self.org_combo = AutocompleteEntry(
+            self, self.org_var, source=lambda: self.db.refs.organizations,
+            on_select=self._on_org_selected, placeholder_text="Организация"
+        )
         self.org_combo.grid(row=0, column=2, padx=5, pady=5)
 
         self.resp_var = ctk.StringVar()
-        self.resp_combo = ctk.CTkComboBox(self, variable=self.resp_var)
+        self.resp_combo = AutocompleteEntry(
+            self, self.resp_var, source=self._org_responsibles, placeholder_text="Ответственный"
+        )
         self.resp_combo.grid(row=0, column=3, padx=5, pady=5)
 
         # Кнопки действий
@@ -64,66 +126,167 @@ class IncidentTracker(ctk.CTkFrame):
         # Поиск
         self.search_entry = ctk.CTkEntry(self, placeholder_text="Поиск по названию")
         self.search_entry.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+        self.search_entry.bind("<KeyRelease>", self._on_search_key)
 
         self.search_button = ctk.CTkButton(self, text="Поиск", command=self._search_incidents)
         self.search_button.grid(row=1, column=2, padx=5, pady=5)
 
-        self.reset_button = ctk.CTkButton(self, text="Сброс", command=self._load_incidents)
+        self.reset_button = ctk.CTkButton(self, text="Сброс", command=self._reset_search)
         self.reset_button.grid(row=1, column=3, padx=5, pady=5)
 
-        # Список инцидентов
-        self.incident_listbox = ctk.CTkScrollableFrame(self, width=700, height=300)
+        # Без выбранного ответственного — наименее загруженный из организации
+        self.auto_assign_var = ctk.BooleanVar(value=True)
+        self.auto_assign_check = ctk.CTkCheckBox(self, text="Автоназначение", variable=self.auto_assign_var)
+        self.auto_assign_check.grid(row=1, column=4, padx=5, pady=5)
+
+        # Список инцидентов: виджеты создаются только для видимых строк
+        self.incident_listbox = VirtualList(
+            self, width=700, height=300,
+            on_select=self._select_incident,
+            on_double_click=self._open_passport_window,
+            empty_text="Нет инцидентов",
+            multiselect=True,
+            on_selection_change=self._on_selection_change
+        )
         self.incident_listbox.grid(row=2, column=0, columnspan=6, padx=10, pady=10, sticky="nsew")
 
+        # Массовые действия над выделенными (Ctrl/Shift+клик) инцидентами:
+        # статус, организация и ответственный берутся из полей формы выше
+        bulk = ctk.CTkFrame(self, fg_color="transparent")
+        bulk.grid(row=3, column=0, columnspan=6, padx=10, pady=(0, 10), sticky="ew")
 
-    def _start_auto_refresh(self):
-        self._load_reference_data()
-        self.after(10000, self._start_auto_refresh)
+        self.selection_label = ctk.CTkLabel(bulk, text="Выбрано: 0")
+        self.selection_label.pack(side="left", padx=5)
+
+        ctk.CTkButton(bulk, text="Выбрать все", width=100,
+                      command=self.incident_listbox.select_all).pack(side="left", padx=5)
+
+        self.bulk_status_button = ctk.CTkButton(bulk, text="Задать статус", width=120,
+                                                command=self._bulk_set_status)
+        self.bulk_status_button.pack(side="left", padx=5)
+
+        self.bulk_assign_button = ctk.CTkButton(bulk, text="Переназначить", width=120,
+                                                command=self._bulk_reassign)
+        self.bulk_assign_button.pack(side="left", padx=5)
+
+        self.measure_var = ctk.StringVar()
+        self.measure_combo = ctk.CTkComboBox(bulk, variable=self.measure_var, width=200)
+        self.measure_combo.pack(side="left", padx=5)
+
+        self.bulk_measure_button = ctk.CTkButton(bulk, text="Привязать меру", width=120,
+                                                 command=self._bulk_link_measure)
+        self.bulk_measure_button.pack(side="left", padx=5)
+
+        self.bulk_delete_button = ctk.CTkButton(bulk, text="Удалить выбранные", fg_color="red", width=140,
+                                                command=self._bulk_delete)
+        self.bulk_delete_button.pack(side="left", padx=5)
+
+        # Инциденты, чьи индикаторы встречаются в фиде, выделяются в списке
+        self.feed_button = ctk.CTkButton(bulk, text="Сверить с фидом IOC...", width=160,
+                                         command=self._match_feed)
+        self.feed_button.pack(side="left", padx=5)
+
+        # Почти одинаковые инциденты связываются, повторы выделяются в списке
+        self.duplicates_button = ctk.CTkButton(bulk, text="Найти дубликаты", width=140,
+                                               command=self._find_duplicates)
+        self.duplicates_button.pack(side="left", padx=5)
+
+    def _refresh(self, data):
+        self.statuses = data["statuses"]
+        self.organizations = data["organizations"]
+        self.responsibles = data["responsibles"]
+        self._apply_reference_data(incidents=data["incidents"])
 
     def _load_reference_data(self):
         self.statuses = self.db.get_statuses()
         self.organizations = self.db.get_organizations()
         self.responsibles = self.db.get_responsibles()
+        self._apply_reference_data()
+
+    def _apply_reference_data(self, incidents=None):
+        # Значение сбрасывается, только если выбранного больше нет:
+        # выделение сохраняется между обновлениями, форма не должна затираться
+        names = [row[1] for row in self.statuses]
+        self.status_combo.configure(values=names)
+        if names and self.status_var.get() not in names:
+            self.status_var.set(names[0])
+
+        # Поля с автодополнением проверяются только при смене справочников,
+        # иначе плановое обновление стирало бы недопечатанный текст
+        refs = self.db.refs
+        versions = (refs.organizations.version, refs.responsibles.version)
+        if versions != self._refs_versions:
+            self._refs_versions = versions
+            if self.org_var.get() and not self.org_combo.is_valid():
+                self.org_var.set("")
+            if self.resp_var.get() and not self.resp_combo.is_valid():
+                self.resp_var.set("")
+
+        self.measures = self.db.get_response_measures()
+        measure_names = [row[1] for row in self.measures]
+        self.measure_combo.configure(values=measure_names)
+        if measure_names and self.measure_var.get() not in measure_names:
+            self.measure_var.set(measure_names[0])
+        self._load_incidents(incidents=incidents)
+
+    def _org_responsibles(self):
+        """Ответственные выбранной организации (все, если организация не выбрана)"""
+        refs = self.db.refs
+        org_id = refs.organizations.id(self.org_var.get())
+        if org_id is None:
+            return refs.responsibles
+        return refs.responsibles_of(org_id)
+
+    def _on_org_selected(self, org_name):
+        # Ответственный из другой организации больше не подходит
+        if self.resp_var.get() and not self.resp_combo.is_valid():
+            self.resp_var.set("")
+
+    def _load_incidents(self, incidents=None):
+        if incidents is None:
+            incidents = self.db.get_incidents()
+
+        # Данные и справочники не менялись — перестраивать нечего
+        state = (incidents, self.statuses, self.organizations, self.responsibles)
+        if state == self._loaded_state:
+            return
+        self._loaded_state = state
 
-        self.status_combo.configure(values=[s[1] for s in self.statuses])
-        if self.statuses: self.status_var.set(self.statuses[0][1])
-
-        self.org_combo.configure(values=[o[1] for o in self.organizations])
-        if self.organizations: self.org_var.set(self.organizations[0][1])
-
-        self.resp_combo.configure(values=[r[1] for r in self.responsibles])
-        if self.responsibles: self.resp_var.set(self.responsibles[0][1])
-        self._load_incidents()
-
-    def _load_incidents(self, search_term: str = None):
-        self._clear_listbox()
-        incidents = self.db.get_incidents()
-        if search_term:
-            incidents = [i for i in incidents if search_term.lower() in i[1].lower()]
+        refs = self.db.refs
+        status_names = refs.statuses.by_id
+        org_names = refs.organizations.by_id
+        resp_names = refs.responsibles.by_id
 
-        self.incident_widgets = []
+        self.incidents_by_id = {}
+        items = []
         for inc in incidents:
             inc_id, name, date, status_id, org_id, resp_id = inc
-            status_name = next((s[1] for s in self.statuses if s[0] == status_id), "Неизвестно")
-            org_name = next((o[1] for o in self.organizations if o[0] == org_id), "Неизвестно")
-            resp_name = next((r[1] for r in self.responsibles if r[0] == resp_id), "Неизвестно")
-
-            text = f"ID:{inc_id} | {name} | {status_name} | {org_name} | {resp_name}"
-            label = ctk.CTkButton(self.incident_listbox, text=text, anchor="w", command=lambda i=inc: self._select_incident(i))
-            label.pack(fill="x", pady=2, padx=2)
-            self.incident_widgets.append(label)
-            # Привязка двойного клика с захватом текущего inc_id
-            label.bind("<Double-Button-1>", lambda e, inc_id=inc_id: self._open_passport_window(inc_id))
-            self.incident_widgets.append(label)
-
-        if not incidents:
-            ctk.CTkLabel(self.incident_listbox, text="Нет инцидентов").pack(pady=5)
-            return
+            self.incidents_by_id[inc_id] = inc
+            items.append((inc_id, f"ID:{inc_id} | {name} | "
+                                  f"{status_names[status_id][1] if status_id in status_names else 'Неизвестно'} | "
+                                  f"{org_names[org_id][1] if org_id in org_names else 'Неизвестно'} | "
+                                  f"{resp_names[resp_id][1] if resp_id in resp_names else 'Неизвестно'}"))
 
-    def _clear_listbox(self):
-        for widget in self.incident_listbox.winfo_children():
-            widget.destroy()
-        self.selected_incident_id = None
+        self._all_items = items
+        self._search_names = [inc[1].lower() for inc in incidents]
+
+        if self.selected_incident_id not in self.incidents_by_id:
+            self.selected_incident_id = None
+
+        if self._search_term:
+            # Активный поиск перезапускается по новым данным
+            self._search_started = time.perf_counter()
+            self._search_incidents()
+        else:
+            # Список сам вычисляет, какие видимые строки изменились
+            self.incident_listbox.set_items(items)
+
+    def _form_ids(self):
+        """ID статуса, организации и ответственного, выбранных в форме"""
+        refs = self.db.refs
+        return (refs.statuses.id(self.status_var.get()),
+                refs.organizations.id(self.org_var.get()),
+                self._org_responsibles().id(self.resp_var.get()))
 
     def _add_incident(self):
         name = self.entry_name.get().strip()
@@ -131,30 +294,52 @@ class IncidentTracker(ctk.CTkFrame):
             messagebox.showwarning("Ошибка", "Введите название инцидента")
             return
 
-        status_id = next((s[0] for s in self.statuses if s[1] == self.status_var.get()), None)
-        org_id = next((o[0] for o in self.organizations if o[1] == self.org_var.get()), None)
-        resp_id = next((r[0] for r in self.responsibles if r[1] == self.resp_var.get()), None)
-
-        self.db.add_incident(название=name, статус_id=status_id, организация_id=org_id, ответственный_id=resp_id)
-        messagebox.showinfo("Успех", f"Инцидент '{name}' добавлен")
+        status_id, org_id, resp_id = self._form_ids()
+
+        # Повтор уже заведённого инцидента: предлагаем связать или не создавать
+        similar = self.db.similar.similar_to_text(name)
+        if similar:
+            lines = []
+            for other_id, score in similar:
+                details = self.db.get_incident_details(other_id)
+                lines.append(f"ID {other_id}: {details['название'] if details else '?'} ({score:.0%})")
+            answer = messagebox.askyesnocancel(
+                "Похожие инциденты",
+                "Найдены похожие инциденты:\n" + "\n".join(lines) +
+                "\n\nДа — создать и связать с ними\nНет — создать без связи\nОтмена — не создавать (дубликат)")
+            if answer is None:
+                return
+            if not answer:
+                similar = []
+
+        message = f"Инцидент '{name}' добавлен"
+        if resp_id is None and self.auto_assign_var.get():
+            resp_id = self.db.assignment.pick(org_id)
+            if resp_id is not None:
+                message += f"\nНазначен ответственный: {self.db.refs.responsibles.name(resp_id, '')}"
+
+        incident_id = self.db.add_incident(название=name, статус_id=status_id, организация_id=org_id,
+                                           ответственный_id=resp_id)
+        if similar:
+            self.db.similar.link([(incident_id, other_id, score) for other_id, score in similar],
+                                 self.user['username'])
+            message += f"\nСвязан с похожими: {len(similar)}"
+        messagebox.showinfo("Успех", message)
         self.entry_name.delete(0, 'end')
         self._load_incidents()
 
-    def _select_incident(self, incident_data):
+    def _select_incident(self, incident_id):
+        incident_data = self.incidents_by_id.get(incident_id)
+        if incident_data is None:
+            return
         inc_id, name, _, status_id, org_id, resp_id = incident_data
         self.selected_incident_id = inc_id
         self.entry_name.delete(0, 'end')
         self.entry_name.insert(0, name)
-        self.status_var.set(next((s[1] for s in self.statuses if s[0] == status_id), ""))
-        self.org_var.set(next((o[1] for o in self.organizations if o[0] == org_id), ""))
-        self.resp_var.set(next((r[1] for r in self.responsibles if r[0] == resp_id), ""))
-
-        # Подсветка
-        for widget in self.incident_widgets:
-            widget.configure(fg_color="transparent")
-        selected_widget = next((w for w in self.incident_widgets if f"ID:{incident_data[0]}" in w.cget("text")), None)
-        if selected_widget:
-            selected_widget.configure(fg_color="#333333")
+        refs = self.db.refs
+        self.status_var.set(refs.statuses.name(status_id, ""))
+        self.org_var.set(refs.organizations.name(org_id, ""))
+        self.resp_var.set(refs.responsibles.name(resp_id, ""))
 
         # measures = self.db.get_measures_for_incident(inc_id)
         # measures_text = ", ".join([m[1] for m in measures]) if measures else "Нет мер реагирования"
@@ -171,12 +356,11 @@ class IncidentTracker(ctk.CTkFrame):
             messagebox.showwarning("Ошибка", "Название не может быть пустым")
             return
 
-        status_id = next((s[0] for s in self.statuses if s[1] == self.status_var.get()), None)
-        org_id = next((o[0] for o in self.organizations if o[1] == self.org_var.get()), None)
-        resp_id = next((r[0] for r in self.responsibles if r[1] == self.resp_var.get()), None)
+        status_id, org_id, resp_id = self._form_ids()
 
         try:
             old_data = self.db.get_incident_details(self.selected_incident_id)
+            refs = self.db.refs
 
             self.db.update_incident(
                 id=self.selected_incident_id,
@@ -192,18 +376,18 @@ class IncidentTracker(ctk.CTkFrame):
                 changes.append(f"название: {old_data.get('название')} → {name}")
 
             if old_data.get('статус_инцидента_id') != status_id:
-                old_status = next((s[1] for s in self.statuses if s[0] == old_data.get('статус_инцидента_id')), "Неизвестно")
-                new_status = next((s[1] for s in self.statuses if s[0] == status_id), "Неизвестно")
+                old_status = refs.statuses.name(old_data.get('статус_инцидента_id'))
+                new_status = refs.statuses.name(status_id)
                 changes.append(f"статус: {old_status} → {new_status}")
 
             if old_data.get('организация_id') != org_id:
-                old_org = next((o[1] for o in self.organizations if o[0] == old_data.get('организация_id')), "Неизвестно")
-                new_org = next((o[1] for o in self.organizations if o[0] == org_id), "Неизвестно")
+                old_org = refs.organizations.name(old_data.get('организация_id'))
+                new_org = refs.organizations.name(org_id)
                 changes.append(f"организация: {old_org} → {new_org}")
 
             if old_data.get('ответственный_id') != resp_id:
-                old_resp = next((r[1] for r in self.responsibles if r[0] == old_data.get('ответственный_id')), "Неизвестно")
-                new_resp = next((r[1] for r in self.responsibles if r[0] == resp_id), "Неизвестно")
+                old_resp = refs.responsibles.name(old_data.get('ответственный_id'))
+                new_resp = refs.responsibles.name(resp_id)
                 changes.append(f"ответственный: {old_resp} → {new_resp}")
 
             if changes:
@@ -218,7 +402,8 @@ class IncidentTracker(ctk.CTkFrame):
                         'статус_инцидента_id': status_id,
                         'организация_id': org_id,
                         'ответственный_id': resp_id
-                    })
+                    }),
+                    объект_id=self.selected_incident_id
                 )
 
             messagebox.showinfo("Готово", "Инцидент обновлён")
@@ -233,44 +418,282 @@ class IncidentTracker(ctk.CTkFrame):
             return
 
         if messagebox.askyesno("Удаление", "Удалить выбранный инцидент?"):
-            self.db.delete_incident(self.selected_incident_id)
+            incident_id = self.selected_incident_id
+            self.db.delete_incident(incident_id)
             self.selected_incident_id = None
             self._load_incidents()
             self.db.log_change(
                 username=self.user['username'],
                 таблица="Инциденты",
-                действие=f"Удалён инцидент с ID {self.selected_incident_id}",
+                действие=f"Удалён инцидент с ID {incident_id}",
                 поле=None,
                 старое_значение=None,
-                новое_значение=None
+                новое_значение=None,
+                объект_id=incident_id
             )
 
+    # --- Массовые операции ---
+    def _on_selection_change(self, selected_ids):
+        self.selection_label.configure(text=f"Выбрано: {len(selected_ids)}")
+
+    def _bulk_targets(self):
+        """Выделенные инциденты или None, если ничего не выбрано"""
+        ids = set(self.incident_listbox.selected_ids)
+        if not ids:
+            messagebox.showwarning("Выбор", "Выделите инциденты (Ctrl/Shift+клик)")
+            return None
+        return ids
+
+    def _run_bulk(self, description, operation):
+        """Выполняет массовую операцию и один раз обновляет список"""
+        try:
+            count = operation()
+        except Exception as e:
+            logging.error(f"Ошибка массовой операции '{description}': {e}")
+            messagebox.showerror("Ошибка", f"Не удалось выполнить операцию: {str(e)}")
+            return
+        self._load_incidents()
+        messagebox.showinfo("Готово", f"{description}: {count}")
+
+    def _match_feed(self):
+        path = filedialog.askopenfilename(title="Фид индикаторов", parent=self)
+        if not path:
+            return
+        index = self.db.iocs.index()
+
+        def work():
+            stats = {}
+            incidents = set()
+            for _, _, matched in IOCStore.match_feed(index, iter_feed(path), stats):
+                incidents |= matched
+            return incidents, stats
+
+        self.feed_button.configure(state="disabled", text="Сверка...")
+        self._feed_future = self._feed_executor.submit(work)
+        self._feed_job = self.after(200, self._poll_feed)
+
+    def _poll_feed(self):
+        self._feed_job = None
+        if not self._feed_future.done():
+            self._feed_job = self.after(200, self._poll_feed)
+            return
+        self.feed_button.configure(state="normal", text="Сверить с фидом IOC...")
+        try:
+            incidents, stats = self._feed_future.result()
+        except Exception as e:
+            logging.error(f"Ошибка сверки фида IOC: {e}")
+            messagebox.showerror("Ошибка", f"Не удалось сверить фид: {e}")
+            return
+        self.incident_listbox.select_many(incidents)
+        logging.info(f"Сверка фида IOC: {stats}, инцидентов {len(incidents)}")
+        messagebox.showinfo(
+            "Сверка фида",
+            f"Строк: {stats['строк']}, совпадений: {stats['совпадений']}, "
+            f"нераспознано: {stats['нераспознано']}\nИнцидентов выделено: {len(incidents)}")
+
+    def _find_duplicates(self):
+        signatures = self.db.similar.snapshot()
+        self.duplicates_button.configure(state="disabled", text="Поиск...")
+        self._cluster_future = self._cluster_executor.submit(cluster, signatures)
+        self._cluster_job = self.after(200, self._poll_duplicates)
+
+    def _poll_duplicates(self):
+        self._cluster_job = None
+        if not self._cluster_future.done():
+            self._cluster_job = self.after(200, self._poll_duplicates)
+            return
+        self.duplicates_button.configure(state="normal", text="Найти дубликаты")
+        try:
+            clusters, links = self._cluster_future.result()
+        except Exception as e:
+            logging.error(f"Ошибка поиска дубликатов: {e}")
+            messagebox.showerror("Ошибка", f"Не удалось найти дубликаты: {e}")
+            return
+        added = self.db.similar.link(links, self.user['username'])
+        # Первый (самый ранний) инцидент кластера остаётся, повторы выделяются
+        duplicates = [key for members in clusters for key in members[1:]]
+        self.incident_listbox.select_many(duplicates)
+        logging.info(f"Поиск дубликатов: кластеров {len(clusters)}, повторов {len(duplicates)}, новых связей {added}")
+        messagebox.showinfo(
+            "Дубликаты",
+            f"Групп похожих инцидентов: {len(clusters)}\nПовторов выделено: {len(duplicates)}\n"
+            f"Новых связей: {added}")
+
+    def _bulk_set_status(self):
+        ids = self._bulk_targets()
+        if ids is None:
+            return
+        status_id = self.db.refs.statuses.id(self.status_var.get())
+        if status_id is None:
+            messagebox.showwarning("Ошибка", "Выберите статус")
+            return
+        self._run_bulk("Статус изменён у инцидентов", lambda: self.db.bulk_update_incidents(
+            ids, self.user['username'], статус_id=status_id))
+
+    def _bulk_reassign(self):
+        ids = self._bulk_targets()
+        if ids is None:
+            return
+        _, org_id, resp_id = self._form_ids()
+        if org_id is None and resp_id is None:
+            messagebox.showwarning("Ошибка", "Выберите организацию или ответственного")
+            return
+        fields = {}
+        if org_id is not None:
+            fields['организация_id'] = org_id
+        if resp_id is not None:
+            fields['ответственный_id'] = resp_id
+        self._run_bulk("Переназначено инцидентов", lambda: self.db.bulk_update_incidents(
+            ids, self.user['username'], **fields))
+
+    def _bulk_link_measure(self):
+        ids = self._bulk_targets()
+        if ids is None:
+            return
+        measure_id = next((row[0] for row in self.measures if row[1] == self.measure_var.get()), None)
+        if measure_id is None:
+            messagebox.showwarning("Ошибка", "Выберите меру реагирования")
+            return
+        self._run_bulk("Мера привязана к инцидентам", lambda: self.db.bulk_link_measure(
+            ids, measure_id, self.user['username']))
+
+    def _bulk_delete(self):
+        ids = self._bulk_targets()
+        if ids is None:
+            return
+        if not messagebox.askyesno("Удаление", f"Удалить выбранные инциденты ({len(ids)})?"):
+            return
+        self._run_bulk("Удалено инцидентов", lambda: self.db.bulk_delete_incidents(
+            ids, self.user['username']))
+
+    # --- Живой поиск ---
+    def _on_search_key(self, event=None):
+        """Откладывает поиск до паузы в наборе текста"""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_started = time.perf_counter()
+        self._search_job = self.after(self.SEARCH_DEBOUNCE_MS, self._search_incidents)
+
     def _search_incidents(self):
-        term = self.search_entry.get().strip()
-        self._load_incidents(search_term=term)
+        """Запускает поиск в фоне; выполняющийся устаревший поиск отменяется"""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+            self._search_job = None
+
+        self._search_term = self.search_entry.get().strip().lower()
+        self._search_generation += 1
+
+        if not self._search_term:
+            self._search_pending = None
+            self.incident_listbox.set_items(self._all_items)
+            return
+
+        generation = self._search_generation
+        self._search_pending = generation
+        self._search_first_chunk = True
+        self._search_executor.submit(
+            self._search_worker, generation, self._search_term, self._all_items, self._search_names
+        )
+        if self._drain_job is None:
+            self._drain_job = self.after(self.SEARCH_POLL_MS, self._drain_search_results)
+
+    def _search_worker(self, generation, term, items, names):
+        """Фоновая фильтрация снимка; результаты отдаются порциями через очередь"""
+        try:
+            for start in range(0, len(names), self.SEARCH_CHUNK):
+                if generation != self._search_generation:
+                    return  # пришёл более новый запрос
+                end = min(start + self.SEARCH_CHUNK, len(names))
+                matches = [items[i] for i in range(start, end) if term in names[i]]
+                if matches:
+                    self._search_results.put((generation, matches, False))
+        finally:
+            self._search_results.put((generation, [], True))
+
+    def _drain_search_results(self):
+        """Забирает порции результатов и дописывает их в список"""
+        self._drain_job = None
+        while True:
+            try:
+                generation, matches, done = self._search_results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._search_generation:
+                continue
+
+            elapsed_ms = (time.perf_counter() - self._search_started) * 1000
+            if self._search_first_chunk:
+                self._search_first_chunk = False
+                self.incident_listbox.set_items(matches)
+                self.search_first_latency.observe(elapsed_ms)
+            elif matches:
+                self.incident_listbox.append_items(matches)
+
+            if done:
+                self._search_pending = None
+                self.search_latency.observe(elapsed_ms)
+                logging.debug(self.search_latency.summary())
+
+        if self._search_pending is not None:
+            self._drain_job = self.after(self.SEARCH_POLL_MS, self._drain_search_results)
+
+    def _reset_search(self):
+        self.search_entry.delete(0, "end")
+        self._search_incidents()
+
+    def destroy(self):
+        self._search_generation += 1
+        self._search_executor.shutdown(wait=False)
+        self._feed_executor.shutdown(wait=False)
+        self._cluster_executor.shutdown(wait=False)
+        for job in (self._search_job, self._drain_job, self._feed_job, self._cluster_job):
+            if job is not None:
+                self.after_cancel(job)
+        if self.search_latency.total:
+            logging.info(self.search_latency.summary())
+            logging.info(self.search_first_latency.summary())
+        super().destroy()
 
     def _open_passport_window(self, incident_id):
-        passport = self.db.get_passport(incident_id)
+        # Всё нужное окну — одним обращением к кэшу сводных данных
+        bundle = self.db.get_incident_bundle(incident_id)
+        if bundle is None:
+            messagebox.showwarning("Паспорт", "Инцидент не найден")
+            return
+        incident = bundle['incident']
+        passport = bundle['passport']
+        refs = self.db.refs
 
         passport_window = ctk.CTkToplevel()
         passport_window.title(f"Паспорт инцидента ID {incident_id}")
-        passport_window.geometry("500x400")
+        passport_window.geometry("640x720")
+        # Панелей больше, чем помещается на экране: содержимое прокручивается
+        body = ctk.CTkScrollableFrame(passport_window, fg_color="transparent")
+        body.pack(fill="both", expand=True)
+        body.grid_columnconfigure(1, weight=1)
+
+        summary = (f"{incident['название']}\n"
+                   f"Статус: {refs.statuses.name(incident['статус_инцидента_id'])} | "
+                   f"Организация: {refs.organizations.name(incident['организация_id'])} | "
+                   f"Ответственный: {refs.responsibles.name(incident['ответственный_id'])}")
+        ctk.CTkLabel(body, text=summary, anchor="w", justify="left").grid(
+            row=0, column=0, columnspan=2, padx=10, pady=(10, 5), sticky="w")
 
         labels = ["Уровень критичности:", "Источник угрозы:", "Последствия:", "Тип инцидента:", "Категория инцидента:"]
         entries = []
 
-        for idx, label_text in enumerate(labels):
-            label = ctk.CTkLabel(passport_window, text=label_text, anchor="w")
+        for idx, label_text in enumerate(labels, start=1):
+            label = ctk.CTkLabel(body, text=label_text, anchor="w")
             label.grid(row=idx, column=0, padx=10, pady=5, sticky="w")
 
-            entry = ctk.CTkEntry(passport_window, width=300)
-            entry.grid(row=idx, column=1, padx=10, pady=5)
+            entry = ctk.CTkEntry(body, width=300)
+            entry.grid(row=idx, column=1, padx=10, pady=5, sticky="ew")
             entries.append(entry)
 
         # Если паспорт найден — заполняем
         if passport:
             for entry, value in zip(entries, passport):
-                entry.insert(0, value)
+                entry.insert(0, value or "")
 
         def save_passport():
             values = [entry.get().strip() for entry in entries]
@@ -284,9 +707,66 @@ class IncidentTracker(ctk.CTkFrame):
             else:  # Создаём
                 self.db.add_passport(incident_id, *values)
                 messagebox.showinfo("Успех", "Паспорт создан.")
+            self.db.log_change(
+                username=self.user['username'],
+                таблица="ПаспортаИнцидентов",
+                действие="Редактирование" if passport else "Добавление",
+                поле="Все",
+                старое_значение=str(passport) if passport else "",
+                новое_значение=str(tuple(values)),
+                объект_id=incident_id
+            )
             passport_window.destroy()
 
-        save_button = ctk.CTkButton(passport_window, text="Сохранить", command=save_passport)
-        save_button.grid(row=len(labels), column=0, columnspan=2, pady=15)
-
-        passport_window.mainloop()
\ No newline at end of file
+        row = len(labels) + 1
+        save_button = ctk.CTkButton(body, text="Сохранить", command=save_passport)
+        save_button.grid(row=row, column=0, pady=15)
+        ctk.CTkButton(
+            body, text="Похожие инциденты...",
+            command=lambda: SimilarIncidentsWindow(passport_window, self.db, incident_id, self.user,
+                                                   on_change=self._load_incidents)
+        ).grid(row=row, column=1, pady=15)
+
+        # Меры реагирования и история изменений — только просмотр
+        measures_text = "\n".join(f"• {m[1]}" for m in bundle['measures']) or "Нет мер реагирования"
+        ctk.CTkLabel(body, text="Меры реагирования:", anchor="w").grid(
+            row=row + 1, column=0, columnspan=2, padx=10, sticky="w")
+        measures_box = ctk.CTkTextbox(body, height=90)
+        measures_box.grid(row=row + 2, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
+        measures_box.insert("1.0", measures_text)
+        measures_box.configure(state="disabled")
+
+        def refresh_measures():
+            text = "\n".join(f"• {m[1]}" for m in self.db.get_measures_for_incident(incident_id))
+            measures_box.configure(state="normal")
+            measures_box.delete("1.0", "end")
+            measures_box.insert("1.0", text or "Нет мер реагирования")
+            measures_box.configure(state="disabled")
+
+        # Переходы статусов (старый, новый, дата) идут перед журналом
+        status_lines = [
+            f"{date} | статус: {refs.statuses.name(old, '—')} → {refs.statuses.name(new)}"
+            for old, new, date in bundle['transitions']
+        ]
+        # entry = (id, username, таблица, действие, поле, старое, новое, дата)
+        history_text = "\n".join(status_lines) + ("\n\n" if status_lines else "") + "\n".join(
+            f"{entry[7]} | {entry[1]} | {entry[3]}" + (f" | {entry[4]}" if entry[4] else "")
+            for entry in bundle['history']
+        ) or "Нет записей"
+        ctk.CTkLabel(body, text="История изменений:", anchor="w").grid(
+            row=row + 3, column=0, columnspan=2, padx=10, sticky="w")
+        history_box = ctk.CTkTextbox(body, height=150)
+        history_box.grid(row=row + 4, column=0, columnspan=2, padx=10, pady=(5, 10), sticky="nsew")
+        history_box.insert("1.0", history_text)
+        history_box.configure(state="disabled")
+
+        # Улики читаются с диска постранично, в окно файл целиком не загружается
+        EvidencePanel(body, self.db, incident_id, self.user).grid(
+            row=row + 5, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="ew")
+        IOCPanel(body, self.db, incident_id, self.user).grid(
+            row=row + 6, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="ew")
+        AttackPanel(body, self.db, incident_id, self.user).grid(
+            row=row + 7, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="ew")
+        MeasureRecommendationsPanel(body, self.db, incident_id, self.user,
+                                    on_link=refresh_measures).grid(
+            row=row + 8, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="ew")
@@ -0,0 +1,62 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+from tkinter import messagebox
+
+import customtkinter as ctk
+
+from gui.virtual_list import VirtualList
+
+
+class IOCPanel(ctk.CTkFrame):
+    """Индикаторы компрометации инцидента в окне паспорта"""
+
+    def __init__(self, master, db, incident_id, user: dict, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.store = db.iocs
+        self.incident_id = incident_id
+        self.user = user
+
+        self.grid_columnconfigure(0, weight=1)
+        ctk.CTkLabel(self, text="Индикаторы (IP, CIDR, домены, хэши):", anchor="w").grid(
+            row=0, column=0, columnspan=3, sticky="w")
+
+        self.entry = ctk.CTkEntry(self, placeholder_text="Через пробел или запятую")
+        self.entry.grid(row=1, column=0, sticky="ew", pady=5)
+        self.entry.bind("<Return>", lambda e: self._add())
+        self.add_button = ctk.CTkButton(self, text="Добавить", width=90, command=self._add)
+        self.add_button.grid(row=1, column=1, padx=5)
+        self.delete_button = ctk.CTkButton(self, text="Удалить", width=80, fg_color="red", command=self._delete)
+        self.delete_button.grid(row=1, column=2)
+        if user['role'] != 'admin':
+            self.delete_button.configure(state="disabled")
+
+        self.listbox = VirtualList(self, height=90, empty_text="Нет индикаторов")
+        self.listbox.grid(row=2, column=0, columnspan=3, sticky="ew")
+
+        self._reload()
+
+    def _reload(self):
+        self.listbox.set_items([
+            (indicator_id, f"{kind}: {value}" + (f" — {comment}" if comment else ""))
+            for indicator_id, kind, value, comment, _ in self.store.list(self.incident_id)
+        ])
+
+    def _add(self):
+        values = [v for v in self.entry.get().replace(",", " ").split() if v]
+        if not values:
+            return
+        try:
+            self.store.add_many(self.incident_id, values, self.user['username'])
+        except ValueError as e:
+            messagebox.showerror("Индикаторы", str(e), parent=self)
+            return
+        self.entry.delete(0, "end")
+        self._reload()
+
+    def _delete(self):
+        if self.listbox.selected_id is None:
+            messagebox.showwarning("Индикаторы", "Выберите индикатор", parent=self)
+            return
+        self.store.delete(self.listbox.selected_id, self.user['username'])
+        self._reload()
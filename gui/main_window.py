@@ -5,17 +5,17 @@ import logging
 
 import customtkinter as ctk
 
-from gui.history_window import HistoryViewer
-from gui.incident_tracker import IncidentTracker
-from gui.organization_manager import OrganizationManager
-from gui.profile import ProfileWindow
-from gui.responsible_manager import ResponsibleManager
-from gui.user_manager_window import UserManagerDialogEmbed
-from gui.status_manager import StatusManager
-from gui.measure_manager import MeasureManager
+from gui.refresh import RefreshScheduler
+from src.alerts import AlertEngine
+from src.ingest import IngestService, IngestWriteError
+from src.ingest import load_config as load_ingest_config
+from src.notifications import NotificationCenter
+from src.sla import SLAEngine
 
 
 class MainWindow(ctk.CTkFrame):
+    INGEST_POLL_MS = 500
+
     def __init__(self, master, db, user_info, on_logout):
         super().__init__(master)
         self.db = db
@@ -56,13 +56,55 @@ class MainWindow(ctk.CTkFrame):
         )
         self.title_label.pack(pady=(15, 5))
 
+        # Уведомления: оповещения правил и эскалации SLA
+        self.notifications = NotificationCenter()
+        self.notifications.subscribe(self._on_notification)
+        self.bell_button = ctk.CTkButton(
+            self.inner_frame, text="🔔 0", width=80, fg_color="transparent",
+            command=self._show_notifications
+        )
+        self.bell_button.pack(pady=(0, 5))
+
+        # Общий планировщик обновления вкладок: каждый запрос выполняется
+        # один раз за тик, результат раздаётся всем подписанным вкладкам
+        self.scheduler = RefreshScheduler(self, {
+            "statuses": db.get_statuses,
+            "organizations": db.get_organizations,
+            "responsibles": db.get_responsibles,
+            "incidents": db.get_incidents,
+            "users": db.get_all_users,
+            "statistics": db.get_statistics,
+            "response_metrics": lambda: db.get_response_metrics("критичность"),
+            "incident_series": db.get_incident_series,
+        })
+
+        # Эскалации по SLA: один таймер на ближайший срок
+        self.sla = SLAEngine(db, self, on_escalation=self._on_escalation)
+        self.sla.start()
+
+        self.alerts = AlertEngine(db, self, self.notifications)
+        self.alerts.start()
+
+        # Импорт событий из журналов, если настроен (data/ingest.json)
+        self.ingest = None
+        self._ingest_job = None
+        ingest_config = load_ingest_config()
+        if ingest_config:
+            self.ingest = IngestService(db, ingest_config.get("sources", []),
+                                        batch_size=ingest_config.get("batch_size", 500),
+                                        max_delay=ingest_config.get("max_delay", 1.0))
+            self.ingest.start()
+            self._ingest_job = self.after(self.INGEST_POLL_MS, self._drain_ingest)
+
         # Вкладки
-        self.tabview = ctk.CTkTabview(self.inner_frame, width=720, height=460)
+        self.tabview = ctk.CTkTabview(self.inner_frame, width=720, height=460, command=self._on_tab_changed)
         self.tabview.pack(pady=(5, 5))
 
         self.tabs_config = [
             {"text": "👤 Профиль", "admin_only": False, "creator": self.create_profile_tab},
             {"text": "🛠 Управление инцидентами", "admin_only": False, "creator": self.create_incident_tab},
+            {"text": "📊 Статистика", "admin_only": False, "creator": self.create_dashboard_tab},
+            {"text": "📄 Отчёты", "admin_only": True, "creator": self.create_reports_tab},
             {"text": "🏷 Статусы инцидентов", "admin_only": True, "creator": self.create_statuses_tab},
             {"text": "🏢 Организации", "admin_only": False, "creator": self.create_organizations_tab},
             {"text": "👔 Ответственные", "admin_only": False, "creator": self.create_responsibles_tab},
@@ -72,6 +114,8 @@ class MainWindow(ctk.CTkFrame):
         ]
 
         self.tabs = {}
+        self.tab_creators = {}  # вкладки, которые ещё не построены
+        self.tab_views = {}     # построенные вкладки: имя -> фрейм
 
         for tab_conf in self.tabs_config:
             tab_name = tab_conf["text"]
@@ -83,7 +127,8 @@ class MainWindow(ctk.CTkFrame):
                                      font=ctk.CTkFont(size=16), text_color="#888888")
                 label.pack(expand=True, fill="both", pady=100)
             else:
-                tab_conf["creator"](tab)
+                # Содержимое вкладки строится при первом выборе
+                self.tab_creators[tab_name] = tab_conf["creator"]
 
         self.logout_btn = ctk.CTkButton(
             self.inner_frame,
@@ -100,40 +145,148 @@ class MainWindow(ctk.CTkFrame):
         self.logout_btn.pack(pady=(10, 10), side="bottom")
 
         self.last_selected_tab = self.tabview.get()
+        self._show_tab(self.last_selected_tab)
+
+    def _show_tab(self, tab_name):
+        """Строит вкладку при первом показе либо возобновляет её обновление"""
+        creator = self.tab_creators.pop(tab_name, None)
+        if creator:
+            view = creator(self.tabs[tab_name])
+            self.tab_views[tab_name] = view
+            if hasattr(view, "attach_scheduler"):
+                view.attach_scheduler(self.scheduler)
+        elif tab_name in self.tab_views:
+            view = self.tab_views[tab_name]
+            if hasattr(view, "resume_refresh"):
+                view.resume_refresh()
+
+    def _on_tab_changed(self):
+        """Приостанавливает скрытую вкладку и показывает выбранную"""
+        tab_name = self.tabview.get()
+        previous = self.tab_views.get(self.last_selected_tab)
+        if previous is not None and hasattr(previous, "pause_refresh"):
+            previous.pause_refresh()
+        self.last_selected_tab = tab_name
+        self._show_tab(tab_name)
 
-    # Методы создания вкладок
+    def _drain_ingest(self):
+        """Создаёт инциденты по обнаружениям импорта (запись в БД — в UI-потоке)"""
+        self._ingest_job = None
+        try:
+            created = self.ingest.drain()
+        except IngestWriteError as e:
+            created = e.created
+            if not e.retrying:
+                where = f"сохранены в {e.saved_to}" if e.saved_to else "не сохранены, см. журнал приложения"
+                self.notifications.push("Импорт событий",
+                                        f"Не удалось создать инциденты после {e.attempts} попыток: {e}. "
+                                        f"Обнаружения {where}")
+            elif e.attempts == 1:
+                self.notifications.push("Импорт событий",
+                                        f"Ошибка создания инцидентов: {e}. Пачка будет записана повторно")
+        if created:
+            self.notifications.push("Импорт событий", f"Создано инцидентов по событиям журналов: {created}")
+        self._ingest_job = self.after(self.INGEST_POLL_MS, self._drain_ingest)
+
+    # --- Уведомления ---
+    def _on_escalation(self, incident_id, deadline, status, level):
+        self.notifications.push("Эскалация SLA",
+                                f"Инцидент ID {incident_id}: превышен срок в статусе «{status}»",
+                                incident_id)
+
+    def _on_notification(self, item):
+        self.bell_button.configure(text=f"🔔 {self.notifications.unread}",
+                                   fg_color="#a20505" if self.notifications.unread else "transparent")
+
+    def _show_notifications(self):
+        window = ctk.CTkToplevel(self)
+        window.title("Уведомления")
+        window.geometry("600x400")
+        box = ctk.CTkTextbox(window)
+        box.pack(fill="both", expand=True, padx=10, pady=10)
+        lines = [f"{item['время']} | {item['тип']} | {item['текст']}" for item in self.notifications.items()]
+        box.insert("1.0", "\n".join(lines) or "Нет уведомлений")
+        box.configure(state="disabled")
+        self.notifications.mark_read()
+        self._on_notification(None)
+
+    # Методы создания вкладок (модули вкладок импортируются лениво)
     def create_profile_tab(self, tab):
+        from gui.profile import ProfileWindow
         self.profile = ProfileWindow(tab, self.db, self.user_info)
         self.profile.pack(fill="both", expand=True)
+        return self.profile
 
     def create_incident_tab(self, tab):
+        from gui.incident_tracker import IncidentTracker
         self.incident_tracker = IncidentTracker(tab, self.db, self.user_info)
         self.incident_tracker.pack(fill="both", expand=True)
+        return self.incident_tracker
+
+    def create_dashboard_tab(self, tab):
+        from gui.dashboard import DashboardView
+        self.dashboard = DashboardView(tab, self.db, self.user_info)
+        self.dashboard.pack(fill="both", expand=True)
+        return self.dashboard
+
+    def create_reports_tab(self, tab):
+        from gui.reports_view import ReportsView
+        self.reports_view = ReportsView(tab, self.db, self.user_info)
+        self.reports_view.pack(fill="both", expand=True)
+        return self.reports_view
 
     def create_statuses_tab(self, tab):
+        from gui.status_manager import StatusManager
         self.status_manager = StatusManager(tab, self.db, self.user_info)
         self.status_manager.pack(fill="both", expand=True)
+        return self.status_manager
 
     def create_organizations_tab(self, tab):
+        from gui.organization_manager import OrganizationManager
         org_manager = OrganizationManager(tab, self.db, self.user_info)
         org_manager.pack(fill="both", expand=True)
+        return org_manager
 
     def create_responsibles_tab(self, tab):
+        from gui.responsible_manager import ResponsibleManager
         organizations = self.db.get_organizations()
-        self.user_manager = ResponsibleManager(tab, self.db, self.user_info, organizations)
-        self.user_manager.pack(fill="both", expand=True)
+        self.responsible_manager = ResponsibleManager(tab, self.db, self.user_info, organizations)
+        self.responsible_manager.pack(fill="both", expand=True)
+        return self.responsible_manager
 
     def create_users_tab(self, tab):
+        from gui.user_manager_window import UserManagerDialogEmbed
         self.user_manager = UserManagerDialogEmbed(tab, self.db, self.user_info)
         self.user_manager.pack(fill="both", expand=True)
+        return self.user_manager
 
     def create_measures_tab(self, tab):
+        from gui.measure_manager import MeasureManager
         self.measure_manager = MeasureManager(tab, self.db, self.user_info)
         self.measure_manager.pack(fill="both", expand=True)
+        return self.measure_manager
 
     def create_history_tab(self, tab):
+        from gui.history_window import HistoryViewer
         self.history_viewer = HistoryViewer(tab, self.db, self.user_info)
         self.history_viewer.pack(fill="both", expand=True)
+        return self.history_viewer
+
+    def destroy(self):
+        """Останавливает планировщик и разрушает построенные вкладки"""
+        self.scheduler.stop()
+        self.sla.stop()
+        self.alerts.stop()
+        if self.ingest is not None:
+            if self._ingest_job is not None:
+                self.after_cancel(self._ingest_job)
+            self.ingest.stop()
+        self.notifications.unsubscribe(self._on_notification)
+        for view in self.tab_views.values():
+            view.destroy()
+        self.tab_views.clear()
+        self.tab_creators.clear()
+        super().destroy()
 
     def logout(self):
         logging.info(f"Пользователь {self.user_info['username']} вышел из системы.")
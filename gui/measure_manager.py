@@ -1,4 +1,9 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import filedialog, messagebox
+
 import customtkinter as ctk
+from src.attack import read_bundle
 from src.database import SecureDB
 
 class MeasureManager(ctk.CTkFrame):
@@ -6,6 +11,8 @@ class MeasureManager(ctk.CTkFrame):
         super().__init__(master)
         self.db = db
         self.user_info = user_info
+        self._import_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="attack-import")
+        self._import_future = None
         self._setup_ui()
         self._load_measures()
 
@@ -16,6 +23,10 @@ class MeasureManager(ctk.CTkFrame):
         self.add_button = ctk.CTkButton(self, text="Добавить", command=self._add_measure)
         self.add_button.pack(pady=5, padx=10)
 
+        # Пакет STIX разбирается в фоне, запись в БД — в UI-потоке
+        self.import_button = ctk.CTkButton(self, text="Импорт MITRE ATT&CK (STIX)...", command=self._import_attack)
+        self.import_button.pack(pady=5, padx=10)
+
         self.measure_list = ctk.CTkScrollableFrame(self)
         self.measure_list.pack(fill="both", expand=True, padx=10, pady=10)
 
@@ -61,3 +72,31 @@ class MeasureManager(ctk.CTkFrame):
             новое_значение="None"
         )
         self._load_measures()
+
+    def _import_attack(self):
+        path = filedialog.askopenfilename(parent=self, title="Пакет STIX (enterprise-attack.json)",
+                                          filetypes=[("JSON", "*.json"), ("Все файлы", "*.*")])
+        if not path:
+            return
+        self.import_button.configure(state="disabled", text="Разбор пакета...")
+        self._import_future = self._import_executor.submit(read_bundle, path)
+        self.after(200, self._poll_import)
+
+    def _poll_import(self):
+        if not self._import_future.done():
+            self.after(200, self._poll_import)
+            return
+        self.import_button.configure(state="normal", text="Импорт MITRE ATT&CK (STIX)...")
+        try:
+            bundle = self._import_future.result()
+            self.db.attack.store(bundle, self.user_info["username"])
+        except Exception as e:
+            logging.error(f"Ошибка импорта ATT&CK: {e}")
+            messagebox.showerror("ATT&CK", f"Не удалось импортировать пакет: {e}", parent=self)
+            return
+        messagebox.showinfo("ATT&CK", f"Импортировано техник: {len(bundle['техники'])}, "
+                                      f"мер: {len(bundle['меры'])}", parent=self)
+
+    def destroy(self):
+        self._import_executor.shutdown(wait=False)
+        super().destroy()
@@ -0,0 +1,55 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+from tkinter import messagebox
+
+import customtkinter as ctk
+
+from gui.virtual_list import VirtualList
+
+
+class MeasureRecommendationsPanel(ctk.CTkFrame):
+    """Рекомендуемые меры реагирования в окне паспорта (src.recommender)"""
+
+    def __init__(self, master, db, incident_id, user: dict, on_link=None, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.db = db
+        self.incident_id = incident_id
+        self.user = user
+        self.on_link = on_link
+
+        self.grid_columnconfigure(0, weight=1)
+        ctk.CTkLabel(self, text="Рекомендуемые меры:", anchor="w").grid(row=0, column=0, sticky="w")
+        ctk.CTkButton(self, text="Привязать", width=100, command=self._link).grid(row=0, column=1, pady=(0, 5))
+
+        self.listbox = VirtualList(self, height=90, empty_text="Недостаточно истории для рекомендаций",
+                                   on_double_click=lambda key: self._link())
+        self.listbox.grid(row=1, column=0, columnspan=2, sticky="ew")
+
+        self._reload()
+
+    def _reload(self):
+        names = dict(self.db.get_response_measures())
+        self.listbox.set_items([
+            (measure_id, f"{names[measure_id]} ({score:.0%})")
+            for measure_id, score in self.db.recommender.recommend(self.incident_id)
+            if measure_id in names
+        ])
+
+    def _link(self):
+        measure_id = self.listbox.selected_id
+        if measure_id is None:
+            messagebox.showwarning("Меры реагирования", "Выберите меру", parent=self)
+            return
+        self.db.link_incident_measure(self.incident_id, measure_id)
+        self.db.log_change(
+            username=self.user['username'],
+            таблица="Инцидент_Меры",
+            действие="Привязка рекомендованной меры",
+            поле="мера_реагирования_id",
+            новое_значение=str(measure_id),
+            объект_id=self.incident_id
+        )
+        self._reload()
+        if self.on_link:
+            self.on_link()
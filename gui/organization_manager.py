@@ -2,10 +2,14 @@ from tkinter import ttk
 
 import customtkinter as ctk
 
+from gui.refresh import AutoRefreshMixin
+from gui.tree_binding import TreeBinding
 from src.database import SecureDB
 
 
-class OrganizationManager(ctk.CTkFrame):
+class OrganizationManager(AutoRefreshMixin, ctk.CTkFrame):
+    refresh_sources = ("organizations",)
+
     def __init__(self, master, db: SecureDB, user_info: dict):
         super().__init__(master)
         self.db = db
@@ -14,7 +18,6 @@ class OrganizationManager(ctk.CTkFrame):
         self._setup_ui()
         self._load_organizations()
         self._update_ui_permissions()
-        self._start_auto_refresh()
 
     def _setup_ui(self):
         self.grid_columnconfigure((0, 1, 2, 3), weight=1)
@@ -43,6 +46,7 @@ class OrganizationManager(ctk.CTkFrame):
         self.tree.heading("Телефон", text="Телефон")
         self.tree.bind("<<TreeviewSelect>>", self._on_select)
         self.tree.grid(row=2, column=0, columnspan=4, padx=5, pady=5, sticky="nsew")
+        self.tree_rows = TreeBinding(self.tree, key=lambda org: org[0], values=lambda org: org[1:])
 
         # Стиль таблицы
         style = ttk.Style()
@@ -65,15 +69,13 @@ class OrganizationManager(ctk.CTkFrame):
         self.address_entry.configure(state="normal")
         self.phone_entry.configure(state="normal")
 
-    def _start_auto_refresh(self):
-        self._load_organizations()
-        self.after(10000, self._start_auto_refresh)
+    def _refresh(self, data):
+        self._load_organizations(data["organizations"])
 
-    def _load_organizations(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        for org in self.db.get_organizations():
-            self.tree.insert("", "end", iid=org[0], values=org[1:])
+    def _load_organizations(self, organizations=None):
+        if organizations is None:
+            organizations = self.db.get_organizations()
+        self.tree_rows.apply(organizations)
 
     def _on_select(self, event):
         selected = self.tree.selection()
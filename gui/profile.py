@@ -2,9 +2,13 @@ import datetime
 
 import customtkinter as ctk
 
+from gui.refresh import AutoRefreshMixin
 
-class ProfileWindow(ctk.CTkFrame):
+
+class ProfileWindow(AutoRefreshMixin, ctk.CTkFrame):
     """Окно профиля пользователя с отображением имени, роли и времени сессии."""
+    refresh_interval = 1000
+
     def __init__(self, master, db, user_info):
         super().__init__(master)
         self.db = db
@@ -92,6 +96,9 @@ class ProfileWindow(ctk.CTkFrame):
         self.tooltip = None
         self.update_timer()
 
+    def _refresh(self, data):
+        self.update_timer()
+
     def update_timer(self):
         elapsed = datetime.datetime.now() - self.start_time
         minutes, seconds = divmod(elapsed.seconds, 60)
@@ -99,4 +106,3 @@ class ProfileWindow(ctk.CTkFrame):
         # Обновляем дату каждые 10 минут
         if datetime.datetime.now().minute % 10 == 0:
             self.date_var.set(f"Сегодня: {datetime.datetime.now().strftime('%d.%m.%Y')}")
-        self.after(1000, self.update_timer)
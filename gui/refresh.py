@@ -0,0 +1,165 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+
+
+class _Registration:
+    """Подписка вкладки на планировщик"""
+    def __init__(self, view, sources, interval_ms):
+        self.view = view
+        self.sources = tuple(sources)
+        self.interval_ms = interval_ms
+        self.active = True
+        self.next_due = time.monotonic() + interval_ms / 1000
+
+
+class RefreshScheduler:
+    """
+    Единый планировщик обновления вкладок MainWindow.
+
+    Вкладки регистрируются со списком источников данных (имена запросов к БД)
+    и желаемым интервалом. На каждом тике выбираются вкладки, у которых подошёл
+    срок; каждый нужный им запрос выполняется один раз, результат раздаётся всем.
+    Сроки сдвигаются на случайный джиттер, а при занятом UI интервалы растут.
+    """
+    TICK_MS = 500
+    JITTER = 0.1              # ±10% интервала
+    BUSY_LAG_MS = 250         # тик опоздал — цикл событий был занят
+    BUSY_WORK_MS = 100        # тик работал слишком долго
+    MAX_BACKOFF = 4.0
+
+    def __init__(self, root, sources: dict):
+        """
+        Args:
+            root: Виджет, через after() которого идут тики
+            sources: Имя источника -> функция без аргументов, возвращающая данные
+        """
+        self.root = root
+        self.sources = sources
+        self._registrations = {}
+        self._job = None
+        self._expected = None
+        self.backoff = 1.0
+
+    def register(self, view, sources=(), interval_ms: int = 10000):
+        unknown = set(sources) - set(self.sources)
+        if unknown:
+            raise ValueError(f"Неизвестные источники данных: {', '.join(sorted(unknown))}")
+        self._registrations[view] = _Registration(view, sources, interval_ms)
+        if self._job is None:
+            self._schedule(self.TICK_MS)
+
+    def unregister(self, view):
+        self._registrations.pop(view, None)
+
+    def pause(self, view):
+        reg = self._registrations.get(view)
+        if reg:
+            reg.active = False
+
+    def resume(self, view):
+        """Возобновляет вкладку; просроченная обновляется без ожидания тика"""
+        reg = self._registrations.get(view)
+        if not reg or reg.active:
+            return
+        reg.active = True
+        if time.monotonic() >= reg.next_due:
+            self._cancel()
+            self._tick()
+
+    def stop(self):
+        self._cancel()
+        self._registrations.clear()
+
+    def _schedule(self, delay_ms):
+        self._expected = time.monotonic() + delay_ms / 1000
+        self._job = self.root.after(delay_ms, self._tick)
+
+    def _cancel(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        self._job = None
+        started = time.monotonic()
+        lag_ms = (started - self._expected) * 1000 if self._expected else 0
+
+        due = [reg for reg in list(self._registrations.values())
+               if reg.active and started >= reg.next_due]
+
+        # Каждый источник запрашивается один раз за тик
+        data = {}
+        failed = set()
+        for name in {source for reg in due for source in reg.sources}:
+            try:
+                data[name] = self.sources[name]()
+            except Exception as e:
+                logging.error(f"Ошибка запроса источника '{name}': {e}")
+                failed.add(name)
+
+        for reg in due:
+            reg.next_due = started + self._next_interval(reg)
+            if failed.intersection(reg.sources):
+                continue
+            try:
+                reg.view._refresh({name: data[name] for name in reg.sources})
+            except Exception as e:
+                logging.error(f"Ошибка обновления вкладки {type(reg.view).__name__}: {e}")
+
+        work_ms = (time.monotonic() - started) * 1000
+        self._adjust_backoff(lag_ms, work_ms)
+
+        if self._registrations:
+            self._schedule(self.TICK_MS)
+
+    def _next_interval(self, reg):
+        jitter = random.uniform(-self.JITTER, self.JITTER)
+        return reg.interval_ms * self.backoff * (1 + jitter) / 1000
+
+    def _adjust_backoff(self, lag_ms, work_ms):
+        """Увеличивает интервалы, пока UI занят, и плавно возвращает их обратно"""
+        if lag_ms > self.BUSY_LAG_MS or work_ms > self.BUSY_WORK_MS:
+            self.backoff = min(self.backoff * 1.5, self.MAX_BACKOFF)
+        else:
+            self.backoff = max(1.0, self.backoff * 0.9)
+
+
+class AutoRefreshMixin(ABC):
+    """
+    Вкладка, обновляемая планировщиком RefreshScheduler.
+    Вкладка объявляет источники и интервал и реализует _refresh(data),
+    где data — словарь с результатами запросов по именам источников.
+    """
+    refresh_interval = 10000  # мс
+    refresh_sources = ()
+    _scheduler = None
+
+    def attach_scheduler(self, scheduler: RefreshScheduler):
+        self._scheduler = scheduler
+        scheduler.register(self, self.refresh_sources, self.refresh_interval)
+
+    @abstractmethod
+    def _refresh(self, data: dict):
+        """Обновляет вкладку по результатам запросов источников"""
+
+    def pause_refresh(self):
+        """Останавливает обновление, пока вкладка не видна"""
+        if self._scheduler:
+            self._scheduler.pause(self)
+
+    def resume_refresh(self):
+        """Возобновляет обновление; если тик был пропущен — обновляет сразу"""
+        if self._scheduler:
+            self._scheduler.resume(self)
+
+    def destroy(self):
+        # Снимаем вкладку с планировщика, иначе она переживёт сессию пользователя
+        if self._scheduler:
+            self._scheduler.unregister(self)
+            self._scheduler = None
+        super().destroy()
@@ -0,0 +1,136 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import datetime
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import filedialog, messagebox
+
+import customtkinter as ctk
+
+from src.reports import FORMATS, PERIOD_MONTH, PERIOD_QUARTER, TEMPLATES, ReportCancelled
+
+
+class ReportsView(ctk.CTkFrame):
+    """
+    Отчёты для регулятора. Копия БД снимается в UI-потоке, отчёт считается
+    и пишется в файл в фоне; прогресс опрашивается через after().
+    """
+    POLL_MS = 200
+
+    def __init__(self, master, db, user_info):
+        super().__init__(master)
+        self.db = db
+        self.user = user_info
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reports")
+        self._job = None
+        self._future = None
+        self._poll_job = None
+
+        today = datetime.date.today()
+        form = ctk.CTkFrame(self, fg_color="transparent")
+        form.pack(fill="x", padx=10, pady=10)
+
+        self._titles = {template.title: key for key, template in TEMPLATES.items()}
+        self.template_var = ctk.StringVar(value=next(iter(self._titles)))
+        ctk.CTkLabel(form, text="Форма:").grid(row=0, column=0, sticky="w", pady=5)
+        ctk.CTkComboBox(form, variable=self.template_var, values=list(self._titles), width=420,
+                        state="readonly").grid(row=0, column=1, columnspan=3, sticky="w", padx=5)
+
+        self.kind_var = ctk.StringVar(value=PERIOD_MONTH)
+        ctk.CTkLabel(form, text="Период:").grid(row=1, column=0, sticky="w", pady=5)
+        ctk.CTkSegmentedButton(form, values=[PERIOD_MONTH, PERIOD_QUARTER], variable=self.kind_var,
+                               command=self._on_kind).grid(row=1, column=1, sticky="w", padx=5)
+        self.year_var = ctk.StringVar(value=str(today.year))
+        ctk.CTkEntry(form, textvariable=self.year_var, width=70).grid(row=1, column=2, padx=5)
+        self.number_var = ctk.StringVar(value=str(today.month))
+        self.number_combo = ctk.CTkComboBox(form, variable=self.number_var, width=70, state="readonly",
+                                            values=[str(n) for n in range(1, 13)])
+        self.number_combo.grid(row=1, column=3, sticky="w", padx=5)
+
+        self.format_var = ctk.StringVar(value=FORMATS[0])
+        ctk.CTkLabel(form, text="Формат:").grid(row=2, column=0, sticky="w", pady=5)
+        ctk.CTkSegmentedButton(form, values=list(FORMATS), variable=self.format_var).grid(
+            row=2, column=1, sticky="w", padx=5)
+
+        buttons = ctk.CTkFrame(self, fg_color="transparent")
+        buttons.pack(fill="x", padx=10)
+        self.run_button = ctk.CTkButton(buttons, text="Сформировать...", command=self._start)
+        self.run_button.pack(side="left")
+        self.cancel_button = ctk.CTkButton(buttons, text="Отмена", fg_color="gray", state="disabled",
+                                           command=self._cancel)
+        self.cancel_button.pack(side="left", padx=5)
+
+        self.progress = ctk.CTkProgressBar(self)
+        self.progress.set(0)
+        self.progress.pack(fill="x", padx=10, pady=(15, 5))
+        self.status_label = ctk.CTkLabel(self, text="", anchor="w")
+        self.status_label.pack(fill="x", padx=10)
+
+    def _on_kind(self, kind):
+        count = 12 if kind == PERIOD_MONTH else 4
+        self.number_combo.configure(values=[str(n) for n in range(1, count + 1)])
+        if int(self.number_var.get()) > count:
+            self.number_var.set("1")
+
+    def _start(self):
+        try:
+            year, number = int(self.year_var.get()), int(self.number_var.get())
+        except ValueError:
+            messagebox.showerror("Отчёты", "Укажите год числом", parent=self)
+            return
+        fmt = self.format_var.get()
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=f".{fmt}",
+                                            filetypes=[(fmt.upper(), f"*.{fmt}")])
+        if not path:
+            return
+        try:
+            self._job = self.db.reports.create_job(self._titles[self.template_var.get()], self.kind_var.get(),
+                                                   year, number, fmt, path)
+        except ValueError as e:
+            messagebox.showerror("Отчёты", str(e), parent=self)
+            return
+        self.run_button.configure(state="disabled")
+        self.cancel_button.configure(state="normal")
+        self.progress.set(0)
+        self._future = self._executor.submit(self._job.run)
+        self._poll_job = self.after(self.POLL_MS, self._poll)
+
+    def _cancel(self):
+        if self._job is not None:
+            self._job.cancel()
+
+    def _poll(self):
+        self._poll_job = None
+        job = self._job
+        self.progress.set(job.progress)
+        self.status_label.configure(text=job.stage)
+        if not self._future.done():
+            self._poll_job = self.after(self.POLL_MS, self._poll)
+            return
+
+        self.run_button.configure(state="normal")
+        self.cancel_button.configure(state="disabled")
+        self._job = None
+        try:
+            path = self._future.result()
+        except ReportCancelled:
+            self.progress.set(0)
+            self.status_label.configure(text="Отменено")
+            return
+        except Exception as e:
+            logging.error(f"Ошибка формирования отчёта: {e}")
+            self.status_label.configure(text="Ошибка")
+            messagebox.showerror("Отчёты", f"Не удалось сформировать отчёт: {e}", parent=self)
+            return
+        self.db.reports.store_cache(job, self.user['username'])
+        self.status_label.configure(text=f"Готово: {path} (месяцев из кэша: {job.cached_months})")
+
+    def destroy(self):
+        if self._job is not None:
+            self._job.cancel()
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        self._executor.shutdown(wait=False)
+        super().destroy()
@@ -2,8 +2,14 @@ from tkinter import ttk
 
 import customtkinter as ctk
 
+from gui.autocomplete import AutocompleteEntry
+from gui.refresh import AutoRefreshMixin
+from gui.tree_binding import TreeBinding
+
+
+class ResponsibleManager(AutoRefreshMixin, ctk.CTkFrame):
+    refresh_sources = ("organizations", "responsibles")
 
-class ResponsibleManager(ctk.CTkFrame):
     def __init__(self, master, db, user_info, organizations):
         super().__init__(master)
         self.db = db
@@ -13,7 +19,6 @@ class ResponsibleManager(ctk.CTkFrame):
         self._setup_ui()
         self._load_responsibles()
         self._update_ui_permissions()
-        self._start_auto_refresh()
 
     def _setup_ui(self):
         self.grid_columnconfigure((0, 1, 2, 3), weight=1)
@@ -27,13 +32,14 @@ class ResponsibleManager(ctk.CTkFrame):
         self.email_entry = ctk.CTkEntry(self, placeholder_text="Email")
         self.email_entry.grid(row=0, column=2, padx=5, pady=5, sticky="ew")
 
-        # CTkComboBox для выбора организации
+        # Организация выбирается автодополнением по индексу справочника
         self.org_var = ctk.StringVar()
-        org_names = [org[1] for org in self.organizations]
-        self.org_combobox = ctk.CTkComboBox(self, variable=self.org_var, values=org_names, state="readonly")
+        self.org_combobox = AutocompleteEntry(
+            self, self.org_var, source=lambda: self.db.refs.organizations, placeholder_text="Организация"
+        )
         self.org_combobox.grid(row=0, column=3, padx=5, pady=5, sticky="ew")
-        if org_names:
-            self.org_combobox.set(org_names[0])
+        if self.organizations:
+            self.org_combobox.set(self.organizations[0][1])
 
         self.add_button = ctk.CTkButton(self, text="Добавить", command=self._add_responsible)
         self.add_button.grid(row=1, column=0, padx=5, pady=5)
@@ -49,6 +55,8 @@ class ResponsibleManager(ctk.CTkFrame):
             self.tree.heading(col, text=col)
         self.tree.bind("<<TreeviewSelect>>", self._on_select)
         self.tree.grid(row=2, column=0, columnspan=4, padx=5, pady=5, sticky="nsew")
+        # resp = (id, имя, должность, email, орг_id)
+        self.tree_rows = TreeBinding(self.tree, key=lambda resp: resp[0], values=self._row_values)
 
         # Стиль таблицы
         style = ttk.Style()
@@ -71,31 +79,29 @@ class ResponsibleManager(ctk.CTkFrame):
         self.name_entry.configure(state="normal")
         self.position_entry.configure(state="normal")
         self.email_entry.configure(state="normal")
-        self.org_combobox.configure(state="readonly")
-        self.organizations = self.db.get_organizations()
-        org_names = [org[1] for org in self.organizations]
-        self.org_combobox.configure(values=org_names)
-
-        # Если текущий выбранный элемент отсутствует — установить первый
-        if org_names:
-            current_value = self.org_var.get()
-            if current_value not in org_names:
-                self.org_var.set(org_names[0])
-
-    def _start_auto_refresh(self):
-        self._update_ui_permissions()
-        self._load_responsibles()
-        self.after(10000, self._start_auto_refresh)
+        self.org_combobox.configure(state="normal")
+        self._apply_organizations(self.db.get_organizations())
+
+    def _apply_organizations(self, organizations):
+        """Сбрасывает организацию в форме, если её удалили из справочника"""
+        if organizations is self.organizations:
+            return
+        self.organizations = organizations
+        if self.org_var.get() and not self.org_combobox.is_valid():
+            self.org_var.set("")
+
+    def _refresh(self, data):
+        self._apply_organizations(data["organizations"])
+        self._load_responsibles(data["responsibles"])
 
-    def _load_responsibles(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+    def _load_responsibles(self, responsibles=None):
+        if responsibles is None:
+            responsibles = self.db.get_responsibles()
+        self.tree_rows.apply(responsibles)
 
-        responsibles = self.db.get_responsibles()
-        for resp in responsibles:
-            # resp = (id, имя, должность, email, орг_id)
-            org_name = next((org[1] for org in self.organizations if org[0] == resp[4]), "Неизвестно")
-            self.tree.insert("", "end", iid=resp[0], values=(resp[1], resp[2] or "-", resp[3] or "-", org_name))
+    def _row_values(self, resp):
+        org_name = self.db.refs.organizations.name(resp[4])
+        return (resp[1], resp[2] or "-", resp[3] or "-", org_name)
 
     def _on_select(self, event):
         selected = self.tree.selection()
@@ -108,8 +114,8 @@ class ResponsibleManager(ctk.CTkFrame):
             self.position_entry.insert(0, values[1] if values[1] != "-" else "")
             self.email_entry.delete(0, "end")
             self.email_entry.insert(0, values[2] if values[2] != "-" else "")
-            # Выбрать организацию в комбобоксе
-            if values[3] in self.org_combobox.cget("values"):
+            # Выбрать организацию в поле автодополнения
+            if self.db.refs.organizations.id(values[3]) is not None:
                 self.org_combobox.set(values[3])
             else:
                 self.org_combobox.set("")
@@ -119,7 +125,7 @@ class ResponsibleManager(ctk.CTkFrame):
         должность = self.position_entry.get().strip() or None
         email = self.email_entry.get().strip() or None
         org_name = self.org_var.get()
-        организация_id = next((org[0] for org in self.organizations if org[1] == org_name), None)
+        организация_id = self.db.refs.organizations.id(org_name)
 
         if имя:
             self.db.add_responsible(имя, должность, email, организация_id)
@@ -146,7 +152,7 @@ class ResponsibleManager(ctk.CTkFrame):
         должность = self.position_entry.get().strip() or None
         email = self.email_entry.get().strip() or None
         org_name = self.org_var.get()
-        организация_id = next((org[0] for org in self.organizations if org[1] == org_name), None)
+        организация_id = self.db.refs.organizations.id(org_name)
 
         old_resp = self.db.get_responsible_by_id(self.selected_resp_id)
         if not old_resp:
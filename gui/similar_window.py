@@ -0,0 +1,94 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+from tkinter import messagebox
+
+import customtkinter as ctk
+
+from gui.virtual_list import VirtualList
+
+
+class SimilarIncidentsWindow(ctk.CTkToplevel):
+    """
+    Похожие (по MinHash) и связанные инциденты: связывание и объединение
+    выбранного дубликата с текущим инцидентом.
+    """
+
+    def __init__(self, master, db, incident_id, user: dict, on_change=None):
+        super().__init__(master)
+        self.db = db
+        self.incident_id = incident_id
+        self.user = user
+        self.on_change = on_change
+
+        self.title(f"Похожие на инцидент ID {incident_id}")
+        self.geometry("620x420")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.listbox = VirtualList(self, empty_text="Похожих инцидентов нет")
+        self.listbox.grid(row=0, column=0, sticky="nsew", padx=10, pady=(10, 5))
+
+        buttons = ctk.CTkFrame(self, fg_color="transparent")
+        buttons.grid(row=1, column=0, sticky="ew", padx=10, pady=(0, 10))
+        ctk.CTkButton(buttons, text="Связать", width=100, command=self._link).pack(side="left")
+        ctk.CTkButton(buttons, text="Убрать связь", width=110, command=self._unlink).pack(side="left", padx=5)
+        self.merge_button = ctk.CTkButton(buttons, text="Объединить с текущим", width=160, fg_color="red",
+                                          command=self._merge)
+        self.merge_button.pack(side="left", padx=5)
+        if user['role'] != 'admin':
+            self.merge_button.configure(state="disabled")
+
+        self._reload()
+
+    def _reload(self):
+        linked = dict(self.db.similar.links(self.incident_id))
+        scores = dict(self.db.similar.similar(self.incident_id))
+        items = []
+        for other_id in sorted(set(linked) | set(scores), key=lambda key: (-scores.get(key, 0), key)):
+            details = self.db.get_incident_details(other_id)
+            if details is None:
+                continue
+            score = scores.get(other_id, linked.get(other_id))
+            mark = "связан" if other_id in linked else "похож"
+            score_text = f"{score:.0%}" if score is not None else "—"
+            items.append((other_id, f"ID {other_id} | {details['название']} | {score_text} | {mark}"))
+        self._scores = scores
+        self.listbox.set_items(items)
+
+    def _selected(self):
+        if self.listbox.selected_id is None:
+            messagebox.showwarning("Похожие инциденты", "Выберите инцидент", parent=self)
+        return self.listbox.selected_id
+
+    def _link(self):
+        other_id = self._selected()
+        if other_id is None:
+            return
+        self.db.similar.link([(self.incident_id, other_id, self._scores.get(other_id))], self.user['username'])
+        self._reload()
+
+    def _unlink(self):
+        other_id = self._selected()
+        if other_id is None:
+            return
+        self.db.similar.unlink(self.incident_id, other_id, self.user['username'])
+        self._reload()
+
+    def _merge(self):
+        other_id = self._selected()
+        if other_id is None:
+            return
+        if not messagebox.askyesno(
+                "Объединение",
+                f"Перенести меры, улики, индикаторы и техники инцидента {other_id} "
+                f"в инцидент {self.incident_id} и удалить {other_id}?", parent=self):
+            return
+        try:
+            self.db.merge_incidents(other_id, self.incident_id, self.user['username'])
+        except ValueError as e:
+            messagebox.showerror("Объединение", str(e), parent=self)
+            return
+        self._reload()
+        if self.on_change:
+            self.on_change()
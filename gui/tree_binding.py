@@ -0,0 +1,150 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import time
+from collections import deque
+
+
+class TreeBinding:
+    """
+    Привязка ttk.Treeview к набору строк с первичным ключом.
+
+    apply() сравнивает новый результат запроса с уже показанными строками и
+    применяет только вставки, изменения и удаления. Строки, которые не менялись,
+    остаются на месте, поэтому выделение и позиция прокрутки сохраняются.
+    Большие диффы применяются пачками через after(), чтобы не блокировать UI.
+    """
+    BATCH_SIZE = 500
+
+    def __init__(self, tree, key, values):
+        """
+        Args:
+            tree: ttk.Treeview
+            key: Функция строка -> первичный ключ (станет iid строки)
+            values: Функция строка -> кортеж значений колонок
+        """
+        self.tree = tree
+        self.key = key
+        self.values = values
+        self._shown = {}     # iid -> значения, фактически показанные в дереве
+        self._order = []     # порядок iid в дереве
+        self._ops = deque()
+        self._job = None
+
+    def apply(self, rows):
+        """Показывает rows, применяя к дереву только разницу"""
+        self._cancel()
+
+        target = {}
+        order = []
+        for row in rows:
+            iid = str(self.key(row))
+            target[iid] = tuple(self.values(row))
+            order.append(iid)
+
+        shown = self._shown
+        ops = [("delete", iid, None, None) for iid in self._order if iid not in target]
+
+        kept_old = [iid for iid in self._order if iid in target]
+        kept_new = [iid for iid in order if iid in shown]
+        if kept_old != kept_new:
+            # Порядок существующих строк поменялся — переставляем их
+            ops.extend(("move", iid, index, None) for index, iid in enumerate(kept_new))
+
+        for index, iid in enumerate(order):
+            if iid not in shown:
+                # Вставки идут по возрастанию индекса: к моменту вставки все
+                # строки выше уже на месте
+                ops.append(("insert", iid, index, target[iid]))
+            elif shown[iid] != target[iid]:
+                ops.append(("update", iid, None, target[iid]))
+
+        self._order = order
+        self._ops = deque(ops)
+        self._run_batch()
+
+    def flush(self):
+        """Синхронно применяет все отложенные изменения"""
+        self._cancel()
+
+    def _run_batch(self):
+        self._job = None
+        self._apply_ops(self.BATCH_SIZE)
+        if self._ops:
+            self._job = self.tree.after(1, self._run_batch)
+
+    def _apply_ops(self, count):
+        for _ in range(min(count, len(self._ops))):
+            op, iid, index, values = self._ops.popleft()
+            if op == "delete":
+                self.tree.delete(iid)
+                del self._shown[iid]
+            elif op == "move":
+                self.tree.move(iid, "", index)
+            elif op == "insert":
+                self.tree.insert("", index, iid=iid, values=values)
+                self._shown[iid] = values
+            else:
+                self.tree.item(iid, values=values)
+                self._shown[iid] = values
+
+    def _cancel(self):
+        if self._job is not None:
+            self.tree.after_cancel(self._job)
+            self._job = None
+        if self._ops:
+            # Недоприменённый дифф: приводим дерево к согласованному состоянию,
+            # следующий дифф считается от фактически показанных строк
+            self._apply_ops(len(self._ops))
+
+
+def benchmark(rows: int = 50000):
+    """
+    Сравнивает полную перестройку Treeview с диффом TreeBinding.
+    Запуск: python -m gui.tree_binding [число_строк]
+    """
+    import tkinter as tk
+    from tkinter import ttk
+
+    root = tk.Tk()
+    root.withdraw()
+    tree = ttk.Treeview(root, columns=("name", "address", "phone"), show="headings")
+
+    data = [(i, f"Организация {i}", f"Адрес {i}", f"+7999{i:07d}") for i in range(rows)]
+    changed = [(i, name + " *", addr, phone) if i % 100 == 0 else (i, name, addr, phone)
+               for i, name, addr, phone in data]
+
+    def measure(label, func):
+        start = time.perf_counter()
+        func()
+        root.update_idletasks()
+        print(f"{label:<45} {(time.perf_counter() - start) * 1000:>10.1f} мс")
+
+    def full_rebuild(result):
+        tree.delete(*tree.get_children())
+        for row in result:
+            tree.insert("", "end", iid=row[0], values=row[1:])
+
+    print(f"Строк: {rows}")
+    measure("Полная перестройка", lambda: full_rebuild(data))
+    measure("Полная перестройка (повтор)", lambda: full_rebuild(data))
+    tree.delete(*tree.get_children())
+
+    binding = TreeBinding(tree, key=lambda r: r[0], values=lambda r: r[1:])
+
+    def diff(result):
+        binding.apply(result)
+        binding.flush()
+
+    measure("TreeBinding: первичная загрузка", lambda: diff(data))
+    measure("TreeBinding: без изменений", lambda: diff(data))
+    measure("TreeBinding: изменён 1% строк", lambda: diff(changed))
+    measure("TreeBinding: удалено 1% строк", lambda: diff(changed[rows // 100:]))
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    import sys
+
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
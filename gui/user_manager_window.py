@@ -4,15 +4,19 @@ from tkinter import messagebox, ttk
 
 import customtkinter as ctk
 
+from gui.refresh import AutoRefreshMixin
+from gui.tree_binding import TreeBinding
+
+
+class UserManagerDialogEmbed(AutoRefreshMixin, ctk.CTkFrame):
+    refresh_sources = ("users",)
 
-class UserManagerDialogEmbed(ctk.CTkFrame):
     def __init__(self, master, db, user_info):
         super().__init__(master)
         self.db = db
         self.user_info = user_info
         self._setup_ui()
         self._load_users()
-        self._start_auto_refresh()
 
     def _setup_ui(self):
         self.grid_columnconfigure((0, 1, 2, 3, 4, 5), weight=1)
@@ -91,14 +95,15 @@ class UserManagerDialogEmbed(ctk.CTkFrame):
         scrollbar.grid(row=0, column=1, sticky="ns")
 
         self.tree.bind("<Double-1>", self._on_edit_user)
+        self.tree_rows = TreeBinding(self.tree, key=lambda user: user["username"],
+                                     values=lambda user: (user["username"], user["role"]))
 
         # ====== Кнопка удаления ======
         self.delete_btn = ctk.CTkButton(self, text="Удалить выбранного", command=self._delete_selected_user)
         self.delete_btn.grid(row=3, column=0, pady=10, padx=20, sticky="ew")
 
-    def _start_auto_refresh(self):
-        self._load_users()
-        self.after(10000, self._start_auto_refresh)
+    def _refresh(self, data):
+        self._load_users(data["users"])
 
     def _create_user(self):
         username = self.username_entry.get()
@@ -127,13 +132,10 @@ class UserManagerDialogEmbed(ctk.CTkFrame):
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось создать пользователя: {str(e)}")
 
-    def _load_users(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-
-        users = self.db.get_all_users()
-        for user in users:
-            self.tree.insert("", "end", values=(user["username"], user["role"]))
+    def _load_users(self, users=None):
+        if users is None:
+            users = self.db.get_all_users()
+        self.tree_rows.apply(users)
 
     def _delete_selected_user(self):
         selected = self.tree.selection()
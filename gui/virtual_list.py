@@ -0,0 +1,253 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import customtkinter as ctk
+
+
+class VirtualList(ctk.CTkFrame):
+    """
+    Виртуализированный список строк.
+
+    Виджеты создаются только для видимого окна плюс небольшой запас и
+    переиспользуются при прокрутке. Строки адресуются по ключу (ID записи):
+    выделение хранится по ключу, а set_items() применяет построчный дифф,
+    перерисовывая только видимые строки, у которых изменился текст.
+
+    При multiselect=True Ctrl+клик добавляет/снимает строку, Shift+клик
+    выделяет диапазон; набор ключей доступен в selected_ids.
+    """
+    CTRL_MASK = 0x0004
+    SHIFT_MASK = 0x0001
+    SELECTED_COLOR = "#333333"
+
+    def __init__(self, master, row_height: int = 32, buffer: int = 4,
+                 on_select=None, on_double_click=None, empty_text: str = "Нет записей",
+                 multiselect: bool = False, on_selection_change=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.row_height = row_height
+        self.buffer = buffer
+        self.on_select = on_select
+        self.on_double_click = on_double_click
+        self.multiselect = multiselect
+        self.on_selection_change = on_selection_change
+
+        self._keys = []         # порядок строк
+        self._texts = {}        # ключ -> текст строки
+        self._first = 0         # индекс первой видимой строки
+        self._visible = 1       # сколько строк помещается по высоте
+        self.selected_id = None     # последняя выбранная строка
+        self.selected_ids = set()   # все выделенные строки
+        self._anchor = None         # начало диапазона для Shift+клик
+
+        self._pool = []         # переиспользуемые виджеты строк
+        self._pool_keys = []    # ключ, который сейчас показывает виджет пула
+        self._pool_state = []   # (текст, выделен) — чтобы не перенастраивать без нужды
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew")
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.empty_label = ctk.CTkLabel(self.body, text=empty_text)
+
+        self.body.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self.body)
+        self._render()
+
+    # --- Данные ---
+    def set_items(self, items):
+        """
+        Заменяет содержимое списка.
+        items — последовательность пар (ключ, текст) в порядке отображения.
+        """
+        keys = []
+        texts = {}
+        for key, text in items:
+            keys.append(key)
+            texts[key] = text
+
+        if keys == self._keys and texts == self._texts:
+            return
+
+        self._keys = keys
+        self._texts = texts
+        if self.selected_id is not None and self.selected_id not in texts:
+            self.selected_id = None
+        if self.selected_ids:
+            kept = {key for key in self.selected_ids if key in texts}
+            if kept != self.selected_ids:
+                self.selected_ids = kept
+                self._notify_selection()
+        self._clamp_first()
+        self._render()
+
+    def append_items(self, items):
+        """Дописывает строки в конец списка (для потоковой выдачи результатов)"""
+        for key, text in items:
+            if key not in self._texts:
+                self._keys.append(key)
+            self._texts[key] = text
+        self._render()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def select(self, key):
+        """Выделяет строку по ключу и прокручивает к ней"""
+        self.selected_id = key if key in self._texts else None
+        self.selected_ids = {key} if self.selected_id is not None else set()
+        self._anchor = self.selected_id
+        if self.selected_id is not None:
+            index = self._keys.index(key)
+            if not self._first <= index < self._first + self._visible:
+                self._first = index
+                self._clamp_first()
+        self._render()
+
+    def select_all(self):
+        self.select_many(self._keys)
+
+    def select_many(self, keys):
+        """Выделяет строки с данными ключами (отсутствующие в списке пропускаются)"""
+        if not self.multiselect:
+            return
+        self.selected_ids = {key for key in keys if key in self._texts}
+        self._render()
+        self._notify_selection()
+
+    def clear_selection(self):
+        self.selected_id = None
+        self.selected_ids = set()
+        self._anchor = None
+        self._render()
+        self._notify_selection()
+
+    # --- Отрисовка ---
+    def _ensure_pool(self):
+        needed = self._visible + self.buffer
+        while len(self._pool) < needed:
+            slot = len(self._pool)
+            # Непустой текст сразу создаёт метку кнопки: привязки ниже
+            # вешаются и на неё, иначе клик по тексту их бы не вызывал
+            widget = ctk.CTkButton(
+                self.body, text=" ", anchor="w", fg_color="transparent",
+                height=self.row_height - 4
+            )
+            widget.bind("<ButtonRelease-1>", lambda e, s=slot: self._on_click(s, e))
+            widget.bind("<Double-Button-1>", lambda e, s=slot: self._on_double(s))
+            self._bind_wheel(widget)
+            self._pool.append(widget)
+            self._pool_keys.append(None)
+            self._pool_state.append(None)
+
+    def _render(self):
+        self._ensure_pool()
+
+        if not self._keys:
+            self.empty_label.place(x=5, y=5)
+        else:
+            self.empty_label.place_forget()
+
+        for slot, widget in enumerate(self._pool):
+            index = self._first + slot
+            if index >= len(self._keys):
+                if self._pool_keys[slot] is not None:
+                    widget.place_forget()
+                    self._pool_keys[slot] = None
+                    self._pool_state[slot] = None
+                continue
+
+            key = self._keys[index]
+            state = (self._texts[key], key in self.selected_ids)
+            if self._pool_keys[slot] is None:
+                widget.place(x=0, y=slot * self.row_height, relwidth=1.0)
+            if self._pool_state[slot] != state:
+                widget.configure(
+                    text=state[0],
+                    fg_color=self.SELECTED_COLOR if state[1] else "transparent"
+                )
+                self._pool_state[slot] = state
+            self._pool_keys[slot] = key
+
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self._keys)
+        if total <= self._visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._first / total, (self._first + self._visible) / total)
+
+    # --- Прокрутка ---
+    def _clamp_first(self):
+        max_first = max(0, len(self._keys) - self._visible)
+        self._first = min(max(0, self._first), max_first)
+
+    def _scroll_to(self, first):
+        previous = self._first
+        self._first = first
+        self._clamp_first()
+        if self._first != previous:
+            self._render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._scroll_to(int(float(value) * len(self._keys)))
+        elif action == "scroll":
+            step = self._visible if unit == "pages" else 1
+            self._scroll_to(self._first + int(value) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            delta = -3
+        elif getattr(event, "num", None) == 5:
+            delta = 3
+        else:
+            delta = -3 if event.delta > 0 else 3
+        self._scroll_to(self._first + delta)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", self._on_wheel)
+        widget.bind("<Button-5>", self._on_wheel)
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // self.row_height)
+        if visible != self._visible:
+            self._visible = visible
+            self._clamp_first()
+            self._render()
+
+    # --- События ---
+    def _on_click(self, slot, event=None):
+        key = self._pool_keys[slot]
+        if key is None:
+            return
+        modifiers = getattr(event, "state", 0) if self.multiselect else 0
+        if modifiers & self.SHIFT_MASK and self._anchor in self._texts:
+            start, end = sorted((self._keys.index(self._anchor), self._keys.index(key)))
+            self.selected_ids = set(self._keys[start:end + 1])
+        elif modifiers & self.CTRL_MASK:
+            self.selected_ids ^= {key}
+            self._anchor = key
+        else:
+            self.selected_ids = {key}
+            self._anchor = key
+        self.selected_id = key if key in self.selected_ids else None
+        self._render()
+        if self.on_select and len(self.selected_ids) == 1:
+            self.on_select(key)
+        self._notify_selection()
+
+    def _notify_selection(self):
+        if self.on_selection_change:
+            self.on_selection_change(self.selected_ids)
+
+    def _on_double(self, slot):
+        key = self._pool_keys[slot]
+        if key is not None and self.on_double_click:
+            self.on_double_click(key)
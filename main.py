@@ -1,22 +1,30 @@
 # Copyright 2025 Schrodinger71
 # Licensed under the Apache License, Version 2.0 (see LICENSE file)
 
+# Профилировщик импортируется первым: его t0 — момент начала импортов
+from src.profiler import profiler  # isort: skip
+
 import logging
 import sys
+import time
 from pathlib import Path
 
 import customtkinter as ctk
 
 from config import env_cfg
 from gui.auth import AuthDialog
-from gui.main_window import MainWindow
 from src.database import SecureDB
 from src.logger import configure_logging
 
+# python main.py --profile-startup — отчёт о времени фаз старта
+profiler.enabled = "--profile-startup" in sys.argv
+profiler.record("Импорт модулей", profiler.t0, time.perf_counter() - profiler.t0)
+
 
 class App(ctk.CTk):
     def __init__(self):
-        super().__init__()
+        with profiler.phase("Создание окна Tk"):
+            super().__init__()
         self._initialize_app()
         self._setup_ui()
         
@@ -27,19 +35,39 @@ class App(ctk.CTk):
         self.protocol("WM_DELETE_WINDOW", self._on_app_close)
         
         # Настройка окружения
-        self._check_environment()
-        self._ensure_data_dir()
-        configure_logging()
+        with profiler.phase("Проверка окружения"):
+            self._check_environment()
+            self._ensure_data_dir()
+        with profiler.phase("Настройка логгирования"):
+            configure_logging()
         
-        # Инициализация БД
-        self.db = SecureDB("data/incidents.db.enc")
+        # Инициализация БД: расшифровка и загрузка идут в фоне,
+        # окно входа показывается сразу
+        self.db = SecureDB("data/incidents.db.enc", load_async=True)
         self.db._start_auto_backup(self) # Запускаем автобэкап БД
 
         self.current_frame = None
         
     def _setup_ui(self):
         """Начальная настройка интерфейса"""
-        self.show_auth()
+        with profiler.phase("Построение окна входа"):
+            self.show_auth()
+        # Окно входа реально отрисовано, когда цикл событий впервые простаивает
+        self.after_idle(self._on_auth_shown)
+
+    def _on_auth_shown(self):
+        profiler.mark("Окно входа отображено")
+        self._report_startup_when_ready()
+
+    def _report_startup_when_ready(self):
+        """Печатает профиль старта после готовности БД (--profile-startup)"""
+        if not profiler.enabled:
+            return
+        if self.db.ready.is_set():
+            profiler.mark("БД готова")
+            profiler.report()
+        else:
+            self.after(50, self._report_startup_when_ready)
 
     def _check_environment(self):
         """Проверка обязательных переменных окружения"""
@@ -78,6 +106,9 @@ class App(ctk.CTk):
 
     def show_main(self, user_info):
         """Показать главное окно"""
+        # Модули вкладок импортируются только после входа
+        from gui.main_window import MainWindow
+
         self._clear_frame()
         self.geometry("1150x620+300+100")
         self.title(f"KiberIncidentHub - {user_info['username']}")
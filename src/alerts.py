@@ -0,0 +1,328 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import datetime
+import json
+import logging
+import os
+import re
+from pathlib import Path
+
+from cryptography.hazmat.primitives import hashes, hmac
+
+from config import env_cfg
+from src.change_batch import ChangeBatcher
+
+ALERT_LOG = Path("data/alerts.log")
+RULES_FILE = Path("data/alert_rules.json")
+
+# Поля, доступные в условиях правил, в порядке столбцов _RECORD_QUERY
+FIELDS = (
+    "инцидент.название",
+    "инцидент.дата_обнаружения",
+    "инцидент.статус",
+    "инцидент.ответственный",
+    "паспорт.уровень_критичности",
+    "паспорт.источник_угрозы",
+    "паспорт.последствия",
+    "паспорт.тип_инцидента",
+    "паспорт.категория_инцидента",
+    "организация.название",
+    "организация.адрес",
+)
+
+_RECORD_QUERY = """
+    SELECT и.инцидент_id, и.название, и.дата_обнаружения, с.статус, о.имя,
+           п.уровень_критичности, п.источник_угрозы, п.последствия,
+           п.тип_инцидента, п.категория_инцидента,
+           орг.название, орг.адрес
+    FROM Инциденты и
+    LEFT JOIN СтатусыИнцидентов с ON с.статус_инцидента_id = и.статус_инцидента_id
+    LEFT JOIN Ответственные о ON о.ответственный_id = и.ответственный_id
+    LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+    LEFT JOIN Организации орг ON орг.организация_id = и.организация_id
+"""
+
+# Правила по умолчанию (если нет data/alert_rules.json). Условия правила
+# объединяются через И: [поле, оператор, значение]
+DEFAULT_RULES = [
+    {
+        "name": "Критический инцидент",
+        "when": [["паспорт.уровень_критичности", "in", ["Критический", "Высокий"]]],
+        "message": "Инцидент «{инцидент_название}» с уровнем «{паспорт_уровень_критичности}»",
+    },
+    {
+        "name": "Утечка данных",
+        "when": [["паспорт.последствия", "contains", "утечк"]],
+        "message": "Возможная утечка: «{инцидент_название}» ({организация_название})",
+    },
+    {
+        "name": "Инцидент без ответственного",
+        "when": [["инцидент.ответственный", "empty", None],
+                 ["инцидент.статус", "!=", "Закрыт"]],
+        "message": "Не назначен ответственный: «{инцидент_название}»",
+    },
+]
+
+
+def _norm(value):
+    return value.casefold() if isinstance(value, str) else value
+
+
+def make_operator(op, expected):
+    """Функция значение -> bool для оператора условия (строки без учёта регистра)"""
+    if op in ("in", "not in"):
+        options = {_norm(v) for v in expected}
+        if op == "in":
+            return lambda value: _norm(value) in options
+        return lambda value: _norm(value) not in options
+    if op == "=":
+        expected = _norm(expected)
+        return lambda value: _norm(value) == expected
+    if op == "!=":
+        expected = _norm(expected)
+        return lambda value: _norm(value) != expected
+    if op == "contains":
+        expected = _norm(expected)
+        return lambda value: isinstance(value, str) and expected in value.casefold()
+    if op == "startswith":
+        expected = _norm(expected)
+        return lambda value: isinstance(value, str) and value.casefold().startswith(expected)
+    if op == "regex":
+        pattern = re.compile(expected, re.IGNORECASE)
+        return lambda value: isinstance(value, str) and pattern.search(value) is not None
+    if op == "empty":
+        return lambda value: value is None or value == ""
+    if op == "not empty":
+        return lambda value: value is not None and value != ""
+    raise ValueError(f"Неизвестный оператор: {op}")
+
+
+class CompiledRule:
+    """Правило, скомпилированное в предикат над записью инцидента"""
+
+    def __init__(self, rule: dict):
+        self.name = rule["name"]
+        self.message = rule.get("message", "{инцидент_название}")
+        checks = []
+        for field, op, expected in rule["when"]:
+            if field not in FIELDS:
+                raise ValueError(f"Неизвестное поле: {field}")
+            checks.append((FIELDS.index(field), make_operator(op, expected)))
+        self.fields = frozenset(FIELDS[index] for index, _ in checks)
+        self._checks = tuple(checks)
+
+    def matches(self, record) -> bool:
+        return all(check(record[index]) for index, check in self._checks)
+
+    def format(self, record) -> str:
+        values = {field.replace(".", "_"): value if value is not None else "—"
+                  for field, value in zip(FIELDS, record)}
+        try:
+            return self.message.format_map(values)
+        except (KeyError, ValueError):
+            return self.message
+
+
+def load_rules(path: Path = RULES_FILE):
+    """Правила из JSON-файла или правила по умолчанию"""
+    if path.exists():
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logging.error(f"Не удалось прочитать правила оповещений {path}: {e}")
+    return DEFAULT_RULES
+
+
+def compile_rules(rules):
+    compiled = []
+    for rule in rules:
+        try:
+            compiled.append(CompiledRule(rule))
+        except (KeyError, ValueError, TypeError, re.error) as e:
+            logging.error(f"Правило оповещения пропущено ({rule.get('name', '?')}): {e}")
+    return compiled
+
+
+class AlertLog:
+    """
+    Файл оповещений только на дозапись: строка JSON на оповещение.
+    HMAC каждой строки считается от HMAC предыдущей, поэтому удаление или
+    правка строки в середине файла обнаруживается при проверке цепочки.
+    """
+
+    def __init__(self, path: Path = ALERT_LOG):
+        self.path = Path(path)
+        self._previous = self._last_hmac()
+
+    def _last_hmac(self) -> str:
+        """HMAC последней целой строки: файл читается с конца кусками до её начала"""
+        if not self.path.exists():
+            return ""
+        with open(self.path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            tail = b""
+            while position > 0:
+                size = min(4096, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + tail).split(b"\n")
+                # Первый фрагмент — начало строки, пока не дочитали до начала файла
+                tail = lines.pop(0) if position else b""
+                for line in reversed(lines):
+                    if not line.strip():
+                        continue
+                    try:
+                        return json.loads(line.decode("utf-8"))["hmac"]
+                    except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+                        continue
+        return ""
+
+    @staticmethod
+    def _sign(previous: str, payload: str) -> str:
+        h = hmac.HMAC(env_cfg.LOG_HMAC_KEY, hashes.SHA256())
+        h.update(previous.encode())
+        h.update(payload.encode())
+        return h.finalize().hex()
+
+    def append(self, entries):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                payload = json.dumps(entry, ensure_ascii=False, sort_keys=True)
+                self._previous = self._sign(self._previous, payload)
+                f.write(json.dumps({**entry, "hmac": self._previous}, ensure_ascii=False, sort_keys=True) + "\n")
+
+    def verify(self) -> bool:
+        """Проверяет цепочку HMAC всего файла"""
+        previous = ""
+        if not self.path.exists():
+            return True
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    signature = entry.pop("hmac")
+                    payload = json.dumps(entry, ensure_ascii=False, sort_keys=True)
+                    if self._sign(previous, payload) != signature:
+                        return False
+                    previous = signature
+        except (ValueError, KeyError, TypeError, AttributeError, UnicodeDecodeError):
+            return False      # повреждённая строка — цепочка нарушена
+        return True
+
+
+class AlertEngine:
+    """
+    Оповещения по правилам при записи инцидентов и паспортов.
+
+    Правила компилируются один раз и индексируются по полям, которые они
+    читают. Для каждого инцидента хранится снимок этих полей: при записи
+    сравнение со снимком даёт изменившиеся поля, и проверяются только
+    правила, зависящие от них. Оповещение срабатывает, когда правило
+    становится истинным (а не при каждой записи, пока оно истинно).
+    Изменение самой организации инциденты не перепроверяет — поля
+    организации учитываются при следующей записи инцидента.
+    """
+
+    def __init__(self, db, root, notifications, rules=None, log: AlertLog = None):
+        self.db = db
+        self.notifications = notifications
+        self.log = log or AlertLog()
+        self.rules = compile_rules(load_rules() if rules is None else rules)
+
+        self._by_field = {}
+        for rule in self.rules:
+            for field in rule.fields:
+                self._by_field.setdefault(field, []).append(rule)
+        # Снимок хранит только поля, на которые есть правила
+        self._watched = tuple(FIELDS.index(field) for field in FIELDS if field in self._by_field)
+
+        self._snapshots = {}  # инцидент_id -> значения отслеживаемых полей
+        self._matched = {}    # инцидент_id -> имена истинных правил
+        self._changes = ChangeBatcher(db, root, ("Инциденты", "ПаспортаИнцидентов"), self._on_changes)
+
+    def start(self):
+        """
+        Проверяет цепочку журнала оповещений и запоминает текущее состояние,
+        не оповещая о том, что уже было
+        """
+        if not self.log.verify():
+            logging.error(f"Журнал оповещений {self.log.path} изменён или повреждён: цепочка HMAC нарушена")
+            self.notifications.push("Журнал оповещений",
+                                    f"Цепочка HMAC журнала {self.log.path} нарушена: файл изменён или повреждён")
+        for row in self.db.conn.execute(_RECORD_QUERY):
+            record = row[1:]
+            self._snapshots[row[0]] = self._snapshot(record)
+            self._matched[row[0]] = frozenset(rule.name for rule in self.rules if rule.matches(record))
+        logging.info(f"Оповещения: правил {len(self.rules)}, инцидентов {len(self._snapshots)}")
+
+    def stop(self):
+        self._changes.stop()
+
+    def _snapshot(self, record):
+        return tuple(record[index] for index in self._watched)
+
+    def _on_changes(self, incident_ids):
+        ids = sorted(incident_ids)
+        records = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            query = _RECORD_QUERY + f" WHERE и.инцидент_id IN ({', '.join('?' * len(chunk))})"
+            for row in self.db.conn.execute(query, chunk):
+                records[row[0]] = row[1:]
+
+        alerts = []
+        for incident_id in ids:
+            record = records.get(incident_id)
+            if record is None:
+                self._snapshots.pop(incident_id, None)
+                self._matched.pop(incident_id, None)
+                continue
+            alerts.extend(self._evaluate(incident_id, record))
+
+        if alerts:
+            self._emit(alerts)
+
+    def _evaluate(self, incident_id, record):
+        snapshot = self._snapshot(record)
+        previous = self._snapshots.get(incident_id)
+        self._snapshots[incident_id] = snapshot
+        if previous == snapshot:
+            return []
+
+        # Правила, читающие изменившиеся поля (для нового инцидента — все)
+        if previous is None:
+            candidates = self.rules
+        else:
+            candidates = {}
+            for position, index in enumerate(self._watched):
+                if previous[position] != snapshot[position]:
+                    for rule in self._by_field[FIELDS[index]]:
+                        candidates[rule.name] = rule
+            candidates = candidates.values()
+
+        matched = set(self._matched.get(incident_id, ()))
+        alerts = []
+        for rule in candidates:
+            if rule.matches(record):
+                if rule.name not in matched:
+                    matched.add(rule.name)
+                    alerts.append((rule, incident_id, record))
+            else:
+                matched.discard(rule.name)
+        self._matched[incident_id] = frozenset(matched)
+        return alerts
+
+    def _emit(self, alerts):
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        entries = []
+        for rule, incident_id, record in alerts:
+            text = rule.format(record)
+            entries.append({"время": now, "правило": rule.name, "инцидент_id": incident_id, "сообщение": text})
+            self.notifications.push(rule.name, text, incident_id)
+        try:
+            self.log.append(entries)
+        except OSError as e:
+            logging.error(f"Не удалось записать оповещения в {self.log.path}: {e}")
+        logging.warning(f"Оповещений по правилам: {len(entries)}")
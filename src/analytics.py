@@ -0,0 +1,400 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import datetime
+import logging
+import threading
+
+import numpy as np
+
+from src.change_batch import ChangeBatcher
+
+# Колоночный снимок для аналитики: инциденты (с полями паспорта и
+# счётчиком записей журнала) и журнал изменений. Каждая колонка — массив
+# NumPy; строковые значения закодированы словарём (коды int32, -1 — пусто).
+# Группировки, гистограммы и разбивка по времени считаются над массивами
+# целиком, без перебора строк на Python.
+#
+# Обновление инкрементальное. У журнала водяной знак — последний
+# загруженный история_изменения_id: дочитываются только новые записи.
+# В таблицах инцидентов отметок времени изменения нет, поэтому изменённые
+# строки приходят от ChangeBatcher и перезаписываются на своих позициях.
+MISSING = -1
+NOT_A_TIME = np.datetime64("NaT", "s")
+
+_INCIDENTS_QUERY = """
+    SELECT и.инцидент_id, и.дата_обнаружения, и.статус_инцидента_id, и.организация_id, и.ответственный_id,
+           п.уровень_критичности, п.тип_инцидента, п.категория_инцидента
+    FROM Инциденты и
+    LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+"""
+_AUDIT_QUERY = """
+    SELECT история_изменения_id, дата_изменения, username, таблица, действие, объект_id
+    FROM ИсторияИзменений WHERE история_изменения_id > ? ORDER BY история_изменения_id
+"""
+# Записи журнала, относящиеся к инциденту (объект_id — инцидент_id)
+INCIDENT_AUDIT_TABLES = ("Инциденты", "ПаспортаИнцидентов", "Инцидент_Меры")
+
+# Производные ключи группировки: колонка времени, округлённая до периода
+TIME_BUCKETS = {"день": "D", "неделя": "W", "месяц": "M", "год": "Y"}
+
+
+def to_datetime(values) -> np.ndarray:
+    """Строки дат SQLite ('2025-01-31', '2025-01-31 10:00:00') в datetime64[s]; нераспознанные — NaT"""
+    values = [value[:19] if isinstance(value, str) and value else None for value in values]
+    try:
+        return np.array(values, dtype="datetime64[s]")
+    except ValueError:
+        result = np.full(len(values), NOT_A_TIME)
+        for i, value in enumerate(values):
+            try:
+                result[i] = np.datetime64(value, "s")
+            except ValueError:
+                pass
+        return result
+
+
+def floor_time(times: np.ndarray, period: str) -> np.ndarray:
+    """Начало периода ('D', 'W' — с понедельника, 'M', 'Y') для каждого значения"""
+    if period == "W":
+        days = times.astype("datetime64[D]")
+        # 1970-01-01 — четверг: (дни + 3) % 7 == 0 у понедельников
+        return days - (days.astype(np.int64) + 3) % 7
+    return times.astype(f"datetime64[{period}]")
+
+
+class Dictionary:
+    """Словарное кодирование строк: значение <-> код"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value) -> int:
+        if value is None or value == "":
+            return MISSING
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode_many(self, values) -> np.ndarray:
+        return np.fromiter((self.encode(value) for value in values), dtype=np.int32, count=len(values))
+
+    def code(self, value) -> int:
+        return self._codes.get(value, MISSING)
+
+    def decode(self, code):
+        return self.values[code] if code != MISSING else None
+
+
+class Frame:
+    """
+    Набор колонок одинаковой длины. Колонки с именем из dictionaries
+    хранят коды словаря, остальные — значения (ID, время, числа).
+    Удалённые строки помечаются в колонке alive до уплотнения.
+    """
+
+    def __init__(self, schema: dict, dictionary_columns=()):
+        self.schema = schema     # колонка -> dtype
+        self.dictionaries = {name: Dictionary() for name in dictionary_columns}
+        self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in schema.items()}
+        self.columns["alive"] = np.empty(0, dtype=bool)
+
+    def __len__(self):
+        return int(self.columns["alive"].sum())
+
+    def append(self, columns: dict):
+        count = len(next(iter(columns.values())))
+        for name, dtype in self.schema.items():
+            self.columns[name] = np.concatenate([self.columns[name], np.asarray(columns[name], dtype=dtype)])
+        self.columns["alive"] = np.concatenate([self.columns["alive"], np.ones(count, dtype=bool)])
+
+    def assign(self, positions: np.ndarray, columns: dict):
+        for name, values in columns.items():
+            self.columns[name][positions] = values
+
+    def compact(self):
+        """Убирает помеченные удалёнными строки; возвращает старые позиции оставшихся"""
+        keep = np.flatnonzero(self.columns["alive"])
+        for name in self.columns:
+            self.columns[name] = self.columns[name][keep]
+        return keep
+
+    def decode(self, name, code):
+        if name in self.dictionaries:
+            return self.dictionaries[name].decode(code)
+        return None if code == MISSING else code
+
+    # --- Выборка ---
+    def mask(self, since=None, until=None, time_column: str = None, **equals) -> np.ndarray:
+        """
+        Маска живых строк с фильтрами: since/until по колонке времени
+        (datetime, date или строка), остальные — равенство колонке
+        (для словарных колонок — по исходному значению).
+        """
+        mask = self.columns["alive"].copy()
+        if since is not None:
+            mask &= self.columns[time_column] >= np.datetime64(since, "s")
+        if until is not None:
+            mask &= self.columns[time_column] < np.datetime64(until, "s")
+        for name, value in equals.items():
+            if name in self.dictionaries:
+                value = self.dictionaries[name].code(value)
+            mask &= self.columns[name] == value
+        return mask
+
+    def _key(self, name: str, time_column: str):
+        """Массив кодов ключа группировки и функция их расшифровки"""
+        if name in TIME_BUCKETS:
+            buckets = floor_time(self.columns[time_column], TIME_BUCKETS[name])
+            return buckets.astype(np.int64), lambda code, period=buckets.dtype: (
+                None if code == np.iinfo(np.int64).min else np.datetime64(int(code), np.datetime_data(period)[0]).item())
+        return self.columns[name].astype(np.int64), lambda code, column=name: self.decode(column, code)
+
+    def group_count(self, keys, mask=None, time_column: str = None, weights=None):
+        """
+        Число строк (или сумма weights) по сочетаниям ключей: [(значения ключей, число)],
+        по убыванию числа. Ключи — колонки и периоды времени ('неделя', 'месяц' ...).
+        """
+        mask = self.columns["alive"] if mask is None else mask
+        decoders = []
+        uniques = []
+        inverses = []
+        for name in keys:
+            key, decoder = self._key(name, time_column)
+            unique, inverse = np.unique(key[mask], return_inverse=True)
+            uniques.append(unique)
+            inverses.append(inverse.ravel())
+            decoders.append(decoder)
+        if not inverses or not len(inverses[0]):
+            return []
+        # Сочетание ключей — одно число в смешанной системе счисления,
+        # поэтому группировка сводится к одному bincount/unique по int64
+        dims = tuple(len(unique) for unique in uniques)
+        combined = np.ravel_multi_index(inverses, dims)
+        if np.prod(dims, dtype=np.float64) <= 4 * len(combined) + 1024:
+            counts = np.bincount(combined, weights=None if weights is None else weights[mask],
+                                 minlength=int(np.prod(dims)))
+            groups = np.flatnonzero(counts)
+            counts = counts[groups]
+        else:
+            groups, inverse = np.unique(combined, return_inverse=True)
+            counts = np.bincount(inverse.ravel(), weights=None if weights is None else weights[mask])
+        order = np.lexsort((groups, -counts))
+        positions = np.unravel_index(groups[order], dims)
+        result = []
+        for row, i in enumerate(order):
+            values = tuple(decoder(int(unique[position[row]]))
+                           for decoder, unique, position in zip(decoders, uniques, positions))
+            result.append((values, int(counts[i]) if weights is None else float(counts[i])))
+        return result
+
+    def histogram(self, name: str, bins=10, mask=None):
+        """Гистограмма числовой колонки: (число в корзине, границы корзин)"""
+        mask = self.columns["alive"] if mask is None else mask
+        values = self.columns[name][mask]
+        if np.issubdtype(values.dtype, np.datetime64):
+            values = values[~np.isnat(values)].astype(np.int64)
+        return np.histogram(values, bins=bins)
+
+    def time_series(self, period: str = "неделя", mask=None, time_column: str = None, by: str = None):
+        """
+        Число строк по периодам без пропусков (пустые периоды — 0):
+        (начала периодов, массив чисел) или, с by, {значение by: массив чисел}.
+        """
+        mask = self.columns["alive"] if mask is None else mask
+        times = self.columns[time_column]
+        mask = mask & ~np.isnat(times)
+        if not mask.any():
+            return np.empty(0, dtype="datetime64[D]"), ({} if by else np.empty(0, dtype=np.int64))
+        buckets = floor_time(times[mask], TIME_BUCKETS[period])
+        step = np.timedelta64(7, "D") if period == "неделя" else np.timedelta64(1, TIME_BUCKETS[period])
+        starts = np.arange(buckets.min(), buckets.max() + step, step)
+        positions = ((buckets - starts[0]) // step).astype(np.intp)
+        if by is None:
+            return starts, np.bincount(positions, minlength=len(starts))
+        groups = self.columns[by][mask]
+        series = {}
+        for code in np.unique(groups):
+            series[self.decode(by, int(code))] = np.bincount(positions[groups == code], minlength=len(starts))
+        return starts, series
+
+
+class AnalyticsSnapshot:
+    """
+    Колоночный снимок SecureDB для панели статистики и отчётов.
+    refresh() вызывать из UI-потока (читает БД); готовые массивы можно
+    передавать в фоновые расчёты.
+    """
+    COMPACT_RATIO = 0.25     # доля удалённых строк, после которой снимок уплотняется
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._changes = ChangeBatcher(db, None, ("Инциденты", "ПаспортаИнцидентов"))
+        self.incidents = Frame(
+            {"инцидент_id": np.int64, "обнаружен": "datetime64[s]", "статус": np.int32, "организация": np.int32,
+             "ответственный": np.int32, "критичность": np.int32, "тип": np.int32, "категория": np.int32,
+             "изменений": np.int32, "последнее_изменение": "datetime64[s]"},
+            dictionary_columns=("критичность", "тип", "категория"),
+        )
+        self.audit = Frame(
+            {"запись_id": np.int64, "дата": "datetime64[s]", "пользователь": np.int32, "таблица": np.int32,
+             "действие": np.int32, "объект_id": np.int64},
+            dictionary_columns=("пользователь", "таблица", "действие"),
+        )
+        self.watermark = 0           # последний загруженный история_изменения_id
+        self._position = {}          # инцидент_id -> строка incidents
+        self._built = False
+
+    # --- Загрузка ---
+    def _incident_columns(self, rows) -> dict:
+        frame = self.incidents
+        ids, detected, status, org, responsible, level, kind, category = (
+            list(column) for column in zip(*rows)) if rows else ([],) * 8
+        return {
+            "инцидент_id": np.array(ids, dtype=np.int64),
+            "обнаружен": to_datetime(detected),
+            "статус": np.array([MISSING if v is None else v for v in status], dtype=np.int32),
+            "организация": np.array([MISSING if v is None else v for v in org], dtype=np.int32),
+            "ответственный": np.array([MISSING if v is None else v for v in responsible], dtype=np.int32),
+            "критичность": frame.dictionaries["критичность"].encode_many(level),
+            "тип": frame.dictionaries["тип"].encode_many(kind),
+            "категория": frame.dictionaries["категория"].encode_many(category),
+        }
+
+    def _load_incidents(self, ids=None):
+        if ids is None:
+            rows = self.db.conn.execute(_INCIDENTS_QUERY + " ORDER BY и.инцидент_id").fetchall()
+        else:
+            rows = []
+            for start in range(0, len(ids), 500):
+                part = ids[start:start + 500]
+                rows += self.db.conn.execute(
+                    _INCIDENTS_QUERY + f" WHERE и.инцидент_id IN ({','.join('?' * len(part))})", part).fetchall()
+        return self._incident_columns(rows)
+
+    def _apply_incidents(self, changed):
+        columns = self._load_incidents(sorted(changed))
+        found = {int(key): i for i, key in enumerate(columns["инцидент_id"])}
+        existing = [(self._position[key], found[key]) for key in found if key in self._position]
+        if existing:
+            positions, rows = (np.array(column, dtype=np.intp) for column in zip(*existing))
+            self.incidents.assign(positions, {name: values[rows] for name, values in columns.items()})
+        new_rows = np.array([row for key, row in found.items() if key not in self._position], dtype=np.intp)
+        if len(new_rows):
+            start = len(self.incidents.columns["alive"])
+            new = {name: values[new_rows] for name, values in columns.items()}
+            new["изменений"] = np.zeros(len(new_rows), dtype=np.int32)
+            new["последнее_изменение"] = np.full(len(new_rows), NOT_A_TIME)
+            self.incidents.append(new)
+            for offset, key in enumerate(new["инцидент_id"]):
+                self._position[int(key)] = start + offset
+        deleted = [self._position.pop(key) for key in changed if key not in found and key in self._position]
+        if deleted:
+            self.incidents.columns["alive"][deleted] = False
+
+    def _apply_audit(self):
+        rows = self.db.conn.execute(_AUDIT_QUERY, (self.watermark,)).fetchall()
+        if not rows:
+            return 0
+        ids, dates, users, tables, actions, objects = (list(column) for column in zip(*rows))
+        frame = self.audit
+        columns = {
+            "запись_id": np.array(ids, dtype=np.int64),
+            "дата": to_datetime(dates),
+            "пользователь": frame.dictionaries["пользователь"].encode_many(users),
+            "таблица": frame.dictionaries["таблица"].encode_many(tables),
+            "действие": frame.dictionaries["действие"].encode_many(actions),
+            "объект_id": np.array([MISSING if v is None else v for v in objects], dtype=np.int64),
+        }
+        frame.append(columns)
+        self.watermark = ids[-1]
+
+        # Счётчики журнала у инцидентов — векторно по новым записям
+        table_codes = [frame.dictionaries["таблица"].code(name) for name in INCIDENT_AUDIT_TABLES]
+        related = np.isin(columns["таблица"], table_codes) & (columns["объект_id"] != MISSING)
+        objects = columns["объект_id"][related]
+        times = columns["дата"][related]
+        positions = np.array([self._position.get(int(key), -1) for key in objects], dtype=np.intp)
+        known = positions >= 0
+        if known.any():
+            np.add.at(self.incidents.columns["изменений"], positions[known], 1)
+            np.maximum.at(self.incidents.columns["последнее_изменение"].view(np.int64), positions[known],
+                          times[known].view(np.int64))
+        return len(rows)
+
+    def refresh(self):
+        """Строит снимок при первом вызове, затем дочитывает изменения"""
+        with self._lock:
+            changed = self._changes.take()
+            if not self._built:
+                columns = self._load_incidents()
+                columns["изменений"] = np.zeros(len(columns["инцидент_id"]), dtype=np.int32)
+                columns["последнее_изменение"] = np.full(len(columns["инцидент_id"]), NOT_A_TIME)
+                self.incidents.append(columns)
+                self._position = {int(key): i for i, key in enumerate(columns["инцидент_id"])}
+                self._apply_audit()
+                self._built = True
+                logging.info(f"Аналитический снимок: инцидентов {len(self.incidents)}, "
+                             f"записей журнала {len(self.audit)}")
+                return self
+            if changed:
+                self._apply_incidents(changed)
+            self._apply_audit()
+            alive = self.incidents.columns["alive"]
+            if len(alive) and (~alive).sum() > self.COMPACT_RATIO * len(alive):
+                self.incidents.compact()
+                self._position = {int(key): i for i, key in enumerate(self.incidents.columns["инцидент_id"])}
+            return self
+
+    # --- Запросы ---
+    def incidents_by(self, keys, since=None, until=None, **equals):
+        """
+        Инциденты по сочетаниям ключей, например
+        incidents_by(("организация", "неделя", "критичность"), since=два_года_назад)
+        """
+        self.refresh()
+        mask = self.incidents.mask(since, until, time_column="обнаружен", **equals)
+        return self.incidents.group_count(keys, mask, time_column="обнаружен")
+
+    def incidents_series(self, period: str = "неделя", since=None, until=None, by: str = None, **equals):
+        self.refresh()
+        mask = self.incidents.mask(since, until, time_column="обнаружен", **equals)
+        return self.incidents.time_series(period, mask, time_column="обнаружен", by=by)
+
+    def recent_series(self, period: str = "неделя", last: int = 12, by: str = None, today=None):
+        """
+        Ряд за last периодов, последний из которых содержит today (по умолчанию —
+        сегодня): (начала периодов, {значение by: массив чисел}); пустые периоды — 0
+        """
+        today = np.datetime64(today or datetime.date.today(), "s")
+        current = floor_time(np.array([today]), TIME_BUCKETS[period])[0]
+        step = np.timedelta64(7, "D") if period == "неделя" else np.timedelta64(1, TIME_BUCKETS[period])
+        starts = current - step * np.arange(last - 1, -1, -1)
+        found, series = self.incidents_series(period, since=starts[0], until=current + step, by=by)
+        if by is None:
+            series = {None: series}
+        offsets = ((found - starts[0]) // step).astype(np.intp)
+        filled = {}
+        for key, counts in series.items():
+            filled[key] = np.zeros(last, dtype=np.int64)
+            filled[key][offsets] = counts
+        return starts, filled
+
+    def audit_by(self, keys, since=None, until=None, **equals):
+        """Записи журнала по сочетаниям ключей (пользователь, таблица, действие, периоды)"""
+        self.refresh()
+        mask = self.audit.mask(since, until, time_column="дата", **equals)
+        return self.audit.group_count(keys, mask, time_column="дата")
+
+    def stale_incidents(self, days: int = 30, now=None):
+        """ID живых инцидентов без записей журнала за последние days дней"""
+        self.refresh()
+        now = np.datetime64(now or datetime.datetime.now().replace(microsecond=0), "s")
+        columns = self.incidents.columns
+        last = columns["последнее_изменение"]
+        stale = columns["alive"] & (np.isnat(last) | (last < now - np.timedelta64(days, "D")))
+        return columns["инцидент_id"][stale].tolist()
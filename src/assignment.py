@@ -0,0 +1,230 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import logging
+import threading
+
+from src.change_batch import ChangeBatcher
+from src.response_metrics import STATUS_CLOSED
+
+# Вес открытого инцидента в нагрузке по уровню критичности паспорта
+CRITICALITY_WEIGHTS = {"критический": 4, "высокий": 3, "средний": 2, "низкий": 1}
+DEFAULT_WEIGHT = 1
+
+# Вклад инцидента в нагрузку: ответственный и уровень (закрытые не считаются)
+_CONTRIBUTION_QUERY = f"""
+    SELECT и.инцидент_id, и.ответственный_id, п.уровень_критичности
+    FROM Инциденты и
+    LEFT JOIN СтатусыИнцидентов с ON с.статус_инцидента_id = и.статус_инцидента_id
+    LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+    WHERE и.ответственный_id IS NOT NULL AND COALESCE(с.статус, '') != '{STATUS_CLOSED}'
+"""
+
+
+class IndexedHeap:
+    """
+    Двоичная min-куча пар (приоритет, ключ) с индексом позиций:
+    изменение приоритета и удаление по ключу за O(log n).
+    """
+
+    def __init__(self):
+        self._items = []       # [приоритет, ключ]
+        self._position = {}    # ключ -> индекс в _items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._position
+
+    def peek(self):
+        """(приоритет, ключ) минимального элемента или None"""
+        return tuple(self._items[0]) if self._items else None
+
+    def priority(self, key):
+        return self._items[self._position[key]][0]
+
+    def priorities(self) -> dict:
+        return {key: priority for priority, key in self._items}
+
+    def set(self, key, priority):
+        """Добавляет ключ или меняет его приоритет"""
+        index = self._position.get(key)
+        if index is None:
+            self._items.append([priority, key])
+            self._position[key] = len(self._items) - 1
+            self._sift_up(len(self._items) - 1)
+            return
+        old = self._items[index][0]
+        self._items[index][0] = priority
+        if (priority, key) < (old, key):
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def remove(self, key):
+        index = self._position.pop(key, None)
+        if index is None:
+            return
+        last = self._items.pop()
+        if index < len(self._items):
+            self._items[index] = last
+            self._position[last[1]] = index
+            self._sift_up(index)
+            self._sift_down(self._position[last[1]])
+
+    def _less(self, i, j):
+        return tuple(self._items[i]) < tuple(self._items[j])
+
+    def _swap(self, i, j):
+        items = self._items
+        items[i], items[j] = items[j], items[i]
+        self._position[items[i][1]] = i
+        self._position[items[j][1]] = j
+
+    def _sift_up(self, index):
+        while index > 0:
+            parent = (index - 1) // 2
+            if not self._less(index, parent):
+                break
+            self._swap(index, parent)
+            index = parent
+
+    def _sift_down(self, index):
+        size = len(self._items)
+        while True:
+            smallest = index
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size and self._less(child, smallest):
+                    smallest = child
+            if smallest == index:
+                break
+            self._swap(index, smallest)
+            index = smallest
+
+
+class AssignmentEngine:
+    """
+    Автоназначение ответственного с наименьшей нагрузкой.
+
+    Нагрузка — число открытых инцидентов ответственного (или сумма их весов
+    по критичности, если weighted). Для каждой организации — индексированная
+    куча её ответственных, поэтому выбор — O(1), а изменение нагрузки —
+    O(log n). Изменения инцидентов, паспортов и ответственных приходят от
+    триггеров (SecureDB.subscribe) и применяются перед следующим выбором.
+    Состояние загружается при первом обращении.
+    """
+
+    def __init__(self, db, weighted: bool = True):
+        self.db = db
+        self.weighted = weighted
+        self._heaps = {}          # организация_id -> IndexedHeap ответственных
+        self._organization = {}   # ответственный_id -> организация_id
+        self._contribution = {}   # инцидент_id -> (ответственный_id, вес)
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._incidents = ChangeBatcher(db, None, ("Инциденты", "ПаспортаИнцидентов"))
+        self._responsibles = ChangeBatcher(db, None, ("Ответственные",))
+
+    def _weight(self, level):
+        if not self.weighted:
+            return 1
+        return CRITICALITY_WEIGHTS.get((level or "").strip().lower(), DEFAULT_WEIGHT)
+
+    # --- Загрузка и изменения ---
+    def _load(self):
+        self._incidents.take()
+        self._responsibles.take()
+        for resp_id, org_id in self.db.conn.execute("SELECT ответственный_id, организация_id FROM Ответственные"):
+            self._organization[resp_id] = org_id
+            self._heaps.setdefault(org_id, IndexedHeap()).set(resp_id, 0)
+        for incident_id, resp_id, level in self.db.conn.execute(_CONTRIBUTION_QUERY):
+            self._add(incident_id, resp_id, self._weight(level))
+        self._loaded = True
+        logging.info(f"Автоназначение: ответственных {len(self._organization)}, "
+                     f"открытых инцидентов {len(self._contribution)}")
+
+    def _heap_of(self, resp_id):
+        return self._heaps.get(self._organization.get(resp_id))
+
+    def _shift(self, resp_id, delta):
+        heap = self._heap_of(resp_id)
+        if heap is not None and resp_id in heap:
+            heap.set(resp_id, heap.priority(resp_id) + delta)
+
+    def _add(self, incident_id, resp_id, weight):
+        self._contribution[incident_id] = (resp_id, weight)
+        self._shift(resp_id, weight)
+
+    def _remove(self, incident_id):
+        previous = self._contribution.pop(incident_id, None)
+        if previous:
+            self._shift(previous[0], -previous[1])
+
+    def _load_of(self, resp_id):
+        return sum(weight for owner, weight in self._contribution.values() if owner == resp_id)
+
+    def _apply_changes(self):
+        resp_ids = self._responsibles.take()
+        if resp_ids:
+            rows = dict(self._query_in(
+                "SELECT ответственный_id, организация_id FROM Ответственные WHERE ответственный_id IN ({})",
+                resp_ids))
+            for resp_id in resp_ids:
+                old_heap = self._heap_of(resp_id)
+                load = old_heap.priority(resp_id) if old_heap is not None and resp_id in old_heap else None
+                if old_heap is not None:
+                    old_heap.remove(resp_id)
+                if resp_id not in rows:
+                    self._organization.pop(resp_id, None)
+                    continue
+                org_id = rows[resp_id]
+                self._organization[resp_id] = org_id
+                # Новый ответственный мог уже числиться в инцидентах — досчитываем
+                self._heaps.setdefault(org_id, IndexedHeap()).set(
+                    resp_id, load if load is not None else self._load_of(resp_id))
+
+        incident_ids = self._incidents.take()
+        if incident_ids:
+            rows = {row[0]: row for row in self._query_in(
+                _CONTRIBUTION_QUERY + " AND и.инцидент_id IN ({})", incident_ids)}
+            for incident_id in incident_ids:
+                self._remove(incident_id)
+                row = rows.get(incident_id)
+                if row is not None:
+                    self._add(incident_id, row[1], self._weight(row[2]))
+
+    def _query_in(self, query, ids):
+        ids = sorted(ids)
+        rows = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows.extend(self.db.conn.execute(query.format(", ".join("?" * len(chunk))), chunk))
+        return rows
+
+    # --- Выбор ---
+    def pick(self, организация_id=None):
+        """
+        ID наименее загруженного ответственного организации (None — если
+        у организации нет ответственных). При равной нагрузке — меньший ID.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            else:
+                self._apply_changes()
+            heap = self._heaps.get(организация_id)
+            top = heap.peek() if heap else None
+            return top[1] if top else None
+
+    def loads(self, организация_id=None):
+        """Текущая нагрузка ответственных организации: {ответственный_id: нагрузка}"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            else:
+                self._apply_changes()
+            heap = self._heaps.get(организация_id)
+            if not heap:
+                return {}
+            return heap.priorities()
@@ -0,0 +1,339 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import json
+import logging
+import re
+
+from src.reference_cache import Reference
+
+# Локальная база MITRE ATT&CK из офлайн-пакета STIX 2.x (enterprise-attack.json).
+#   АтакаТактики:       TA0001 -> короткое имя (initial-access), название
+#   АтакаТехники:       T1566 / T1566.001 -> название, родительская техника
+#   АтакаТехникиТактик: техника -> тактики (kill_chain_phases)
+#   АтакаМеры:          M1049 -> название, описание
+#   АтакаМерыТехник:    связи "mitigates"
+#   ИнцидентыТехники:   теги инцидентов
+# Сводки поддерживаются триггерами на ИнцидентыТехники:
+#   АтакаТехникиСводка  — число инцидентов на технику;
+#   АтакаМерыИнцидентов — рекомендуемые меры инцидента и число его техник,
+#                         которые мера закрывает.
+_TABLES = """
+    CREATE TABLE IF NOT EXISTS АтакаТактики (
+        тактика_id TEXT PRIMARY KEY,
+        короткое_имя TEXT NOT NULL UNIQUE,
+        название TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS АтакаТехники (
+        техника_id TEXT PRIMARY KEY,
+        название TEXT NOT NULL,
+        родитель_id TEXT,
+        устарела INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS АтакаТехникиТактик (
+        техника_id TEXT NOT NULL,
+        тактика_id TEXT NOT NULL,
+        PRIMARY KEY (техника_id, тактика_id)
+    );
+    CREATE TABLE IF NOT EXISTS АтакаМеры (
+        мера_id TEXT PRIMARY KEY,
+        название TEXT NOT NULL,
+        описание TEXT
+    );
+    CREATE TABLE IF NOT EXISTS АтакаМерыТехник (
+        техника_id TEXT NOT NULL,
+        мера_id TEXT NOT NULL,
+        PRIMARY KEY (техника_id, мера_id)
+    );
+    CREATE TABLE IF NOT EXISTS ИнцидентыТехники (
+        инцидент_id INTEGER NOT NULL,
+        техника_id TEXT NOT NULL,
+        PRIMARY KEY (инцидент_id, техника_id),
+        FOREIGN KEY (инцидент_id) REFERENCES Инциденты(инцидент_id)
+    );
+    CREATE TABLE IF NOT EXISTS АтакаТехникиСводка (
+        техника_id TEXT PRIMARY KEY,
+        инцидентов INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS АтакаМерыИнцидентов (
+        инцидент_id INTEGER NOT NULL,
+        мера_id TEXT NOT NULL,
+        техник INTEGER NOT NULL,
+        PRIMARY KEY (инцидент_id, мера_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_атака_тактики_техники ON АтакаТехникиТактик(тактика_id);
+    CREATE INDEX IF NOT EXISTS idx_атака_меры_техник ON АтакаМерыТехник(мера_id);
+    CREATE INDEX IF NOT EXISTS idx_инциденты_техники ON ИнцидентыТехники(техника_id);
+"""
+
+_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS атака_тег_добавлен AFTER INSERT ON ИнцидентыТехники
+    BEGIN
+        INSERT INTO АтакаТехникиСводка (техника_id, инцидентов) VALUES (NEW.техника_id, 1)
+            ON CONFLICT(техника_id) DO UPDATE SET инцидентов = инцидентов + 1;
+        INSERT INTO АтакаМерыИнцидентов (инцидент_id, мера_id, техник)
+            SELECT NEW.инцидент_id, мера_id, 1 FROM АтакаМерыТехник WHERE техника_id = NEW.техника_id
+            ON CONFLICT(инцидент_id, мера_id) DO UPDATE SET техник = техник + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS атака_тег_удалён AFTER DELETE ON ИнцидентыТехники
+    BEGIN
+        UPDATE АтакаТехникиСводка SET инцидентов = инцидентов - 1 WHERE техника_id = OLD.техника_id;
+        DELETE FROM АтакаТехникиСводка WHERE техника_id = OLD.техника_id AND инцидентов <= 0;
+        UPDATE АтакаМерыИнцидентов SET техник = техник - 1
+            WHERE инцидент_id = OLD.инцидент_id
+              AND мера_id IN (SELECT мера_id FROM АтакаМерыТехник WHERE техника_id = OLD.техника_id);
+        DELETE FROM АтакаМерыИнцидентов WHERE инцидент_id = OLD.инцидент_id AND техник <= 0;
+    END;
+"""
+
+_TECHNIQUE_ID = re.compile(r"T\d{4}(?:\.\d{3})?")
+_OBJECTS_START = re.compile(r'"objects"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,"
+
+
+def ensure_attack(conn):
+    """Создаёт таблицы базы ATT&CK, тегов и триггеры сводок"""
+    for statement in _TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    for part in _TRIGGERS.split("END;"):
+        if part.strip():
+            conn.execute(part.strip() + " END")
+
+
+def _rebuild_summaries(conn):
+    """Пересчитывает сводки целиком (после импорта связи мер с техниками меняются)"""
+    conn.execute("DELETE FROM АтакаТехникиСводка")
+    conn.execute("""
+        INSERT INTO АтакаТехникиСводка (техника_id, инцидентов)
+        SELECT техника_id, COUNT(*) FROM ИнцидентыТехники GROUP BY техника_id
+    """)
+    conn.execute("DELETE FROM АтакаМерыИнцидентов")
+    conn.execute("""
+        INSERT INTO АтакаМерыИнцидентов (инцидент_id, мера_id, техник)
+        SELECT ит.инцидент_id, мт.мера_id, COUNT(*)
+        FROM ИнцидентыТехники ит
+        JOIN АтакаМерыТехник мт ON мт.техника_id = ит.техника_id
+        GROUP BY ит.инцидент_id, мт.мера_id
+    """)
+
+
+# --- Чтение пакета STIX ---
+def iter_stix_objects(path, chunk_size: int = 1 << 20):
+    """
+    Объекты массива "objects" пакета STIX по одному. Файл читается кусками,
+    в памяти — текущий кусок и разбираемый объект, а не весь пакет.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buffer = ""
+        position = None
+        eof = False
+        while position is None:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError("В файле нет массива objects")
+            buffer += chunk
+            match = _OBJECTS_START.search(buffer)
+            if match:
+                position = match.end()
+            else:
+                buffer = buffer[-32:]   # ключ мог разрезаться границей куска
+
+        while True:
+            while position < len(buffer) and buffer[position] in _SEPARATORS:
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                if position >= len(buffer):
+                    raise ValueError
+                item, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if eof:
+                    raise ValueError("Пакет STIX оборван")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield item
+            position = end
+
+
+def _external_id(obj):
+    for reference in obj.get("external_references", ()):
+        if reference.get("source_name") == "mitre-attack" and reference.get("external_id"):
+            return reference["external_id"]
+    return None
+
+
+def read_bundle(path) -> dict:
+    """
+    Разбирает пакет в строки таблиц. К БД не обращается (можно в фоне);
+    результат записывает AttackKB.store(). Отозванные объекты пропускаются.
+    """
+    tactics, techniques, mitigations = [], [], []
+    stix_ids = {}            # STIX id -> внешний ID (T1566, M1049)
+    phases = []              # (техника, короткое имя тактики)
+    mitigates = []           # (STIX id меры, STIX id техники)
+    objects = 0
+    for obj in iter_stix_objects(path):
+        objects += 1
+        kind = obj.get("type")
+        if obj.get("revoked") or kind not in ("x-mitre-tactic", "attack-pattern", "course-of-action", "relationship"):
+            continue
+        if kind == "relationship":
+            if obj.get("relationship_type") == "mitigates":
+                mitigates.append((obj.get("source_ref"), obj.get("target_ref")))
+            continue
+        external_id = _external_id(obj)
+        if not external_id:
+            continue
+        stix_ids[obj["id"]] = external_id
+        if kind == "x-mitre-tactic":
+            tactics.append((external_id, obj.get("x_mitre_shortname", external_id), obj.get("name", external_id)))
+        elif kind == "attack-pattern":
+            parent = external_id.split(".")[0] if "." in external_id else None
+            techniques.append((external_id, obj.get("name", external_id), parent,
+                               1 if obj.get("x_mitre_deprecated") else 0))
+            for phase in obj.get("kill_chain_phases", ()):
+                if phase.get("kill_chain_name", "").startswith("mitre"):
+                    phases.append((external_id, phase.get("phase_name")))
+        else:
+            mitigations.append((external_id, obj.get("name", external_id), obj.get("description")))
+
+    tactic_by_name = {shortname: tactic_id for tactic_id, shortname, _ in tactics}
+    technique_tactics = sorted({(technique, tactic_by_name[name]) for technique, name in phases
+                                if name in tactic_by_name})
+    mitigation_ids = {row[0] for row in mitigations}
+    technique_ids = {row[0] for row in techniques}
+    technique_mitigations = sorted({
+        (stix_ids[target], stix_ids[source]) for source, target in mitigates
+        if stix_ids.get(source) in mitigation_ids and stix_ids.get(target) in technique_ids
+    })
+    return {
+        "объектов": objects,
+        "тактики": tactics, "техники": techniques, "меры": mitigations,
+        "техники_тактик": technique_tactics, "меры_техник": technique_mitigations,
+    }
+
+
+# --- База знаний ---
+class AttackKB:
+    """Импорт ATT&CK, теги техник у инцидентов и запросы по сводкам"""
+
+    def __init__(self, db):
+        self.db = db
+        self._reference = None
+
+    def store(self, bundle: dict, username: str):
+        """Заменяет справочники ATT&CK данными read_bundle() одной транзакцией"""
+        conn = self.db.conn
+        with conn:
+            for table in ("АтакаТехникиТактик", "АтакаМерыТехник", "АтакаТактики", "АтакаТехники", "АтакаМеры"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany("INSERT INTO АтакаТактики VALUES (?, ?, ?)", bundle["тактики"])
+            conn.executemany("INSERT INTO АтакаТехники VALUES (?, ?, ?, ?)", bundle["техники"])
+            conn.executemany("INSERT INTO АтакаМеры VALUES (?, ?, ?)", bundle["меры"])
+            conn.executemany("INSERT INTO АтакаТехникиТактик VALUES (?, ?)", bundle["техники_тактик"])
+            conn.executemany("INSERT INTO АтакаМерыТехник VALUES (?, ?)", bundle["меры_техник"])
+            _rebuild_summaries(conn)
+            self.db._insert_audit([(
+                username, "АтакаТехники", "Импорт ATT&CK", None, None,
+                f"тактик {len(bundle['тактики'])}, техник {len(bundle['техники'])}, мер {len(bundle['меры'])}",
+                None
+            )])
+        self._reference = None
+        logging.info(f"Импорт ATT&CK: объектов {bundle['объектов']}, техник {len(bundle['техники'])}, "
+                     f"связей мер {len(bundle['меры_техник'])}")
+
+    def import_bundle(self, path, username: str):
+        self.store(read_bundle(path), username)
+
+    def techniques(self) -> Reference:
+        """Справочник техник ('T1566.001 Название') для автодополнения"""
+        if self._reference is None:
+            rows = self.db.conn.execute(
+                "SELECT т.техника_id, т.техника_id || ' ' || COALESCE(р.название || ': ', '') || т.название "
+                "FROM АтакаТехники т LEFT JOIN АтакаТехники р ON р.техника_id = т.родитель_id "
+                "WHERE т.устарела = 0 ORDER BY т.техника_id"
+            ).fetchall()
+            self._reference = Reference(rows, 0)
+        return self._reference
+
+    # --- Теги ---
+    def tag(self, инцидент_id, техники, username: str) -> int:
+        """Привязывает техники к инциденту; возвращает число новых привязок"""
+        techniques = []
+        for technique in техники:
+            technique = technique.strip().upper()
+            if not _TECHNIQUE_ID.fullmatch(technique):
+                raise ValueError(f"Некорректный ID техники: {technique}")
+            techniques.append(technique)
+        added = []
+        with self.db.conn:
+            for technique in techniques:
+                cursor = self.db.conn.execute(
+                    "INSERT OR IGNORE INTO ИнцидентыТехники (инцидент_id, техника_id) VALUES (?, ?)",
+                    (инцидент_id, technique)
+                )
+                if cursor.rowcount:
+                    added.append(technique)
+            self.db._insert_audit([
+                (username, "ИнцидентыТехники", "Добавление", "техника_id", None, technique, инцидент_id)
+                for technique in added
+            ])
+        return len(added)
+
+    def untag(self, инцидент_id, техника_id: str, username: str):
+        with self.db.conn:
+            cursor = self.db.conn.execute(
+                "DELETE FROM ИнцидентыТехники WHERE инцидент_id = ? AND техника_id = ?", (инцидент_id, техника_id)
+            )
+            if cursor.rowcount:
+                self.db._insert_audit([
+                    (username, "ИнцидентыТехники", "Удаление", "техника_id", техника_id, None, инцидент_id)
+                ])
+
+    def techniques_of(self, инцидент_id):
+        """Техники инцидента: (техника_id, название или None, если её нет в базе)"""
+        return self.db.conn.execute(
+            "SELECT ит.техника_id, т.название FROM ИнцидентыТехники ит "
+            "LEFT JOIN АтакаТехники т ON т.техника_id = ит.техника_id "
+            "WHERE ит.инцидент_id = ? ORDER BY ит.техника_id",
+            (инцидент_id,)
+        ).fetchall()
+
+    # --- Запросы ---
+    def incidents_by_technique(self, техника_id: str, with_subtechniques: bool = True):
+        """ID инцидентов с техникой (и её подтехниками — диапазон по индексу)"""
+        if with_subtechniques and "." not in техника_id:
+            rows = self.db.conn.execute(
+                "SELECT DISTINCT инцидент_id FROM ИнцидентыТехники "
+                "WHERE техника_id = ? OR (техника_id >= ? AND техника_id < ?)",
+                (техника_id, техника_id + ".", техника_id + "/")
+            )
+        else:
+            rows = self.db.conn.execute(
+                "SELECT инцидент_id FROM ИнцидентыТехники WHERE техника_id = ?", (техника_id,)
+            )
+        return [row[0] for row in rows]
+
+    def technique_counts(self, limit: int = 20):
+        """Самые частые техники: (техника_id, название, инцидентов) — из сводки"""
+        return self.db.conn.execute(
+            "SELECT с.техника_id, т.название, с.инцидентов FROM АтакаТехникиСводка с "
+            "LEFT JOIN АтакаТехники т ON т.техника_id = с.техника_id "
+            "ORDER BY с.инцидентов DESC, с.техника_id LIMIT ?",
+            (limit,)
+        ).fetchall()
+
+    def suggested_mitigations(self, инцидент_id, limit: int = 10):
+        """Меры для техник инцидента: (мера_id, название, сколько его техник закрывает) — из сводки"""
+        return self.db.conn.execute(
+            "SELECT ми.мера_id, м.название, ми.техник FROM АтакаМерыИнцидентов ми "
+            "JOIN АтакаМеры м ON м.мера_id = ми.мера_id "
+            "WHERE ми.инцидент_id = ? ORDER BY ми.техник DESC, ми.мера_id LIMIT ?",
+            (инцидент_id, limit)
+        ).fetchall()
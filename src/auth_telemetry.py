@@ -0,0 +1,278 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import calendar
+import getpass
+import hashlib
+import logging
+import socket
+import threading
+import time
+from array import array
+
+# Телеметрия входа. Каждая попытка учитывается в скользящих окнах по
+# пользователю и по узлу (ОС-пользователь@хост). Счётчики — count-min
+# sketch из кольца корзин: память фиксирована и не растёт от перебора
+# случайных логинов, проверка перед входом — несколько обращений к массиву
+# без запросов к БД. Оценка сверху: из-за коллизий счётчик может
+# завысить число попыток, но не занизить; консервативное обновление
+# (растут только минимальные ячейки) держит завышение малым, чтобы перебор
+# случайных логинов не блокировал настоящих пользователей.
+#
+# Блокируется только пользователь. Узел у настольного приложения один на
+# всех входящих, поэтому его счётчик лишь отмечает подозрительную
+# активность: блокировка по узлу закрыла бы вход и настоящим пользователям.
+#
+# В журнал (ИсторияИзменений) пишутся неудачные входы, начало блокировки
+# и отметка узла; при старте окна восстанавливаются по журналу одним запросом.
+WINDOW = 300               # секунд
+BUCKETS = 10               # корзин в окне
+SKETCH_WIDTH = 8192        # ~1.3 МБ на пользовательский счётчик
+SKETCH_DEPTH = 4
+HOST_SKETCH_WIDTH = 256    # узлов у настольного приложения немного
+HOT_SPOTS = 20             # ключей в списке «горячих точек» на каждое измерение
+
+USER_LIMIT = 5             # неудач на пользователя за окно до блокировки
+HOST_LIMIT = 20            # неудач с узла за окно до отметки (без блокировки)
+
+KIND_USER = "пользователь"
+KIND_HOST = "узел"
+
+FAILED_ACTION = "Неудачный вход"
+BLOCKED_ACTION = "Блокировка входа"
+SUSPICIOUS_ACTION = "Подозрительные попытки входа"
+
+
+def local_host() -> str:
+    """Источник попытки для настольного приложения: ОС-пользователь@хост"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "?"
+    return f"{user}@{socket.gethostname()}"
+
+
+class WindowedSketch:
+    """
+    Count-min sketch со скользящим окном: BUCKETS корзин по WINDOW/BUCKETS
+    секунд, в каждой — матрица depth x width (плоский array). Устаревшая
+    корзина обнуляется при первом обращении к ней. Операция затрагивает
+    depth ячеек, поэтому обходится без NumPy — модуль нужен уже окну входа.
+    """
+
+    def __init__(self, window: float = WINDOW, buckets: int = BUCKETS,
+                 width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.window = window
+        self.bucket_seconds = window / buckets
+        self.width = width
+        self.depth = depth
+        self.counts = [self._empty() for _ in range(buckets)]
+        self.epochs = [-1] * buckets     # номер интервала в корзине
+
+    def _empty(self):
+        return array("i", bytes(4 * self.depth * self.width))
+
+    def _cells(self, key: str):
+        """Индексы ячеек ключа в плоской матрице: по одной в каждой строке"""
+        # Два 64-битных хэша дают depth столбцов (h1 + i * h2)
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def _epoch(self, now: float) -> int:
+        return int(now // self.bucket_seconds)
+
+    def add(self, key: str, now: float, amount: int = 1):
+        epoch = self._epoch(now)
+        slot = epoch % len(self.epochs)
+        if self.epochs[slot] != epoch:
+            if self.epochs[slot] > epoch:
+                return                                       # событие старше окна
+            self.counts[slot] = self._empty()
+            self.epochs[slot] = epoch
+        counts = self.counts[slot]
+        cells = self._cells(key)
+        # Консервативное обновление: ячейки поднимаются только до минимума + amount
+        target = min(counts[cell] for cell in cells) + amount
+        for cell in cells:
+            if counts[cell] < target:
+                counts[cell] = target
+
+    def buckets(self, key: str, now: float):
+        """Оценки по корзинам окна от старой к новой (устаревшие — 0)"""
+        epoch = self._epoch(now)
+        size = len(self.epochs)
+        cells = self._cells(key)
+        result = []
+        for expected in range(epoch - size + 1, epoch + 1):
+            slot = expected % size
+            if self.epochs[slot] != expected:
+                result.append(0)
+                continue
+            counts = self.counts[slot]
+            result.append(min(counts[cell] for cell in cells))
+        return result
+
+    def estimate(self, key: str, now: float) -> int:
+        return sum(self.buckets(key, now))
+
+    def retry_after(self, key: str, now: float, limit: int) -> float:
+        """Через сколько секунд оценка опустится ниже limit (0 — уже ниже)"""
+        buckets = self.buckets(key, now)
+        total = sum(buckets)
+        if total < limit:
+            return 0.0
+        epoch = self._epoch(now)
+        for age, count in enumerate(buckets):
+            total -= count
+            if total < limit:
+                # Корзина age (от старой) выходит из окна вместе с интервалом epoch + 1 + age
+                return max(0.0, (epoch + 1 + age) * self.bucket_seconds - now)
+        return self.window
+
+
+class HotSpots:
+    """Ограниченный список ключей с наибольшими оценками (вытесняется минимальный)"""
+
+    def __init__(self, capacity: int = HOT_SPOTS):
+        self.capacity = capacity
+        self.keys = {}        # ключ -> последняя оценка
+
+    def offer(self, key: str, estimate: int):
+        if key in self.keys or len(self.keys) < self.capacity:
+            self.keys[key] = estimate
+            return
+        weakest = min(self.keys, key=self.keys.get)
+        if self.keys[weakest] < estimate:
+            del self.keys[weakest]
+            self.keys[key] = estimate
+
+
+class AuthTelemetry:
+    """
+    Учёт попыток входа SecureDB. check() перед проверкой пароля возвращает,
+    сколько секунд ещё действует блокировка пользователя; record() учитывает
+    результат.
+    """
+
+    def __init__(self, db, window: float = WINDOW, user_limit: int = USER_LIMIT, host_limit: int = HOST_LIMIT):
+        self.db = db
+        self.user_limit = user_limit
+        self.host_limit = host_limit
+        self.limits = {KIND_USER: user_limit, KIND_HOST: host_limit}
+        self._lock = threading.Lock()
+        self._failures = {KIND_USER: WindowedSketch(window),
+                          KIND_HOST: WindowedSketch(window, width=HOST_SKETCH_WIDTH)}
+        self._attempts = WindowedSketch(window, width=HOST_SKETCH_WIDTH)   # все попытки по узлу
+        self._hot = {KIND_USER: HotSpots(), KIND_HOST: HotSpots()}
+        self._seeded = False
+        self.total = 0
+        self.failed = 0
+        self.blocked = 0
+
+    @staticmethod
+    def _user_key(username: str) -> str:
+        return username.strip().lower()
+
+    def _keys(self, username, host):
+        return ((KIND_USER, self._user_key(username)), (KIND_HOST, host))
+
+    def _seed(self):
+        """Восстанавливает окна по журналу после запуска (один запрос по индексу дат)"""
+        self._seeded = True
+        window = self._failures[KIND_USER].window
+        rows = self.db.conn.execute(
+            "SELECT username, новое_значение, дата_изменения FROM ИсторияИзменений "
+            "WHERE дата_изменения >= datetime('now', ?) AND таблица = 'Система' AND действие = ? "
+            "ORDER BY дата_изменения",
+            (f"-{int(window)} seconds", FAILED_ACTION)
+        ).fetchall()
+        for username, host, moment in rows:
+            try:
+                moment = calendar.timegm(time.strptime(moment[:19], "%Y-%m-%d %H:%M:%S"))
+            except (TypeError, ValueError):
+                continue
+            self._count_failure(username or "", host or "", moment)
+        if rows:
+            logging.info(f"Телеметрия входа: восстановлено неудачных попыток {len(rows)}")
+
+    def _count_failure(self, username, host, now):
+        """Учитывает неудачу; возвращает [(измерение, ключ)], дошедшие до предела"""
+        crossed = []
+        for kind, key in self._keys(username, host):
+            sketch = self._failures[kind]
+            before = sketch.estimate(key, now)
+            sketch.add(key, now)
+            after = sketch.estimate(key, now)
+            self._hot[kind].offer(key, after)
+            if before < self.limits[kind] <= after:
+                crossed.append((kind, key))
+        return crossed
+
+    def check(self, username: str, now: float = None) -> float:
+        """Секунд до конца блокировки пользователя; 0 — вход разрешён"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self._seeded:
+                self._seed()
+            return self._failures[KIND_USER].retry_after(self._user_key(username), now, self.user_limit)
+
+    def record(self, username: str, success: bool, host: str = None, now: float = None):
+        """
+        Учитывает попытку и пишет неудачу в журнал. Возвращает True, если
+        неудача довела пользователя до блокировки или узел до отметки.
+        """
+        host = host or local_host()
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self._seeded:
+                self._seed()
+            self.total += 1
+            self._attempts.add(host, now)
+            if success:
+                return False
+            self.failed += 1
+            flagged = self._count_failure(username, host, now)
+
+        entries = [(username, "Система", FAILED_ACTION, "Источник", None, host, None)]
+        for kind, key in flagged:
+            logging.warning(f"Подозрительные попытки входа ({kind} {key}): "
+                            f"{self.limits[kind]} неудач за {int(self._failures[kind].window)} с")
+            action = BLOCKED_ACTION if kind == KIND_USER else SUSPICIOUS_ACTION
+            entries.append((username, "Система", action, kind, None, key, None))
+        self.db.log_changes(entries)
+        return bool(flagged)
+
+    def record_blocked(self, username: str, host: str = None, now: float = None):
+        """Попытка отклонена без проверки пароля: только счётчики, без журнала"""
+        host = host or local_host()
+        now = time.time() if now is None else now
+        with self._lock:
+            self.total += 1
+            self.blocked += 1
+            self._attempts.add(host, now)
+
+    def hot_spots(self, now: float = None):
+        """
+        Текущие «горячие точки»: [(измерение, ключ, неудач за окно, всего попыток
+        узла за окно или None, секунд блокировки пользователя, предел достигнут)],
+        по убыванию неудач
+        """
+        now = time.time() if now is None else now
+        result = []
+        with self._lock:
+            for kind, hot in self._hot.items():
+                sketch = self._failures[kind]
+                for key in list(hot.keys):
+                    failures = sketch.estimate(key, now)
+                    hot.keys[key] = failures
+                    if not failures:
+                        del hot.keys[key]
+                        continue
+                    if kind == KIND_HOST:
+                        attempts, wait = self._attempts.estimate(key, now), 0.0
+                    else:
+                        attempts, wait = None, sketch.retry_after(key, now, self.user_limit)
+                    result.append((kind, key, failures, attempts, wait, failures >= self.limits[kind]))
+        result.sort(key=lambda row: (-row[2], row[0], row[1]))
+        return result
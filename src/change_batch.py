@@ -0,0 +1,56 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import threading
+
+
+class ChangeBatcher:
+    """
+    Собирает ID строк, изменённых в таблицах (SecureDB.subscribe), и отдаёт
+    их пачкой после завершения записи.
+
+    Обработчик триггера не может обращаться к БД, поэтому здесь ID только
+    запоминаются, а on_flush(ids) вызывается через after_idle() — когда
+    запись уже завершена. Изменения из фоновых потоков так не планируются
+    (tkinter не потокобезопасен); владелец забирает их сам через take().
+    Без root (и on_flush) изменения только копятся до вызова take().
+    """
+
+    def __init__(self, db, root, tables, on_flush=None):
+        self.db = db
+        self.root = root
+        self.tables = tuple(tables)
+        self.on_flush = on_flush
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._job = None
+        self._stopped = False
+        for table in self.tables:
+            db.subscribe(table, self._on_change)
+
+    def _on_change(self, table, operation, row_id):
+        with self._lock:
+            self._dirty.add(row_id)
+        if (self.root is not None and threading.current_thread() is threading.main_thread()
+                and self._job is None and not self._stopped):
+            self._job = self.root.after_idle(self.flush)
+
+    def take(self) -> set:
+        """Забирает накопленные ID"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def flush(self):
+        self._job = None
+        dirty = self.take()
+        if dirty:
+            self.on_flush(dirty)
+
+    def stop(self):
+        self._stopped = True
+        for table in self.tables:
+            self.db.unsubscribe(table, self._on_change)
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
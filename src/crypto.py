@@ -25,6 +25,24 @@ class CryptoManager:
         decrypted = self.cipher.decrypt(encrypted_data.encode())
         return decrypted.decode()
 
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """Шифрование двоичных данных (токен Fernet)"""
+        return self.cipher.encrypt(data)
+
+    def decrypt_bytes(self, token: bytes) -> bytes:
+        """Расшифровка двоичных данных"""
+        return self.cipher.decrypt(token)
+
+    def content_hasher(self, purpose: bytes = b"evidence"):
+        """
+        Потоковый HMAC-SHA256 для адресации содержимого.
+        Ключ выводится из ключа паролей и назначения, поэтому хэш
+        не совпадает с хэшами паролей и не раскрывает содержимое.
+        """
+        h = hmac.HMAC(self.hmac_key, hashes.SHA256())
+        h.update(purpose)
+        return hmac.HMAC(h.finalize(), hashes.SHA256())
+
     def hash_password(self, password: str) -> str:
         """
         Хэширует пароль с помощью HMAC + SHA256.
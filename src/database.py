@@ -5,36 +5,169 @@ import logging
 import os
 import sqlite3
 import datetime
+import threading
 from pathlib import Path
 import shutil
 
+from src.assignment import AssignmentEngine
+from src.attack import AttackKB, ensure_attack
+from src.auth_telemetry import AuthTelemetry
+from src.change_batch import ChangeBatcher
 from src.crypto import CryptoManager
+from src.evidence import EvidenceStore, ensure_evidence
+from src.ioc import IOCStore, ensure_ioc
+from src.incident_cache import IncidentBundleCache
+from src.profiler import profiler
+from src.reference_cache import ReferenceCache
+from src.reports import ReportService, ensure_reports
+from src.response_metrics import ensure_response_metrics, read_response_metrics
+from src.similarity import SimilarityIndex, ensure_similarity
+from src.statistics import ensure_statistics, read_statistics
 
 
 class SecureDB:
     backups_dir = Path("backups")
 
-    def __init__(self, encrypted_path: str):
+    # Таблицы, о записи в которые временные триггеры сообщают подписчикам
+    # (subscribe): имя таблицы -> столбец, значение которого передаётся как id
+    TRACKED_TABLES = {
+        "СтатусыИнцидентов": "статус_инцидента_id",
+        "Организации": "организация_id",
+        "Ответственные": "ответственный_id",
+        "МерыРеагирования": "мера_реагирования_id",
+        "Инциденты": "инцидент_id",
+        "ПаспортаИнцидентов": "инцидент_id",
+        "Инцидент_Меры": "инцидент_id",
+        "ИсторияИзменений": "объект_id",
+        "Индикаторы": "инцидент_id",
+        "ИнцидентыТехники": "инцидент_id",
+    }
+
+    # Записи, привязанные к инциденту, удаляемые вместе с ним (параметр — инцидент_id).
+    # Фрагменты улик остаются на диске до EvidenceStore.collect_garbage()
+    _INCIDENT_LINKS_DELETE = (
+        "DELETE FROM Инцидент_Меры WHERE инцидент_id = ?",
+        "DELETE FROM УликиФрагменты WHERE улика_id IN (SELECT улика_id FROM Улики WHERE инцидент_id = ?)",
+        "DELETE FROM Улики WHERE инцидент_id = ?",
+        "DELETE FROM ИндикаторыАдреса WHERE индикатор_id IN (SELECT индикатор_id FROM Индикаторы WHERE инцидент_id = ?)",
+        "DELETE FROM ИндикаторыХэши WHERE индикатор_id IN (SELECT индикатор_id FROM Индикаторы WHERE инцидент_id = ?)",
+        "DELETE FROM ИндикаторыДомены WHERE индикатор_id IN (SELECT индикатор_id FROM Индикаторы WHERE инцидент_id = ?)",
+        "DELETE FROM Индикаторы WHERE инцидент_id = ?",
+        "DELETE FROM ИнцидентыТехники WHERE инцидент_id = ?",
+        "DELETE FROM ИнцидентыСигнатуры WHERE инцидент_id = ?",
+        "DELETE FROM СвязанныеИнциденты WHERE инцидент_id = ?",
+        "DELETE FROM СвязанныеИнциденты WHERE связанный_id = ?",
+    )
+
+    def __init__(self, encrypted_path: str, load_async: bool = False):
+        """
+        Args:
+            encrypted_path: Путь к зашифрованному файлу БД
+            load_async: Расшифровывать и загружать БД в фоновом потоке.
+                До установки события ready к соединению обращаться нельзя.
+        """
         self.encrypted_path = Path(encrypted_path)
         self.crypto = CryptoManager()
-        self.conn = sqlite3.connect(":memory:")
+        # Соединение создаётся здесь, а заполняется, возможно, в фоновом потоке
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
         self.conn.execute("PRAGMA foreign_keys = ON;")
 
-        if self.encrypted_path.exists():
-            self._load_encrypted_into_memory()
+        self.ready = threading.Event()
+        # Исключение загрузки: с ним БД нельзя ни сохранять, ни бэкапить —
+        # иначе пустая БД в памяти перезапишет настоящий файл
+        self.load_error = None
+        self._backup_threads = []
+
+        self._listeners = {}
+        self.refs = ReferenceCache(self)
+        self.incident_cache = IncidentBundleCache(self)
+        self.assignment = AssignmentEngine(self)
+        self.evidence = EvidenceStore(self)
+        self.iocs = IOCStore(self)
+        self.attack = AttackKB(self)
+        self.similar = SimilarityIndex(self)
+        # Службы на NumPy создаются при первом обращении: импорт NumPy
+        # не должен задерживать появление окна входа
+        self._recommender = None
+        self._analytics = None
+        # Ряд по неделям для панели статистики пересчитывается, только когда
+        # менялись инциденты или паспорта (или начался новый день)
+        self._series_changes = ChangeBatcher(self, None, ("Инциденты", "ПаспортаИнцидентов"))
+        self._series_cache = {}
+        self.reports = ReportService(self)
+        self.auth = AuthTelemetry(self)
+
+        if load_async:
+            threading.Thread(target=self._load, name="db-loader", daemon=True).start()
         else:
-            logging.warning("Зашифрованная БД не найдена. Будет создана новая.")
-            self._init_schema()
-            self._init_db()
+            self._load()
+
+    def _load(self):
+        """Загружает существующую БД или создаёт новую"""
+        try:
+            with profiler.phase("Загрузка БД (всего)"):
+                if self.encrypted_path.exists():
+                    self._load_encrypted_into_memory()
+                else:
+                    logging.warning("Зашифрованная БД не найдена. Будет создана новая.")
+                    self._init_schema()
+                    self._init_db()
+                self._migrate_schema()
+                self._install_change_hooks()
+        except Exception as e:
+            self.load_error = e
+            logging.error(f"Не удалось загрузить БД: {e}")
+            raise
+        finally:
+            self.ready.set()
+
+    @property
+    def recommender(self):
+        """Рекомендации мер реагирования (src.recommender)"""
+        if self._recommender is None:
+            from src.recommender import MeasureRecommender
+            self._recommender = MeasureRecommender(self)
+        return self._recommender
+
+    @property
+    def analytics(self):
+        """Колоночный снимок для аналитики (src.analytics)"""
+        if self._analytics is None:
+            from src.analytics import AnalyticsSnapshot
+            self._analytics = AnalyticsSnapshot(self)
+        return self._analytics
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """Ожидает окончания фоновой загрузки БД"""
+        return self.ready.wait(timeout)
 
     def _start_auto_backup(self, root):
-        self._create_backup("auto")
-        root.after(300000, lambda: self._start_auto_backup(root))
+        """Периодический бэкап; первый — через 5 минут, т.к. при старте уже сделан startup-бэкап"""
+        def tick():
+            if self.load_error is not None:
+                return
+            self._create_backup_async("auto")
+            root.after(300000, tick)
+        root.after(300000, tick)
+
+    def _create_backup_async(self, prefix: str):
+        """Копирует зашифрованный файл в бэкап в фоновом потоке"""
+        self._backup_threads = [t for t in self._backup_threads if t.is_alive()]
+        thread = threading.Thread(
+            target=self._create_backup, args=(prefix,), name=f"backup-{prefix}", daemon=True
+        )
+        self._backup_threads.append(thread)
+        thread.start()
+
+    def _join_backups(self):
+        """Дожидается фоновых бэкапов, чтобы не перезаписать файл во время копирования"""
+        for thread in self._backup_threads:
+            thread.join()
+        self._backup_threads = []
 
     def _create_backup(self, prefix: str):
         """Создаёт зашифрованный бэкап с датой в папку backups"""
-        if not self.backups_dir.exists():
-            self.backups_dir.mkdir(parents=True)
+        self.backups_dir.mkdir(parents=True, exist_ok=True)
 
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         backup_filename = f"{prefix}_backup_{timestamp}.db.enc"
@@ -42,7 +175,8 @@ class SecureDB:
 
         # Просто копируем текущий зашифрованный файл в бэкап
         if self.encrypted_path.exists():
-            shutil.copy2(self.encrypted_path, backup_path)
+            with profiler.phase(f"Бэкап БД ({prefix})"):
+                shutil.copy2(self.encrypted_path, backup_path)
             logging.info(f"Создан бэкап БД: {backup_path}")
         else:
             logging.warning("Файл зашифрованной БД не найден для бэкапа")
@@ -50,22 +184,25 @@ class SecureDB:
     def _load_encrypted_into_memory(self):
         logging.info("Загружаю зашифрованную БД в память")
 
-        # Перед загрузкой БД создаём бэкап
-        self._create_backup("startup")
+        # Перед загрузкой БД создаём бэкап (параллельно с расшифровкой)
+        self._create_backup_async("startup")
 
-        decrypted_data = self.crypto.cipher.decrypt(self.encrypted_path.read_bytes())
+        with profiler.phase("Расшифровка БД"):
+            decrypted_data = self.crypto.cipher.decrypt(self.encrypted_path.read_bytes())
         
         # Временный файл для расшифрованной БД
         temp_path = self.encrypted_path.with_suffix('.tmp.db')
         try:
-            with open(temp_path, "wb") as f:
-                f.write(decrypted_data)
-            temp_conn = sqlite3.connect(temp_path)
-            temp_conn.backup(self.conn)
-            temp_conn.close()
+            with profiler.phase("Загрузка БД в память"):
+                with open(temp_path, "wb") as f:
+                    f.write(decrypted_data)
+                temp_conn = sqlite3.connect(temp_path)
+                temp_conn.backup(self.conn)
+                temp_conn.close()
             logging.info("БД успешно загружена в память")
         except Exception as e:
             logging.error(f"Ошибка при расшифровке и загрузке БД: {e}")
+            raise
         finally:
             if temp_path.exists():
                 os.remove(temp_path)
@@ -95,6 +232,13 @@ class SecureDB:
                 os.remove(temp_path)
 
     def close(self):
+        # Нельзя шифровать пустую БД поверх файла, пока идёт загрузка
+        self.wait_ready()
+        self._join_backups()
+        if self.load_error is not None:
+            logging.error("БД не была загружена: файл не перезаписывается, бэкап не создаётся")
+            self.conn.close()
+            return
         if self.conn:
             try:
                 self.conn.commit()
@@ -223,6 +367,75 @@ class SecureDB:
         # Заполняем справочники начальными данными
         self._seed_initial_data()
 
+    def _migrate_schema(self):
+        """Дополняет схему индексами и таблицами, появившимися после создания БД"""
+        try:
+            with self.conn:
+                # ID записи, к которой относится изменение (для истории инцидента)
+                if not self._has_column("ИсторияИзменений", "объект_id"):
+                    self.conn.execute("ALTER TABLE ИсторияИзменений ADD COLUMN объект_id INTEGER")
+                self.conn.executescript("""
+                    CREATE INDEX IF NOT EXISTS idx_история_таблица ON ИсторияИзменений(таблица);
+                    CREATE INDEX IF NOT EXISTS idx_история_пользователь ON ИсторияИзменений(username);
+                    CREATE INDEX IF NOT EXISTS idx_история_объект ON ИсторияИзменений(объект_id, таблица);
+                    -- Проверка внешнего ключа при удалении организации
+                    CREATE INDEX IF NOT EXISTS idx_ответственные_организация ON Ответственные(организация_id);
+                """)
+            with self.conn:
+                ensure_statistics(self.conn)
+            with self.conn:
+                ensure_response_metrics(self.conn)
+            with self.conn:
+                ensure_evidence(self.conn)
+            with self.conn:
+                ensure_ioc(self.conn)
+            with self.conn:
+                ensure_attack(self.conn)
+            with self.conn:
+                ensure_similarity(self.conn)
+            with self.conn:
+                ensure_reports(self.conn)
+        except sqlite3.Error as e:
+            logging.error(f"Ошибка обновления схемы БД: {e}")
+
+    def _has_column(self, table: str, column: str) -> bool:
+        return any(row[1] == column for row in self.conn.execute(f"PRAGMA table_info({table})"))
+
+    # --- Уведомления об изменениях таблиц ---
+    def subscribe(self, table: str, callback):
+        """
+        Подписывает callback(таблица, операция, id_строки) на запись в таблицу.
+        Вызывается из триггера во время выполнения запроса, поэтому
+        обработчик не должен обращаться к БД — только отметить изменение.
+        """
+        self._listeners.setdefault(table, []).append(callback)
+
+    def unsubscribe(self, table: str, callback):
+        listeners = self._listeners.get(table, [])
+        if callback in listeners:
+            listeners.remove(callback)
+
+    def _install_change_hooks(self):
+        """Создаёт временные триггеры (не попадают в зашифрованный файл)"""
+        self.conn.create_function("_table_changed", 3, self._on_table_changed)
+        for table, pk in self.TRACKED_TABLES.items():
+            for operation, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                self.conn.execute(f"""
+                    CREATE TEMP TRIGGER IF NOT EXISTS _изм_{table}_{operation}
+                    AFTER {operation} ON main.{table}
+                    BEGIN
+                        SELECT _table_changed('{table}', '{operation}', {row}.{pk});
+                    END
+                """)
+
+    def _on_table_changed(self, table, operation, row_id):
+        for callback in self._listeners.get(table, ()):
+            try:
+                callback(table, operation, row_id)
+            except Exception as e:
+                # Исключение здесь сорвало бы саму запись в БД
+                logging.error(f"Ошибка обработчика изменений {table}: {e}")
+
     def add_user(self, username: str, password: str, role: str = 'user'):
         """Добавляет пользователя с хэшированным паролем"""
         password_hash = self.crypto.hash_password(password)
@@ -296,12 +509,22 @@ class SecureDB:
         )
         return cursor.fetchone()
 
-    def add_incident(self, название, дата_обнаружения=None, статус_id=None, организация_id=None, ответственный_id=None):
+    def add_incident(self, название, дата_обнаружения=None, статус_id=None, организация_id=None, ответственный_id=None,
+                     auto_assign: bool = False):
+        """
+        Добавляет инцидент и возвращает его ID. Без даты обнаружения берётся
+        текущее время (UTC, как у журнала). При auto_assign и пустом
+        ответственном назначается наименее загруженный ответственный организации.
+        """
+        if auto_assign and ответственный_id is None:
+            ответственный_id = self.assignment.pick(организация_id)
         with self.conn:
-            self.conn.execute(
-                "INSERT INTO Инциденты (название, дата_обнаружения, статус_инцидента_id, организация_id, ответственный_id) VALUES (?, ?, ?, ?, ?)",
+            cursor = self.conn.execute(
+                "INSERT INTO Инциденты (название, дата_обнаружения, статус_инцидента_id, организация_id, ответственный_id) "
+                "VALUES (?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?)",
                 (название, дата_обнаружения, статус_id, организация_id, ответственный_id)
             )
+        return cursor.lastrowid
 
     def get_incidents(self):
         cursor = self.conn.execute(
@@ -309,6 +532,28 @@ class SecureDB:
         )
         return cursor.fetchall()
 
+    def add_detected_incidents(self, rows, username):
+        """
+        Создаёт инциденты пачкой в одной транзакции (импорт событий).
+        rows — кортежи (название, дата_обнаружения, статус_id, организация_id, источник);
+        источник (правило и исходная строка) пишется в журнал изменений.
+        Возвращает ID созданных инцидентов.
+        """
+        ids = []
+        audit = []
+        with self.conn:
+            for название, дата, статус_id, организация_id, источник in rows:
+                cursor = self.conn.execute(
+                    "INSERT INTO Инциденты (название, дата_обнаружения, статус_инцидента_id, организация_id) "
+                    "VALUES (?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?)",
+                    (название, дата, статус_id, организация_id)
+                )
+                ids.append(cursor.lastrowid)
+                audit.append((username, "Инциденты", "Обнаружение", "источник", None, источник, cursor.lastrowid))
+            self._insert_audit(audit)
+        logging.info(f"Создано инцидентов по событиям: {len(ids)}")
+        return ids
+
     def update_incident_status(self, инцидент_id, новый_статус_id):
         with self.conn:
             self.conn.execute(
@@ -318,7 +563,9 @@ class SecureDB:
 
     def delete_incident(self, инцидент_id):
         with self.conn:
-            # Сначала удалить связанные записи из ПаспортаИнцидентов
+            # Сначала удалить связанные записи: меры, улики, индикаторы, связи и паспорт
+            for query in self._INCIDENT_LINKS_DELETE:
+                self.conn.execute(query, (инцидент_id,))
             self.conn.execute(
                 "DELETE FROM ПаспортаИнцидентов WHERE инцидент_id = ?",
                 (инцидент_id,)
@@ -339,22 +586,22 @@ class SecureDB:
         row = cursor.fetchone()
         return dict(zip(columns, row)) if row else None
 
+    # Соответствие между именами параметров и столбцами БД
+    _INCIDENT_COLUMNS = {
+        'статус_id': 'статус_инцидента_id',
+        'название': 'название',
+        'организация_id': 'организация_id',
+        'ответственный_id': 'ответственный_id'
+    }
+
+    def _incident_columns(self, fields):
+        """Преобразует имена полей к реальным именам столбцов"""
+        return {self._INCIDENT_COLUMNS.get(key, key): value for key, value in fields.items()}
+
     def update_incident(self, id, **fields):
         """Обновляет указанные поля инцидента с правильными именами столбцов"""
-        # Соответствие между именами параметров и столбцами БД
-        column_mapping = {
-            'статус_id': 'статус_инцидента_id',
-            'название': 'название',
-            'организация_id': 'организация_id',
-            'ответственный_id': 'ответственный_id'
-        }
-        
-        # Преобразуем имена полей к реальным именам столбцов
-        db_fields = {}
-        for key, value in fields.items():
-            db_key = column_mapping.get(key, key)
-            db_fields[db_key] = value
-        
+        db_fields = self._incident_columns(fields)
+
         with self.conn:
             set_clause = ", ".join(f"{k} = ?" for k in db_fields)
             values = list(db_fields.values())
@@ -365,12 +612,139 @@ class SecureDB:
                 values
             )
 
+    # --- Массовые операции над инцидентами ---
+    # Каждая операция — одна транзакция: изменения и записи журнала
+    # применяются вместе или не применяются вовсе
+    BULK_CHUNK = 500  # ID в одном IN (...): ниже лимита параметров SQLite
+
+    def _fetch_incidents(self, ids):
+        """Текущие строки инцидентов {id: словарь} для списка ID"""
+        ids = sorted(ids)
+        rows = {}
+        for start in range(0, len(ids), self.BULK_CHUNK):
+            chunk = ids[start:start + self.BULK_CHUNK]
+            cursor = self.conn.execute(
+                f"SELECT * FROM Инциденты WHERE инцидент_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            columns = [col[0] for col in cursor.description]
+            for row in cursor:
+                rows[row[0]] = dict(zip(columns, row))
+        return rows
+
+    def bulk_update_incidents(self, ids, username, **fields):
+        """
+        Меняет поля (как в update_incident) у группы инцидентов.
+        Инциденты, у которых значения уже совпадают, не трогаются.
+        Возвращает число изменённых инцидентов.
+        """
+        db_fields = self._incident_columns(fields)
+        changed = [
+            row for row in self._fetch_incidents(ids).values()
+            if any(row.get(column) != value for column, value in db_fields.items())
+        ]
+        if not changed:
+            return 0
+
+        set_clause = ", ".join(f"{k} = ?" for k in db_fields)
+        params = [(*db_fields.values(), row['инцидент_id']) for row in changed]
+        audit = [
+            (username, "Инциденты", "Массовое редактирование",
+             "; ".join(f"{column}: {row.get(column)} → {value}"
+                       for column, value in db_fields.items() if row.get(column) != value),
+             str(row), str({**row, **db_fields}), row['инцидент_id'])
+            for row in changed
+        ]
+        with self.conn:
+            self.conn.executemany(f"UPDATE Инциденты SET {set_clause} WHERE инцидент_id = ?", params)
+            self._insert_audit(audit)
+        logging.info(f"Массовое редактирование инцидентов: {len(changed)}")
+        return len(changed)
+
+    def bulk_delete_incidents(self, ids, username):
+        """Удаляет группу инцидентов вместе с паспортами, уликами, индикаторами и связями с мерами"""
+        old_rows = self._fetch_incidents(ids)
+        if not old_rows:
+            return 0
+
+        params = [(incident_id,) for incident_id in old_rows]
+        audit = [
+            (username, "Инциденты", "Массовое удаление", None, str(row), None, incident_id)
+            for incident_id, row in old_rows.items()
+        ]
+        with self.conn:
+            for query in self._INCIDENT_LINKS_DELETE:
+                self.conn.executemany(query, params)
+            self.conn.executemany("DELETE FROM ПаспортаИнцидентов WHERE инцидент_id = ?", params)
+            self.conn.executemany("DELETE FROM Инциденты WHERE инцидент_id = ?", params)
+            self._insert_audit(audit)
+        logging.info(f"Массовое удаление инцидентов: {len(params)}")
+        return len(params)
+
+    def merge_incidents(self, source_id, target_id, username):
+        """
+        Объединяет дубликат source_id с инцидентом target_id: меры, улики,
+        индикаторы, техники ATT&CK и связи переносятся, паспорт — если у
+        target_id его нет; затем source_id удаляется.
+        """
+        if source_id == target_id:
+            raise ValueError("Нельзя объединить инцидент с самим собой")
+        old_rows = self._fetch_incidents([source_id, target_id])
+        if len(old_rows) != 2:
+            raise ValueError("Инцидент не найден")
+
+        ids = (target_id, source_id)
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO Инцидент_Меры (инцидент_id, мера_реагирования_id) "
+                              "SELECT ?, мера_реагирования_id FROM Инцидент_Меры WHERE инцидент_id = ?", ids)
+            self.conn.execute("UPDATE Улики SET инцидент_id = ? WHERE инцидент_id = ?", ids)
+            self.conn.execute("UPDATE Индикаторы SET инцидент_id = ? WHERE инцидент_id = ?", ids)
+            self.conn.execute("INSERT OR IGNORE INTO ИнцидентыТехники (инцидент_id, техника_id) "
+                              "SELECT ?, техника_id FROM ИнцидентыТехники WHERE инцидент_id = ?", ids)
+            self.conn.execute("UPDATE OR IGNORE ПаспортаИнцидентов SET инцидент_id = ? WHERE инцидент_id = ?", ids)
+            self.conn.execute("""
+                INSERT OR IGNORE INTO СвязанныеИнциденты (инцидент_id, связанный_id, сходство, username)
+                SELECT MIN(?1, другой), MAX(?1, другой), сходство, ?3 FROM (
+                    SELECT связанный_id AS другой, сходство FROM СвязанныеИнциденты WHERE инцидент_id = ?2
+                    UNION ALL
+                    SELECT инцидент_id, сходство FROM СвязанныеИнциденты WHERE связанный_id = ?2
+                ) WHERE другой != ?1
+            """, (target_id, source_id, username))
+
+            for query in self._INCIDENT_LINKS_DELETE:
+                self.conn.execute(query, (source_id,))
+            self.conn.execute("DELETE FROM ПаспортаИнцидентов WHERE инцидент_id = ?", (source_id,))
+            self.conn.execute("DELETE FROM Инциденты WHERE инцидент_id = ?", (source_id,))
+            self._insert_audit([
+                (username, "Инциденты", "Объединение", "инцидент_id", str(old_rows[source_id]),
+                 str(target_id), target_id),
+            ])
+        logging.info(f"Инцидент {source_id} объединён с {target_id}")
+
+    def bulk_link_measure(self, ids, мера_реагирования_id, username):
+        """Привязывает меру реагирования к группе инцидентов (уже привязанные пропускаются)"""
+        ids = sorted(ids)
+        linked = []
+        with self.conn:
+            for incident_id in ids:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO Инцидент_Меры (инцидент_id, мера_реагирования_id) VALUES (?, ?)",
+                    (incident_id, мера_реагирования_id)
+                )
+                if cursor.rowcount:
+                    linked.append(incident_id)
+            self._insert_audit([
+                (username, "Инцидент_Меры", "Массовая привязка меры", "мера_реагирования_id", None,
+                 str({'инцидент_id': incident_id, 'мера_реагирования_id': мера_реагирования_id}), incident_id)
+                for incident_id in linked
+            ])
+        logging.info(f"Мера {мера_реагирования_id} привязана к инцидентам: {len(linked)}")
+        return len(linked)
+
     # --- Методы для Организаций ---
     def get_organizations(self):
-        cursor = self.conn.execute(
-            "SELECT организация_id, название, адрес, контактный_телефон FROM Организации"
-        )
-        return cursor.fetchall()
+        """Список организаций из общего кэша справочников (не изменять)"""
+        return self.refs.organizations.rows
 
     # --- Методы для Ответственных ---
     def add_responsible(self, имя, должность=None, email=None, организация_id=None):
@@ -381,10 +755,8 @@ class SecureDB:
             )
 
     def get_responsibles(self):
-        cursor = self.conn.execute(
-            "SELECT ответственный_id, имя, должность, электронная_почта, организация_id FROM Ответственные"
-        )
-        return cursor.fetchall()
+        """Список ответственных из общего кэша справочников (не изменять)"""
+        return self.refs.responsibles.rows
     
     def get_responsible_by_id(self, ответственный_id):
         cursor = self.conn.execute(
@@ -400,12 +772,17 @@ class SecureDB:
                 (имя, должность, email, организация_id, ответственный_id)
             )
 
+    def delete_responsible(self, ответственный_id):
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM Ответственные WHERE ответственный_id = ?",
+                (ответственный_id,)
+            )
+
     # --- Методы для Статусов Инцидентов ---
     def get_statuses(self):
-        cursor = self.conn.execute(
-            "SELECT статус_инцидента_id, статус FROM СтатусыИнцидентов"
-        )
-        return cursor.fetchall()
+        """Список статусов из общего кэша справочников (не изменять)"""
+        return self.refs.statuses.rows
 
     # Добавление статуса
     def add_status(self, status: str):
@@ -508,18 +885,125 @@ class SecureDB:
         return cursor.fetchall()
 
 
+    # --- Сводные данные инцидента ---
+    BUNDLE_HISTORY_LIMIT = 50
+
+    def get_incident_bundle(self, инцидент_id):
+        """
+        Инцидент, паспорт, меры реагирования, переходы статусов и последние
+        записи журнала одним словарём (или None). Результат берётся из LRU-кэша, который
+        сбрасывается триггерами при записи в эти таблицы. Не изменять.
+        """
+        return self.incident_cache.get(инцидент_id)
+
+    def _load_incident_bundle(self, инцидент_id):
+        """Загружает данные для get_incident_bundle одним набором запросов"""
+        cursor = self.conn.execute("""
+            SELECT и.инцидент_id, и.название, и.дата_обнаружения, и.статус_инцидента_id,
+                   и.организация_id, и.ответственный_id,
+                   п.инцидент_id, п.уровень_критичности, п.источник_угрозы, п.последствия,
+                   п.тип_инцидента, п.категория_инцидента
+            FROM Инциденты и
+            LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+            WHERE и.инцидент_id = ?
+        """, (инцидент_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        columns = [col[0] for col in cursor.description[:6]]
+
+        measures = self.conn.execute("""
+            SELECT м.мера_реагирования_id, м.описание
+            FROM Инцидент_Меры им
+            JOIN МерыРеагирования м ON м.мера_реагирования_id = им.мера_реагирования_id
+            WHERE им.инцидент_id = ?
+            ORDER BY м.мера_реагирования_id
+        """, (инцидент_id,)).fetchall()
+
+        history = self.conn.execute(f"""
+            SELECT {self._AUDIT_COLUMNS}
+            FROM ИсторияИзменений
+            WHERE объект_id = ? AND таблица IN ('Инциденты', 'ПаспортаИнцидентов', 'Инцидент_Меры')
+            ORDER BY история_изменения_id DESC
+            LIMIT ?
+        """, (инцидент_id, self.BUNDLE_HISTORY_LIMIT)).fetchall()
+
+        transitions = self.get_status_transitions(инцидент_id)
+
+        return {
+            'incident': dict(zip(columns, row[:6])),
+            # Тот же порядок полей, что у get_passport
+            'passport': row[7:] if row[6] is not None else None,
+            'measures': measures,
+            'history': history,
+            'transitions': transitions,
+        }
+
+    # --- Статистика ---
+    def get_statistics(self):
+        """Сводка по инцидентам из таблиц, поддерживаемых триггерами (см. src.statistics)"""
+        return read_statistics(self.conn)
+
+    def get_incident_series(self, period: str = "неделя", last: int = 12, by: str = "критичность"):
+        """
+        Инциденты за last периодов, заканчивающихся текущим, из колоночного
+        снимка (src.analytics): [(начало периода, всего, {значение by: число})].
+        Результат кэшируется до изменения инцидентов или паспортов.
+        """
+        if self._series_changes.take():
+            self._series_cache.clear()
+        key = (period, last, by, datetime.date.today())
+        if key not in self._series_cache:
+            starts, series = self.analytics.recent_series(period, last, by=by)
+            totals = sum(series.values()) if series else [0] * len(starts)
+            self._series_cache[key] = [
+                (str(start), int(totals[i]),
+                 {value or "Не указана": int(counts[i]) for value, counts in series.items() if counts[i]})
+                for i, start in enumerate(starts)
+            ]
+        return self._series_cache[key]
+
+    # --- Время реагирования ---
+    def get_status_transitions(self, инцидент_id):
+        """История статусов инцидента: (старый_статус_id, новый_статус_id, дата_перехода)"""
+        cursor = self.conn.execute(
+            "SELECT старый_статус_id, новый_статус_id, дата_перехода FROM ПереходыСтатусов "
+            "WHERE инцидент_id = ? ORDER BY переход_id",
+            (инцидент_id,)
+        )
+        return cursor.fetchall()
+
+    def get_response_metrics(self, dimension: str = "всего"):
+        """
+        MTTA/MTTR по измерению ('всего', 'организация', 'ответственный', 'критичность'),
+        см. src.response_metrics.read_response_metrics
+        """
+        return read_response_metrics(self.conn, dimension)
+
     # --- Методы для журнала изменений ---
-    def log_change(self, username, таблица, действие, поле=None, старое_значение=None, новое_значение=None):
-        """Логирует изменения в системе"""
+    _AUDIT_COLUMNS = (
+        "история_изменения_id, username, таблица, действие, поле, "
+        "старое_значение, новое_значение, дата_изменения"
+    )
+
+    _AUDIT_INSERT = """
+        INSERT INTO ИсторияИзменений (
+            username, таблица, действие, поле,
+            старое_значение, новое_значение, объект_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _insert_audit(self, entries):
+        """Пишет записи журнала в текущую транзакцию, без commit"""
+        self.conn.executemany(self._AUDIT_INSERT, entries)
+
+    def log_change(self, username, таблица, действие, поле=None, старое_значение=None, новое_значение=None,
+                   объект_id=None):
+        """Логирует изменения в системе; объект_id — ID изменённой записи, если известен"""
         try:
             self.conn.execute(
-                """
-                INSERT INTO ИсторияИзменений (
-                    username, таблица, действие, поле, 
-                    старое_значение, новое_значение
-                ) VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (username, таблица, действие, поле, старое_значение, новое_значение)
+                self._AUDIT_INSERT,
+                (username, таблица, действие, поле, старое_значение, новое_значение, объект_id)
             )
             self.conn.commit()
             logging.info(f"Запись в журнал изменений {действие}")
@@ -527,7 +1011,22 @@ class SecureDB:
             logging.error(f"Ошибка при логировании: {e}")
             raise
 
-    def get_audit_logs(self, table_filter=None, user_filter=None, date_from=None, date_to=None):
+    def log_changes(self, entries):
+        """
+        Пакетная запись в журнал одной транзакцией.
+        entries — кортежи (username, таблица, действие, поле, старое_значение, новое_значение, объект_id)
+        """
+        entries = list(entries)
+        try:
+            with self.conn:
+                self._insert_audit(entries)
+            logging.info(f"Записей в журнал изменений: {len(entries)}")
+        except sqlite3.Error as e:
+            logging.error(f"Ошибка при логировании: {e}")
+            raise
+
+    def get_audit_logs(self, table_filter=None, user_filter=None, date_from=None, date_to=None,
+                       limit=None, before_id=None, after_id=None, preview_len=None):
         """
         Получает записи журнала изменений с возможностью фильтрации
         
@@ -536,13 +1035,25 @@ class SecureDB:
             user_filter: Фильтр по пользователю (None - все пользователи)
             date_from: Начальная дата (включительно)
             date_to: Конечная дата (включительно)
+            limit: Размер страницы (None - все записи)
+            before_id: Только записи старше этого история_изменения_id (следующая страница)
+            after_id: Только записи новее этого история_изменения_id (новые записи)
+            preview_len: Обрезать поле и значения до этой длины (полный текст — get_audit_entry)
             
         Returns:
-            Список кортежей с записями журнала
+            Список кортежей с записями журнала, от новых к старым
         """
         try:
             conditions = []
             params = []
+
+            if before_id is not None:
+                conditions.append("история_изменения_id < ?")
+                params.append(before_id)
+
+            if after_id is not None:
+                conditions.append("история_изменения_id > ?")
+                params.append(after_id)
             
             if table_filter:
                 conditions.append("таблица = ?")
@@ -560,10 +1071,27 @@ class SecureDB:
                 conditions.append("дата_изменения <= ?")
                 params.append(date_to + " 23:59:59")
             
-            query = "SELECT * FROM ИсторияИзменений"
+            if preview_len:
+                columns = ", ".join(
+                    [
+                        "история_изменения_id", "username", "таблица", "действие",
+                        *(f"CASE WHEN length({col}) > {int(preview_len)} "
+                          f"THEN substr({col}, 1, {int(preview_len)}) || '…' ELSE {col} END"
+                          for col in ("поле", "старое_значение", "новое_значение")),
+                        "дата_изменения",
+                    ]
+                )
+            else:
+                columns = self._AUDIT_COLUMNS
+
+            query = f"SELECT {columns} FROM ИсторияИзменений"
             if conditions:
                 query += " WHERE " + " AND ".join(conditions)
-            query += " ORDER BY дата_изменения DESC"
+            # id растёт вместе с датой изменения, а сортировка по PK не требует индекса
+            query += " ORDER BY история_изменения_id DESC"
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
             
             cursor = self.conn.execute(query, params)
             return cursor.fetchall()
@@ -572,6 +1100,14 @@ class SecureDB:
             logging.error(f"Ошибка получения журнала: {e}")
             raise
 
+    def get_audit_entry(self, entry_id):
+        """Возвращает одну запись журнала целиком"""
+        cursor = self.conn.execute(
+            f"SELECT {self._AUDIT_COLUMNS} FROM ИсторияИзменений WHERE история_изменения_id = ?",
+            (entry_id,)
+        )
+        return cursor.fetchone()
+
     def get_all_tables(self):
         """Возвращает все таблицы в базе данных"""
         cursor = self.conn.execute(
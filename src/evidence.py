@@ -0,0 +1,261 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import logging
+import mimetypes
+import os
+import uuid
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024   # байт открытого текста во фрагменте
+
+# Улики (файлы) хранятся вне БД: в БД только метаданные и список фрагментов.
+# Фрагмент адресуется ключевым HMAC своего содержимого, поэтому одинаковые
+# фрагменты разных файлов лежат на диске один раз.
+_TABLES = """
+    CREATE TABLE IF NOT EXISTS Улики (
+        улика_id INTEGER PRIMARY KEY,
+        инцидент_id INTEGER NOT NULL,
+        имя_файла TEXT NOT NULL,
+        размер INTEGER NOT NULL,
+        хэш TEXT NOT NULL,
+        тип TEXT,
+        дата_добавления TEXT DEFAULT CURRENT_TIMESTAMP,
+        добавил TEXT,
+        FOREIGN KEY (инцидент_id) REFERENCES Инциденты(инцидент_id)
+    );
+    CREATE TABLE IF NOT EXISTS УликиФрагменты (
+        улика_id INTEGER NOT NULL,
+        номер INTEGER NOT NULL,
+        фрагмент TEXT NOT NULL,
+        смещение INTEGER NOT NULL,
+        размер INTEGER NOT NULL,
+        PRIMARY KEY (улика_id, номер),
+        FOREIGN KEY (улика_id) REFERENCES Улики(улика_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_улики_инцидент ON Улики(инцидент_id);
+    CREATE INDEX IF NOT EXISTS idx_улики_фрагмент ON УликиФрагменты(фрагмент);
+"""
+
+
+def ensure_evidence(conn):
+    """Создаёт таблицы метаданных улик"""
+    conn.executescript(_TABLES)
+
+
+def _read_full(stream, size: int) -> bytes:
+    """Читает ровно size байт (меньше — только в конце потока)"""
+    parts = []
+    remaining = size
+    while remaining:
+        data = stream.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b"".join(parts)
+
+
+class EvidenceStore:
+    """
+    Хранилище улик (PCAP, дампы памяти, выдержки из журналов).
+
+    Файл режется на фрагменты по CHUNK_SIZE; каждый фрагмент шифруется
+    ключом БД (Fernet) и пишется в <папка БД>/evidence/<ab>/<хэш>.
+    Запись и чтение потоковые: в памяти не больше одного фрагмента.
+    Удаление улики убирает только метаданные — фрагменты могут быть нужны
+    бэкапам БД; неиспользуемые удаляет collect_garbage().
+    """
+
+    def __init__(self, db, directory=None, chunk_size: int = CHUNK_SIZE):
+        self.db = db
+        self.crypto = db.crypto
+        self.directory = Path(directory) if directory else db.encrypted_path.parent / "evidence"
+        self.chunk_size = chunk_size
+        self._last_chunk = (None, b"")   # последний расшифрованный фрагмент (для просмотра)
+
+    # --- Фрагменты ---
+    def _chunk_path(self, chunk_id: str) -> Path:
+        return self.directory / chunk_id[:2] / chunk_id
+
+    def _chunk_id(self, data: bytes) -> str:
+        h = self.crypto.content_hasher()
+        h.update(data)
+        return h.finalize().hex()
+
+    def _store_chunk(self, chunk_id: str, data: bytes) -> bool:
+        """Сохраняет фрагмент, если его ещё нет; True — если записан новый"""
+        path = self._chunk_path(chunk_id)
+        if path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{chunk_id}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(self.crypto.encrypt_bytes(data))
+            os.replace(temp_path, path)
+        finally:
+            if temp_path.exists():
+                os.remove(temp_path)
+        return True
+
+    def _load_chunk(self, chunk_id: str) -> bytes:
+        cached_id, cached = self._last_chunk
+        if cached_id == chunk_id:
+            return cached
+        with open(self._chunk_path(chunk_id), "rb") as f:
+            data = self.crypto.decrypt_bytes(f.read())
+        if self._chunk_id(data) != chunk_id:
+            raise ValueError(f"Фрагмент улики повреждён: {chunk_id}")
+        self._last_chunk = (chunk_id, data)
+        return data
+
+    # --- Загрузка ---
+    def write_chunks(self, stream) -> dict:
+        """
+        Читает поток по фрагментам и сохраняет новые фрагменты на диск.
+        К БД не обращается, поэтому может выполняться в фоновом потоке;
+        результат передаётся в register().
+        """
+        file_hash = self.crypto.content_hasher(b"evidence-file")
+        chunks = []
+        offset = 0
+        new = 0
+        while True:
+            data = _read_full(stream, self.chunk_size)
+            if not data:
+                break
+            file_hash.update(data)
+            chunk_id = self._chunk_id(data)
+            if self._store_chunk(chunk_id, data):
+                new += 1
+            chunks.append((chunk_id, offset, len(data)))
+            offset += len(data)
+        return {"размер": offset, "хэш": file_hash.finalize().hex(), "фрагменты": chunks, "новых": new}
+
+    def register(self, инцидент_id, manifest: dict, имя_файла: str, username: str, тип: str = None) -> int:
+        """Записывает метаданные улики (результат write_chunks) и возвращает её ID"""
+        with self.db.conn:
+            cursor = self.db.conn.execute(
+                "INSERT INTO Улики (инцидент_id, имя_файла, размер, хэш, тип, добавил) VALUES (?, ?, ?, ?, ?, ?)",
+                (инцидент_id, имя_файла, manifest["размер"], manifest["хэш"], тип, username)
+            )
+            evidence_id = cursor.lastrowid
+            self.db.conn.executemany(
+                "INSERT INTO УликиФрагменты (улика_id, номер, фрагмент, смещение, размер) VALUES (?, ?, ?, ?, ?)",
+                [(evidence_id, number, chunk_id, offset, size)
+                 for number, (chunk_id, offset, size) in enumerate(manifest["фрагменты"])]
+            )
+            self.db._insert_audit([
+                (username, "Улики", "Добавление", "имя_файла", None,
+                 f"{имя_файла} ({manifest['размер']} байт)", инцидент_id)
+            ])
+        logging.info(f"Улика {имя_файла} добавлена к инциденту {инцидент_id}: "
+                     f"фрагментов {len(manifest['фрагменты'])}, новых {manifest['новых']}")
+        return evidence_id
+
+    def add(self, инцидент_id, stream, имя_файла: str, username: str, тип: str = None) -> int:
+        return self.register(инцидент_id, self.write_chunks(stream), имя_файла, username, тип)
+
+    def add_file(self, инцидент_id, path, username: str) -> int:
+        path = Path(path)
+        with open(path, "rb") as f:
+            return self.add(инцидент_id, f, path.name, username, mimetypes.guess_type(path.name)[0])
+
+    # --- Чтение ---
+    def list(self, инцидент_id):
+        """Улики инцидента: (улика_id, имя_файла, размер, тип, дата_добавления, добавил)"""
+        return self.db.conn.execute(
+            "SELECT улика_id, имя_файла, размер, тип, дата_добавления, добавил FROM Улики "
+            "WHERE инцидент_id = ? ORDER BY улика_id",
+            (инцидент_id,)
+        ).fetchall()
+
+    def get(self, улика_id):
+        return self.db.conn.execute(
+            "SELECT улика_id, инцидент_id, имя_файла, размер, хэш, тип FROM Улики WHERE улика_id = ?",
+            (улика_id,)
+        ).fetchone()
+
+    def _chunks(self, улика_id, offset: int = 0, end: int = None):
+        return self.db.conn.execute(
+            "SELECT фрагмент, смещение, размер FROM УликиФрагменты "
+            "WHERE улика_id = ? AND смещение + размер > ? AND (? IS NULL OR смещение < ?) ORDER BY номер",
+            (улика_id, offset, end, end)
+        ).fetchall()
+
+    def _iter_chunks(self, chunks, offset: int = 0, end: int = None):
+        for chunk_id, chunk_offset, size in chunks:
+            data = self._load_chunk(chunk_id)
+            start = max(0, offset - chunk_offset)
+            stop = size if end is None else min(size, end - chunk_offset)
+            yield data[start:stop] if start or stop != size else data
+
+    def iter_content(self, улика_id, offset: int = 0, length: int = None):
+        """Содержимое улики частями (не больше фрагмента за раз), начиная с offset"""
+        end = offset + length if length is not None else None
+        return self._iter_chunks(self._chunks(улика_id, offset, end), offset, end)
+
+    def read_range(self, улика_id, offset: int, length: int) -> bytes:
+        return b"".join(self.iter_content(улика_id, offset, length))
+
+    def export_plan(self, улика_id) -> dict:
+        """Всё, что нужно write_export() из БД (читается в UI-потоке)"""
+        evidence = self.get(улика_id)
+        if evidence is None:
+            raise ValueError(f"Улика {улика_id} не найдена")
+        return {"имя_файла": evidence[2], "хэш": evidence[4], "фрагменты": self._chunks(улика_id)}
+
+    def write_export(self, plan: dict, destination):
+        """
+        Расшифровывает улику в файл, сверяя хэш содержимого. К БД не
+        обращается, поэтому может выполняться в фоновом потоке.
+        """
+        destination = Path(destination)
+        temp_path = destination.with_name(destination.name + ".tmp")
+        file_hash = self.crypto.content_hasher(b"evidence-file")
+        try:
+            with open(temp_path, "wb") as f:
+                for data in self._iter_chunks(plan["фрагменты"]):
+                    file_hash.update(data)
+                    f.write(data)
+            if file_hash.finalize().hex() != plan["хэш"]:
+                raise ValueError(f"Хэш улики {plan['имя_файла']} не совпадает")
+            os.replace(temp_path, destination)
+        finally:
+            if temp_path.exists():
+                os.remove(temp_path)
+
+    def export(self, улика_id, destination):
+        self.write_export(self.export_plan(улика_id), destination)
+
+    # --- Удаление ---
+    def delete(self, улика_id, username: str):
+        evidence = self.get(улика_id)
+        if evidence is None:
+            return
+        with self.db.conn:
+            self.db.conn.execute("DELETE FROM УликиФрагменты WHERE улика_id = ?", (улика_id,))
+            self.db.conn.execute("DELETE FROM Улики WHERE улика_id = ?", (улика_id,))
+            self.db._insert_audit([
+                (username, "Улики", "Удаление", "имя_файла", evidence[2], None, evidence[1])
+            ])
+
+    def collect_garbage(self) -> int:
+        """
+        Удаляет фрагменты, на которые не ссылается ни одна улика, и
+        недописанные файлы. Фрагменты удалённых улик нужны бэкапам БД,
+        сделанным до удаления, — запускать, когда такие бэкапы не нужны
+        и не во время загрузки улик.
+        """
+        if not self.directory.exists():
+            return 0
+        referenced = {row[0] for row in self.db.conn.execute("SELECT DISTINCT фрагмент FROM УликиФрагменты")}
+        removed = 0
+        for path in self.directory.glob("*/*"):
+            if path.name not in referenced:
+                path.unlink()
+                removed += 1
+        self._last_chunk = (None, b"")
+        logging.info(f"Хранилище улик: удалено неиспользуемых фрагментов: {removed}")
+        return removed
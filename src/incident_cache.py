@@ -0,0 +1,50 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+from collections import OrderedDict
+
+
+class IncidentBundleCache:
+    """
+    LRU-кэш сводных данных инцидентов (SecureDB.get_incident_bundle).
+
+    Запись в таблицы инцидента сбрасывает только его запись в кэше;
+    изменение справочника мер сбрасывает кэш целиком, так как описание
+    меры входит в данные многих инцидентов.
+    """
+    INCIDENT_TABLES = ("Инциденты", "ПаспортаИнцидентов", "Инцидент_Меры", "ИсторияИзменений")
+
+    def __init__(self, db, max_size: int = 128):
+        self._db = db
+        self.max_size = max_size
+        self._bundles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        for table in self.INCIDENT_TABLES:
+            db.subscribe(table, self._invalidate)
+        db.subscribe("МерыРеагирования", self._clear)
+
+    def _invalidate(self, table, operation, row_id):
+        # Вызывается из триггера во время записи: к БД не обращаемся
+        self._bundles.pop(row_id, None)
+
+    def _clear(self, table=None, operation=None, row_id=None):
+        self._bundles.clear()
+
+    def get(self, инцидент_id):
+        bundle = self._bundles.get(инцидент_id)
+        if bundle is not None:
+            self._bundles.move_to_end(инцидент_id)
+            self.hits += 1
+            return bundle
+
+        self.misses += 1
+        bundle = self._db._load_incident_bundle(инцидент_id)
+        if bundle is not None:
+            self._bundles[инцидент_id] = bundle
+            if len(self._bundles) > self.max_size:
+                self._bundles.popitem(last=False)
+        return bundle
+
+    def __len__(self):
+        return len(self._bundles)
@@ -0,0 +1,705 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+# Импорт событий из журналов (syslog, JSON, CEF) с автосозданием инцидентов.
+#
+# Конвейер на генераторах, по одному на источник:
+#   чтение строк -> разбор -> правила обнаружения -> подавление повторов -> пачки
+# Пачки обнаружений передаются через ограниченную очередь (обратное давление:
+# при заполненной очереди чтение источника ждёт) и записываются в БД одной
+# транзакцией на пачку в потоке, вызывающем IngestService.drain().
+#
+# Запуск без интерфейса (приложение должно быть закрыто — файл БД общий):
+#   python -m src.ingest --format syslog --follow /var/log/auth.log
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from src.alerts import make_operator
+
+RULES_FILE = Path("data/ingest_rules.json")
+CONFIG_FILE = Path("data/ingest.json")
+FAILED_FILE = Path("data/ingest_failed.jsonl")   # пачки, которые не удалось записать в БД
+
+FORMATS = ("syslog", "json", "cef")
+INGEST_USER = "Импорт событий"
+DETECTION_STATUS = "Открыт"
+
+IDLE = None                # маркер простоя источника: стадии сбрасывают накопленное
+HEARTBEAT_LINES = 4096     # маркер простоя и под нагрузкой — раз в столько строк
+MAX_SAMPLE = 500           # символов исходной строки в журнале изменений
+RETRY_DELAY = 5.0          # секунд до повтора пачки после ошибки записи
+MAX_ATTEMPTS = 5           # после стольких ошибок пачка сохраняется в FAILED_FILE
+
+# Правила по умолчанию (если нет data/ingest_rules.json). Условия — как у
+# оповещений: [поле, оператор, значение]; key — поля ключа подавления,
+# window — окно в секундах, threshold — сколько событий с одним ключом
+# в окне нужно для инцидента (в окне создаётся не больше одного).
+DEFAULT_RULES = [
+    {
+        "name": "Подбор пароля SSH",
+        "format": "syslog",
+        "when": [["program", "=", "sshd"], ["message", "contains", "failed password"]],
+        "key": ["host"],
+        "window": 600,
+        "threshold": 5,
+        "title": "Подбор пароля SSH на {host}",
+    },
+    {
+        "name": "Событие CEF высокой важности",
+        "format": "cef",
+        "when": [["severity", "in", ["7", "8", "9", "10", "High", "Very-High"]]],
+        "key": ["signature_id", "src"],
+        "window": 300,
+        "title": "{name} (источник {src})",
+    },
+    {
+        "name": "Критическое событие приложения",
+        "format": "json",
+        "when": [["level", "in", ["critical", "alert", "emergency", "fatal"]]],
+        "key": ["host", "message"],
+        "window": 300,
+        "title": "{message} ({host})",
+    },
+]
+
+
+class StageCounters:
+    """Счётчики событий по стадиям конвейера и пропускная способность"""
+
+    def __init__(self):
+        self.counts = {}
+        self.started = time.monotonic()
+
+    def add(self, stage: str, n: int = 1):
+        self.counts[stage] = self.counts.get(stage, 0) + n
+
+    def merge(self, other: "StageCounters"):
+        for stage, count in other.counts.items():
+            self.add(stage, count)
+        self.started = min(self.started, other.started)
+
+    def summary(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return ", ".join(f"{stage}: {count} ({count / elapsed:.0f}/с)" for stage, count in self.counts.items())
+
+
+# --- Чтение ---
+def tail_lines(path, follow: bool = False, from_start: bool = True, poll_interval: float = 0.5,
+               stop_event: threading.Event = None):
+    """
+    Строки файла. При follow — ждёт новых строк (как tail -F), переоткрывая
+    файл после ротации или усечения, и отдаёт IDLE при простое.
+    """
+    path = Path(path)
+    f = None
+    pending = b""
+    since_idle = 0
+    try:
+        while stop_event is None or not stop_event.is_set():
+            if f is None:
+                try:
+                    f = open(path, "rb")
+                except FileNotFoundError:
+                    if not follow:
+                        logging.error(f"Импорт событий: файл не найден: {path}")
+                        return
+                    yield IDLE
+                    _wait(stop_event, poll_interval)
+                    continue
+                if not from_start:
+                    f.seek(0, os.SEEK_END)
+                    from_start = True   # после ротации новый файл читается с начала
+
+            line = f.readline()
+            if line:
+                if follow and not line.endswith(b"\n"):
+                    pending += line     # строка дописывается
+                    continue
+                if pending:
+                    line, pending = pending + line, b""
+                yield line.rstrip(b"\r\n").decode("utf-8", errors="replace")
+                since_idle += 1
+                if since_idle >= HEARTBEAT_LINES:
+                    since_idle = 0
+                    yield IDLE
+                continue
+
+            if not follow:
+                return
+            since_idle = 0
+            yield IDLE
+            _wait(stop_event, poll_interval)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_ino != os.fstat(f.fileno()).st_ino or stat.st_size < f.tell():
+                logging.info(f"Импорт событий: файл {path} сменился, читаю заново")
+                f.close()
+                f = None
+                pending = b""
+    finally:
+        if f is not None:
+            f.close()
+
+
+def _wait(stop_event, seconds):
+    if stop_event is not None:
+        stop_event.wait(seconds)
+    else:
+        time.sleep(seconds)
+
+
+# --- Разбор ---
+_MONTHS = {name: number for number, name in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), start=1)}
+_RFC3164 = re.compile(r"(?:<(\d{1,3})>)?([A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d) (\S+) ([^\s:\[]+)(?:\[(\d+)\])?: ?(.*)")
+_RFC5424 = re.compile(r"<(\d{1,3})>1 (\S+) (\S+) (\S+) (\S+) (\S+) (-|(?:\[.*?\])+) ?(.*)")
+_CEF_EXTENSION_KEY = re.compile(r"(?:^| )([A-Za-z0-9_.\[\]]+)=")
+_CEF_UNESCAPE = re.compile(r"\\(.)")
+_CEF_HEADER = ("cef_version", "vendor", "product", "device_version", "signature_id", "name", "severity")
+
+
+class _TimeCache:
+    """Запоминает разобранные метки времени: в журнале они повторяются строка за строкой"""
+
+    def __init__(self, parse):
+        self.parse = parse
+        self._cache = {}
+
+    def __call__(self, text):
+        value = self._cache.get(text)
+        if value is None and text not in self._cache:
+            if len(self._cache) > 4096:
+                self._cache.clear()
+            try:
+                value = self.parse(text)
+            except (ValueError, KeyError, OverflowError):
+                value = None
+            self._cache[text] = value
+        return value
+
+
+def _parse_bsd_time(text: str) -> float:
+    """'Oct 11 22:14:15' (местное время, без года) — в секунды эпохи"""
+    now = time.time()
+    year = time.localtime(now).tm_year
+    clock = text[7:]
+    fields = (_MONTHS[text[:3]], int(text[4:6]), int(clock[0:2]), int(clock[3:5]), int(clock[6:8]))
+    value = time.mktime((year, *fields, 0, 0, -1))
+    if value > now + 86400:   # декабрьская запись, прочитанная в январе
+        value = time.mktime((year - 1, *fields, 0, 0, -1))
+    return value
+
+
+def _parse_iso_time(text) -> float:
+    if isinstance(text, (int, float)):
+        return text / 1000 if text > 1e11 else float(text)
+    moment = datetime.datetime.fromisoformat(str(text).replace("Z", "+00:00"))
+    return moment.timestamp()
+
+
+class SyslogParser:
+    """RFC 3164 и RFC 5424; нераспознанная строка — событие только с message"""
+    format = "syslog"
+
+    def __init__(self):
+        self._bsd_time = _TimeCache(_parse_bsd_time)
+        self._iso_time = _TimeCache(_parse_iso_time)
+
+    def __call__(self, line: str) -> dict:
+        match = _RFC3164.match(line)
+        if match:
+            pri, stamp, host, program, pid, message = match.groups()
+            moment = self._bsd_time(stamp)
+        else:
+            match = _RFC5424.match(line)
+            if not match:
+                return {"message": line, "_time": None, "_raw": line}
+            pri, stamp, host, program, pid, _, _, message = match.groups()
+            moment = self._iso_time(stamp) if stamp != "-" else None
+            pid = None if pid == "-" else pid
+        pri = int(pri) if pri else None
+        return {
+            "host": host, "program": program, "pid": pid, "message": message,
+            "facility": pri >> 3 if pri is not None else None,
+            "severity": pri & 7 if pri is not None else None,
+            "_time": moment, "_raw": line,
+        }
+
+
+class JSONParser:
+    """Объект JSON на строку; вложенные объекты разворачиваются в поля через точку"""
+    format = "json"
+    TIME_FIELDS = ("@timestamp", "timestamp", "time", "ts")
+
+    def __init__(self):
+        self._time = _TimeCache(_parse_iso_time)
+
+    def __call__(self, line: str) -> dict:
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError("ожидался объект JSON")
+        event = {}
+        self._flatten(data, "", event)
+        stamp = next((event[field] for field in self.TIME_FIELDS if field in event), None)
+        event["_time"] = self._time(stamp) if stamp is not None else None
+        event["_raw"] = line
+        return event
+
+    def _flatten(self, data, prefix, out):
+        for key, value in data.items():
+            if isinstance(value, dict):
+                self._flatten(value, f"{prefix}{key}.", out)
+            else:
+                out[prefix + key] = value
+
+
+class CEFParser:
+    """ArcSight CEF (заголовок может предваряться заголовком syslog)"""
+    format = "cef"
+
+    def __call__(self, line: str) -> dict:
+        start = line.find("CEF:")
+        if start < 0:
+            raise ValueError("нет заголовка CEF")
+        header, extension = self._split_header(line[start + 4:])
+        event = dict(zip(_CEF_HEADER, header))
+        keys = list(_CEF_EXTENSION_KEY.finditer(extension))
+        for index, match in enumerate(keys):
+            end = keys[index + 1].start() if index + 1 < len(keys) else len(extension)
+            value = extension[match.end():end]
+            event[match.group(1)] = _CEF_UNESCAPE.sub(r"\1", value) if "\\" in value else value
+        rt = event.get("rt")
+        event["_time"] = int(rt) / 1000 if rt and rt.isdigit() else None
+        event["_raw"] = line
+        return event
+
+    @staticmethod
+    def _split_header(text):
+        """7 полей заголовка через '|' (с учётом \\| и \\\\) и расширение"""
+        parts = text.split("|", 7)
+        if len(parts) == 8 and "\\" not in text[:len(text) - len(parts[7])]:
+            return parts[:7], parts[7]
+        fields = []
+        current = []
+        index = 0
+        while index < len(text) and len(fields) < 7:
+            char = text[index]
+            if char == "\\" and index + 1 < len(text):
+                current.append(text[index + 1])
+                index += 2
+                continue
+            if char == "|":
+                fields.append("".join(current))
+                current = []
+            else:
+                current.append(char)
+            index += 1
+        if len(fields) < 7:
+            raise ValueError("неполный заголовок CEF")
+        return fields, text[index:]
+
+
+PARSERS = {"syslog": SyslogParser, "json": JSONParser, "cef": CEFParser}
+
+
+def parse_events(lines, parser, stats: StageCounters):
+    for line in lines:
+        if line is IDLE:
+            yield IDLE
+            continue
+        stats.add("прочитано")
+        if not line:
+            continue
+        try:
+            event = parser(line)
+        except (ValueError, KeyError, TypeError) as e:
+            stats.add("ошибок разбора")
+            logging.debug(f"Импорт событий: строка не разобрана ({e}): {line[:200]}")
+            continue
+        stats.add("разобрано")
+        yield event
+
+
+# --- Правила ---
+class _Fields(dict):
+    def __missing__(self, key):
+        return "—"
+
+
+class DetectionRule:
+    """Правило обнаружения, скомпилированное в предикат над событием"""
+
+    def __init__(self, rule: dict):
+        self.name = rule["name"]
+        self.format = rule.get("format")
+        if self.format is not None and self.format not in FORMATS:
+            raise ValueError(f"Неизвестный формат: {self.format}")
+        self.key = tuple(rule.get("key", ()))
+        self.window = float(rule.get("window", 300))
+        self.threshold = int(rule.get("threshold", 1))
+        self.title = rule.get("title", self.name)
+        self.status = rule.get("status", DETECTION_STATUS)
+        self.organization = rule.get("organization")
+        self._checks = tuple((field, make_operator(op, expected)) for field, op, expected in rule["when"])
+
+    def matches(self, event: dict) -> bool:
+        for field, check in self._checks:
+            if not check(event.get(field)):
+                return False
+        return True
+
+    def key_of(self, event: dict):
+        return tuple(event.get(field) for field in self.key)
+
+    def title_for(self, event: dict) -> str:
+        values = _Fields({key.replace(".", "_"): value for key, value in event.items() if value is not None})
+        try:
+            return self.title.format_map(values)
+        except (ValueError, IndexError):
+            return self.title
+
+
+def load_rules(path: Path = RULES_FILE):
+    """Правила из JSON-файла или правила по умолчанию"""
+    if path.exists():
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logging.error(f"Не удалось прочитать правила импорта {path}: {e}")
+    return DEFAULT_RULES
+
+
+def compile_rules(rules):
+    compiled = []
+    for rule in rules:
+        try:
+            compiled.append(DetectionRule(rule))
+        except (KeyError, ValueError, TypeError, re.error) as e:
+            logging.error(f"Правило импорта пропущено ({rule.get('name', '?')}): {e}")
+    return compiled
+
+
+class Deduplicator:
+    """
+    Подавление повторов по ключу в окне времени. Окно начинается с первого
+    события ключа; инцидент создаётся, когда событий в окне набирается
+    threshold, и больше в этом окне не создаётся. Состояния правила лежат
+    в порядке начала окна, поэтому истёкшие снимаются с головы за O(1).
+    """
+
+    def __init__(self):
+        self._windows = {}   # правило -> OrderedDict(ключ -> [начало, счётчик, сработало])
+
+    def offer(self, rule: DetectionRule, key, moment: float):
+        """Число событий в окне, если пора создать инцидент, иначе None"""
+        windows = self._windows.get(rule.name)
+        if windows is None:
+            windows = self._windows[rule.name] = OrderedDict()
+        while windows:
+            oldest = next(iter(windows.values()))
+            if moment - oldest[0] <= rule.window:
+                break
+            windows.popitem(last=False)
+        state = windows.get(key)
+        if state is None:
+            state = windows[key] = [moment, 0, False]
+        state[1] += 1
+        if not state[2] and state[1] >= rule.threshold:
+            state[2] = True
+            return state[1]
+        return None
+
+
+def detect(events, rules, deduplicator: Deduplicator, stats: StageCounters):
+    """Обнаружения (правило, событие, событий в окне); IDLE пропускается дальше"""
+    for event in events:
+        if event is IDLE:
+            yield IDLE
+            continue
+        for rule in rules:
+            if rule.matches(event):
+                stats.add("совпадений")
+                moment = event["_time"] or time.time()
+                count = deduplicator.offer(rule, rule.key_of(event), moment)
+                if count is None:
+                    stats.add("подавлено")
+                    continue
+                stats.add("обнаружений")
+                yield rule, event, count
+
+
+def batches(detections, batch_size: int, max_delay: float):
+    """Пачки обнаружений: по batch_size или не реже раза в max_delay (проверяется на IDLE)"""
+    batch = []
+    first = None
+    for item in detections:
+        if item is not IDLE:
+            if not batch:
+                first = time.monotonic()
+            batch.append(item)
+            if len(batch) < batch_size:
+                continue
+        elif not batch or time.monotonic() - first < max_delay:
+            continue
+        yield batch
+        batch = []
+    if batch:
+        yield batch
+
+
+def build_pipeline(lines, format_name: str, rules, stats: StageCounters,
+                   batch_size: int = 500, max_delay: float = 1.0):
+    parser = PARSERS[format_name]()
+    applicable = [rule for rule in rules if rule.format in (None, format_name)]
+    events = parse_events(lines, parser, stats)
+    return batches(detect(events, applicable, Deduplicator(), stats), batch_size, max_delay)
+
+
+# --- Служба ---
+class IngestWriteError(Exception):
+    """
+    Пачку не удалось записать в БД. created — инциденты, созданные этим
+    drain() до ошибки; retrying — пачка будет повторена; иначе она
+    сохранена в saved_to (None — сохранить не удалось).
+    """
+
+    def __init__(self, error, created: int, attempts: int, retrying: bool, saved_to=None):
+        super().__init__(str(error))
+        self.created = created
+        self.attempts = attempts
+        self.retrying = retrying
+        self.saved_to = saved_to
+
+
+class IngestService:
+    """
+    Источники читаются в фоновых потоках (по одному на источник), пачки
+    обнаружений складываются в ограниченную очередь. drain() вызывается
+    владельцем БД (UI-поток по after() или цикл командной строки) и создаёт
+    инциденты одной транзакцией на пачку. Пачка, которую не удалось
+    записать, повторяется через RETRY_DELAY, а после MAX_ATTEMPTS ошибок
+    сохраняется в FAILED_FILE — обнаружения не теряются молча.
+    """
+
+    def __init__(self, db, sources, rules=None, batch_size: int = 500, max_delay: float = 1.0,
+                 queue_size: int = 16, username: str = INGEST_USER):
+        self.db = db
+        self.sources = [dict(source) for source in sources]
+        self.rules = compile_rules(load_rules() if rules is None else rules)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.username = username
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._threads = []
+        self._stats = []
+        self._retry = None        # (пачка, число неудачных попыток)
+        self._retry_at = 0.0
+        self.created = 0
+
+    def start(self):
+        for source in self.sources:
+            if source.get("format") not in PARSERS:
+                logging.error(f"Импорт событий: неизвестный формат источника {source}")
+                continue
+            stats = StageCounters()
+            self._stats.append(stats)
+            thread = threading.Thread(target=self._run_source, args=(source, stats),
+                                      name=f"ingest-{Path(source['path']).name}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        logging.info(f"Импорт событий: источников {len(self._threads)}, правил {len(self.rules)}")
+
+    def _run_source(self, source, stats):
+        lines = tail_lines(source["path"], follow=source.get("follow", False),
+                           from_start=source.get("from_start", not source.get("follow", False)),
+                           stop_event=self._stop)
+        try:
+            for batch in build_pipeline(lines, source["format"], self.rules, stats,
+                                        self.batch_size, self.max_delay):
+                self._put(batch, stats)
+                if self._stop.is_set():
+                    break
+        except Exception as e:
+            logging.error(f"Импорт событий из {source['path']} остановлен: {e}")
+        logging.info(f"Импорт событий из {source['path']}: {stats.summary()}")
+
+    def _put(self, batch, stats):
+        """Кладёт пачку в очередь; при заполненной очереди источник ждёт"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(batch, timeout=0.5)
+                stats.add("в очередь", len(batch))
+                return
+            except queue.Full:
+                stats.add("ожиданий очереди")
+
+    def drain(self, max_batches: int = 8) -> int:
+        """
+        Создаёт инциденты по накопленным пачкам; возвращает их число.
+        При ошибке записи пачка откладывается для повтора и выбрасывается
+        IngestWriteError.
+        """
+        created = 0
+        for _ in range(max_batches):
+            if self._retry is not None:
+                if time.monotonic() < self._retry_at:
+                    break
+                batch, attempts = self._retry
+                self._retry = None
+            else:
+                try:
+                    batch = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                attempts = 0
+            try:
+                created += len(self._write(batch))
+            except Exception as e:
+                self.created += created
+                attempts += 1
+                logging.error(f"Импорт событий: пачка из {len(batch)} обнаружений не записана "
+                              f"(попытка {attempts}): {e}")
+                if attempts >= MAX_ATTEMPTS:
+                    raise IngestWriteError(e, created, attempts, False, self._save_failed(batch)) from e
+                self._retry = (batch, attempts)
+                self._retry_at = time.monotonic() + RETRY_DELAY
+                raise IngestWriteError(e, created, attempts, True) from e
+        self.created += created
+        return created
+
+    def _save_failed(self, batch, path: Path = FAILED_FILE):
+        """Дописывает обнаружения пачки в JSON Lines, чтобы их можно было разобрать вручную"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                for rule, event, count in batch:
+                    f.write(json.dumps({"правило": rule.name, "событий": count, "время": event["_time"],
+                                        "строка": event["_raw"]}, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logging.error(f"Импорт событий: не удалось сохранить пачку в {path}: {e}")
+            return None
+        logging.warning(f"Импорт событий: пачка из {len(batch)} обнаружений сохранена в {path}")
+        return path
+
+    def _write(self, batch):
+        refs = self.db.refs
+        rows = []
+        for rule, event, count in batch:
+            moment = event["_time"]
+            date = (datetime.datetime.fromtimestamp(moment, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+                    if moment else None)
+            source = f"{rule.name}; событий в окне: {count}; {event['_raw'][:MAX_SAMPLE]}"
+            rows.append((rule.title_for(event)[:200], date, refs.statuses.id(rule.status),
+                         refs.organizations.id(rule.organization) if rule.organization else None, source))
+        return self.db.add_detected_incidents(rows, self.username)
+
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def pending(self) -> bool:
+        return self._retry is not None or not self._queue.empty()
+
+    def stats(self) -> StageCounters:
+        total = StageCounters()
+        for stats in self._stats:
+            total.merge(stats)
+        return total
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Останавливает источники и записывает оставшиеся пачки одной попыткой,
+        без ожидания повтора; незаписанные сохраняются в FAILED_FILE
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._retry_at = 0.0
+        try:
+            self.drain(max_batches=self._queue.qsize() + 1)
+        except IngestWriteError:
+            pass                  # пачка с ошибкой и следующие за ней сохраняются ниже
+        leftovers = [self._retry[0]] if self._retry is not None else []
+        self._retry = None
+        while True:
+            try:
+                leftovers.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for batch in leftovers:
+            self._save_failed(batch)
+        logging.info(f"Импорт событий остановлен: {self.stats().summary()}, создано инцидентов {self.created}")
+
+
+def load_config(path: Path = CONFIG_FILE):
+    """Настройки службы импорта из data/ingest.json (None — импорт не настроен)"""
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logging.error(f"Не удалось прочитать настройки импорта {path}: {e}")
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Импорт событий из журналов с созданием инцидентов")
+    parser.add_argument("files", nargs="+", help="файлы журналов")
+    parser.add_argument("--format", choices=FORMATS, required=True)
+    parser.add_argument("--follow", action="store_true", help="ждать новых строк (как tail -F)")
+    parser.add_argument("--rules", type=Path, default=RULES_FILE, help="файл правил JSON")
+    parser.add_argument("--db", default="data/incidents.db.enc", help="зашифрованный файл БД")
+    parser.add_argument("--dry-run", action="store_true", help="только показать обнаружения")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    sources = [{"path": path, "format": args.format, "follow": args.follow, "from_start": True}
+               for path in args.files]
+    rules = load_rules(args.rules)
+
+    if args.dry_run:
+        stats = StageCounters()
+        for source in sources:
+            for batch in build_pipeline(tail_lines(source["path"], follow=args.follow),
+                                        args.format, compile_rules(rules), stats):
+                for rule, event, count in batch:
+                    print(f"{rule.name}: {rule.title_for(event)} (событий: {count})")
+        print(stats.summary())
+        return
+
+    from src.database import SecureDB
+
+    db = SecureDB(args.db)
+    service = IngestService(db, sources, rules)
+    service.start()
+    try:
+        while service.running() or service.pending():
+            try:
+                if service.drain():
+                    continue
+            except IngestWriteError:
+                pass
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            service.stop()
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
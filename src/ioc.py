@@ -0,0 +1,365 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import ipaddress
+import logging
+import re
+import threading
+from bisect import bisect_right
+
+from src.change_batch import ChangeBatcher
+
+KIND_IP = "ip"
+KIND_HASH = "хэш"
+KIND_DOMAIN = "домен"
+
+HASH_ALGORITHMS = {16: "md5", 20: "sha1", 32: "sha256", 64: "sha512"}   # длина в байтах
+
+# Индикаторы компрометации (IOC) инцидентов. Общая таблица хранит исходную
+# запись, типизированные — значение в форме для поиска:
+#   адрес или диапазон — целые границы (IPv4 — INTEGER, IPv6 — 16-байтовый
+#     BLOB: побайтовое сравнение BLOB совпадает с числовым);
+#   хэш — двоичное значение;
+#   домен — метки в обратном порядке с точкой в конце ("com.example."),
+#     поэтому домен и все его поддомены — это префиксный диапазон индекса.
+_TABLES = """
+    CREATE TABLE IF NOT EXISTS Индикаторы (
+        индикатор_id INTEGER PRIMARY KEY,
+        инцидент_id INTEGER NOT NULL,
+        тип TEXT NOT NULL,
+        значение TEXT NOT NULL,
+        комментарий TEXT,
+        дата_добавления TEXT DEFAULT CURRENT_TIMESTAMP,
+        добавил TEXT,
+        FOREIGN KEY (инцидент_id) REFERENCES Инциденты(инцидент_id)
+    );
+    CREATE TABLE IF NOT EXISTS ИндикаторыАдреса (
+        индикатор_id INTEGER PRIMARY KEY,
+        версия INTEGER NOT NULL,
+        начало NOT NULL,
+        конец NOT NULL,
+        FOREIGN KEY (индикатор_id) REFERENCES Индикаторы(индикатор_id)
+    );
+    CREATE TABLE IF NOT EXISTS ИндикаторыХэши (
+        индикатор_id INTEGER PRIMARY KEY,
+        алгоритм TEXT NOT NULL,
+        значение BLOB NOT NULL,
+        FOREIGN KEY (индикатор_id) REFERENCES Индикаторы(индикатор_id)
+    );
+    CREATE TABLE IF NOT EXISTS ИндикаторыДомены (
+        индикатор_id INTEGER PRIMARY KEY,
+        домен_обр TEXT NOT NULL,
+        FOREIGN KEY (индикатор_id) REFERENCES Индикаторы(индикатор_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_индикаторы_инцидент ON Индикаторы(инцидент_id);
+    CREATE INDEX IF NOT EXISTS idx_индикаторы_адреса ON ИндикаторыАдреса(версия, начало, конец);
+    CREATE INDEX IF NOT EXISTS idx_индикаторы_хэши ON ИндикаторыХэши(значение);
+    CREATE INDEX IF NOT EXISTS idx_индикаторы_домены ON ИндикаторыДомены(домен_обр);
+"""
+
+_INDEX_QUERY = """
+    SELECT и.инцидент_id, и.тип, а.версия, а.начало, а.конец, х.значение, д.домен_обр
+    FROM Индикаторы и
+    LEFT JOIN ИндикаторыАдреса а ON а.индикатор_id = и.индикатор_id
+    LEFT JOIN ИндикаторыХэши х ON х.индикатор_id = и.индикатор_id
+    LEFT JOIN ИндикаторыДомены д ON д.индикатор_id = и.индикатор_id
+"""
+
+_HEX_RE = re.compile(r"[0-9a-fA-F]+")
+_FIELD_SEPARATOR_RE = re.compile(r"[\s,;]")
+_IPV4_RE = re.compile(r"(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})")
+_DOMAIN_RE = re.compile(r"(?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?\.)+[a-z0-9-]{2,63}")
+
+
+def ensure_ioc(conn):
+    """Создаёт таблицы индикаторов компрометации"""
+    conn.executescript(_TABLES)
+
+
+# --- Разбор индикаторов ---
+def parse_indicator(text: str):
+    """
+    Определяет тип индикатора и приводит значение к форме для поиска:
+      (KIND_IP, (версия, начало, конец)) — адрес, CIDR или диапазон "a-b";
+      (KIND_HASH, (алгоритм, bytes));
+      (KIND_DOMAIN, "com.example.").
+    Неизвестный формат — ValueError.
+    """
+    text = text.strip()
+    if not text:
+        raise ValueError("Пустой индикатор")
+
+    if len(text) in (32, 40, 64, 128) and _HEX_RE.fullmatch(text):
+        value = bytes.fromhex(text)
+        return KIND_HASH, (HASH_ALGORITHMS[len(value)], value)
+
+    # Одиночный IPv4 — самый частый индикатор фидов: без ipaddress
+    match = _IPV4_RE.fullmatch(text)
+    if match:
+        value = 0
+        for octet in match.groups():
+            octet = int(octet)
+            if octet > 255:
+                raise ValueError(f"Некорректный адрес: {text}")
+            value = value << 8 | octet
+        return KIND_IP, (4, value, value)
+
+    if text[0].isdigit() or ":" in text:
+        try:
+            return KIND_IP, _parse_ip(text)
+        except ValueError:
+            pass
+
+    domain = text.lower().rstrip(".")
+    if domain.startswith("*."):
+        domain = domain[2:]
+    if not domain.isascii():
+        try:
+            domain = domain.encode("idna").decode("ascii")
+        except UnicodeError:
+            raise ValueError(f"Неизвестный формат индикатора: {text}")
+    if _DOMAIN_RE.fullmatch(domain):
+        return KIND_DOMAIN, reverse_domain(domain)
+    raise ValueError(f"Неизвестный формат индикатора: {text}")
+
+
+def _parse_ip(text: str):
+    if "-" in text:
+        first, last = (ipaddress.ip_address(part.strip()) for part in text.split("-", 1))
+        if first.version != last.version or int(first) > int(last):
+            raise ValueError(f"Некорректный диапазон адресов: {text}")
+        return first.version, int(first), int(last)
+    network = ipaddress.ip_network(text, strict=False)
+    return network.version, int(network.network_address), int(network.broadcast_address)
+
+
+def reverse_domain(domain: str) -> str:
+    return ".".join(reversed(domain.split("."))) + "."
+
+
+def _ip_to_db(version: int, value: int):
+    return value if version == 4 else value.to_bytes(16, "big")
+
+
+def _ip_from_db(value) -> int:
+    return value if isinstance(value, int) else int.from_bytes(value, "big")
+
+
+def iter_feed(path, encoding: str = "utf-8"):
+    """
+    Строки фида индикаторов: (номер строки, индикатор). Индикатор — первое
+    поле строки (разделители — пробел, запятая, точка с запятой, табуляция);
+    пустые строки и комментарии (#) пропускаются. Файл читается потоково.
+    """
+    with open(path, encoding=encoding, errors="replace") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+            yield number, _FIELD_SEPARATOR_RE.split(line, maxsplit=1)[0].strip("\"'")
+
+
+# --- Индекс для сверки ---
+class IntervalIndex:
+    """
+    Диапазоны адресов, разрезанные на непересекающиеся отрезки: у каждого
+    отрезка — множество инцидентов всех покрывающих его диапазонов.
+    Поиск адреса — бинарный поиск по началам отрезков, O(log n).
+    """
+
+    def __init__(self, ranges):
+        # Точки смены набора покрывающих диапазонов: +инцидент в начале, -инцидент после конца
+        events = []
+        for start, end, incident_id in ranges:
+            events.append((start, 1, incident_id))
+            events.append((end + 1, -1, incident_id))
+        events.sort()
+
+        self.starts, self.ends, self.owners = [], [], []
+        active = {}
+        position = 0
+        while position < len(events):
+            point = events[position][0]
+            while position < len(events) and events[position][0] == point:
+                _, delta, incident_id = events[position]
+                count = active.get(incident_id, 0) + delta
+                if count:
+                    active[incident_id] = count
+                else:
+                    active.pop(incident_id, None)
+                position += 1
+            if self.ends and self.ends[-1] is None:
+                self.ends[-1] = point - 1
+            if active:
+                owners = frozenset(active)
+                if self.owners and self.ends[-1] == point - 1 and self.owners[-1] == owners:
+                    self.ends[-1] = None   # набор не изменился — продолжаем отрезок
+                else:
+                    self.starts.append(point)
+                    self.ends.append(None)
+                    self.owners.append(owners)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lookup(self, start: int, end: int = None) -> set:
+        """Инциденты диапазонов, пересекающихся с [start, end] (или содержащих адрес start)"""
+        end = start if end is None else end
+        index = max(0, bisect_right(self.starts, start) - 1)
+        found = set()
+        while index < len(self.starts) and self.starts[index] <= end:
+            if self.ends[index] >= start:
+                found |= self.owners[index]
+            index += 1
+        return found
+
+
+class IOCIndex:
+    """
+    Индикаторы хранилища в памяти для массовой сверки: адреса — в
+    IntervalIndex по версиям, хэши — в словаре, домены — в дереве меток
+    от зоны верхнего уровня (индикатор-домен покрывает свои поддомены).
+    Все проверки не зависят от размера фида: O(1) или O(log n) на строку.
+    """
+
+    def __init__(self, rows):
+        ranges = {4: [], 6: []}
+        self.hashes = {}
+        self.domains = {}
+        self.size = 0
+        for incident_id, kind, version, start, end, digest, domain in rows:
+            self.size += 1
+            if kind == KIND_IP:
+                ranges[version].append((_ip_from_db(start), _ip_from_db(end), incident_id))
+            elif kind == KIND_HASH:
+                self.hashes.setdefault(bytes(digest), set()).add(incident_id)
+            elif kind == KIND_DOMAIN:
+                node = self.domains
+                for label in domain.rstrip(".").split("."):
+                    node = node.setdefault(label, {})
+                node.setdefault(None, set()).add(incident_id)
+        self.ranges = {version: IntervalIndex(items) for version, items in ranges.items()}
+
+    def match(self, kind, value) -> set:
+        """Инциденты, индикаторы которых совпадают со значением parse_indicator()"""
+        if kind == KIND_IP:
+            version, start, end = value
+            return self.ranges[version].lookup(start, end)
+        if kind == KIND_HASH:
+            return set(self.hashes.get(value[1], ()))
+        found = set()
+        node = self.domains
+        for label in value.rstrip(".").split("."):
+            node = node.get(label)
+            if node is None:
+                break
+            found |= node.get(None, set())
+        return found
+
+    def match_text(self, text: str) -> set:
+        return self.match(*parse_indicator(text))
+
+
+# --- Хранилище ---
+class IOCStore:
+    """
+    Индикаторы компрометации, привязанные к инцидентам.
+
+    Индекс для сверки (IOCIndex) строится по первому запросу и
+    перестраивается, только если индикаторы менялись (SecureDB.subscribe).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._index = None
+        self._lock = threading.Lock()
+        self._changes = ChangeBatcher(db, None, ("Индикаторы",))
+
+    def add(self, инцидент_id, значение: str, username: str, комментарий: str = None) -> int:
+        return self.add_many(инцидент_id, [значение], username, комментарий)[0]
+
+    def add_many(self, инцидент_id, значения, username: str, комментарий: str = None):
+        """Добавляет индикаторы одной транзакцией; неразбираемые — ValueError до записи"""
+        parsed = [(text.strip(), *parse_indicator(text)) for text in значения]
+        ids = []
+        with self.db.conn:
+            for text, kind, value in parsed:
+                cursor = self.db.conn.execute(
+                    "INSERT INTO Индикаторы (инцидент_id, тип, значение, комментарий, добавил) VALUES (?, ?, ?, ?, ?)",
+                    (инцидент_id, kind, text, комментарий, username)
+                )
+                indicator_id = cursor.lastrowid
+                if kind == KIND_IP:
+                    version, start, end = value
+                    self.db.conn.execute(
+                        "INSERT INTO ИндикаторыАдреса (индикатор_id, версия, начало, конец) VALUES (?, ?, ?, ?)",
+                        (indicator_id, version, _ip_to_db(version, start), _ip_to_db(version, end))
+                    )
+                elif kind == KIND_HASH:
+                    self.db.conn.execute(
+                        "INSERT INTO ИндикаторыХэши (индикатор_id, алгоритм, значение) VALUES (?, ?, ?)",
+                        (indicator_id, *value)
+                    )
+                else:
+                    self.db.conn.execute(
+                        "INSERT INTO ИндикаторыДомены (индикатор_id, домен_обр) VALUES (?, ?)",
+                        (indicator_id, value)
+                    )
+                ids.append(indicator_id)
+            self.db._insert_audit([
+                (username, "Индикаторы", "Добавление", kind, None, text, инцидент_id)
+                for text, kind, _ in parsed
+            ])
+        return ids
+
+    def delete(self, индикатор_id, username: str):
+        row = self.db.conn.execute(
+            "SELECT инцидент_id, тип, значение FROM Индикаторы WHERE индикатор_id = ?", (индикатор_id,)
+        ).fetchone()
+        if row is None:
+            return
+        with self.db.conn:
+            for table in ("ИндикаторыАдреса", "ИндикаторыХэши", "ИндикаторыДомены", "Индикаторы"):
+                self.db.conn.execute(f"DELETE FROM {table} WHERE индикатор_id = ?", (индикатор_id,))
+            self.db._insert_audit([(username, "Индикаторы", "Удаление", row[1], row[2], None, row[0])])
+
+    def list(self, инцидент_id):
+        """Индикаторы инцидента: (индикатор_id, тип, значение, комментарий, дата_добавления)"""
+        return self.db.conn.execute(
+            "SELECT индикатор_id, тип, значение, комментарий, дата_добавления FROM Индикаторы "
+            "WHERE инцидент_id = ? ORDER BY индикатор_id",
+            (инцидент_id,)
+        ).fetchall()
+
+    def index(self) -> IOCIndex:
+        """Актуальный индекс (вызывать из UI-потока: при изменениях читает БД)"""
+        with self._lock:
+            if self._changes.take() or self._index is None:
+                self._index = IOCIndex(self.db.conn.execute(_INDEX_QUERY))
+                logging.info(f"Индекс IOC перестроен: индикаторов {self._index.size}")
+            return self._index
+
+    def incidents_for(self, значение: str) -> set:
+        """Инциденты, связанные с адресом, хэшем или доменом"""
+        return self.index().match_text(значение)
+
+    @staticmethod
+    def match_feed(index: IOCIndex, lines, stats: dict = None):
+        """
+        Сверяет фид с индексом: для строк (номер, индикатор) отдаёт
+        (номер, индикатор, инциденты) совпавших. Не обращается к БД,
+        поэтому может выполняться в фоновом потоке.
+        """
+        if stats is None:
+            stats = {}
+        stats.update(строк=0, совпадений=0, нераспознано=0)
+        for number, text in lines:
+            stats["строк"] += 1
+            try:
+                incidents = index.match(*parse_indicator(text))
+            except ValueError:
+                stats["нераспознано"] += 1
+                continue
+            if incidents:
+                stats["совпадений"] += 1
+                yield number, text, incidents
@@ -0,0 +1,54 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import bisect
+import threading
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек с логарифмическими корзинами (мс).
+    Потокобезопасна: значения могут приходить из фоновых потоков.
+    """
+    DEFAULT_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, name: str, bounds=DEFAULT_BOUNDS):
+        self.name = name
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # последняя корзина — выше максимума
+        self.total = 0
+        self.sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+            self.total += 1
+            self.sum_ms += ms
+
+    def percentile(self, p: float) -> float:
+        """Верхняя граница корзины, в которую попадает p-й перцентиль"""
+        with self._lock:
+            if not self.total:
+                return 0.0
+            rank = p / 100 * self.total
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    return float(self.bounds[index]) if index < len(self.bounds) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        """Корзины в виде {'<=N мс': количество}"""
+        with self._lock:
+            labels = [f"<={b} мс" for b in self.bounds] + [f">{self.bounds[-1]} мс"]
+            return dict(zip(labels, self.counts))
+
+    def summary(self) -> str:
+        if not self.total:
+            return f"{self.name}: нет замеров"
+        mean = self.sum_ms / self.total
+        return (f"{self.name}: n={self.total}, среднее={mean:.1f} мс, "
+                f"p50<={self.percentile(50):g} мс, p95<={self.percentile(95):g} мс, "
+                f"p99<={self.percentile(99):g} мс")
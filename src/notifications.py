@@ -0,0 +1,49 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import datetime
+import threading
+from collections import deque
+
+
+class NotificationCenter:
+    """
+    Очередь уведомлений приложения (оповещения правил, эскалации SLA).
+    Хранит последние max_items; подписчики вызываются в потоке, сделавшем push.
+    """
+
+    def __init__(self, max_items: int = 200):
+        self._items = deque(maxlen=max_items)
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.unread = 0
+
+    def subscribe(self, callback):
+        """callback(уведомление) — словарь с ключами время, тип, текст, инцидент_id"""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def push(self, kind: str, text: str, incident_id=None):
+        item = {
+            "время": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "тип": kind,
+            "текст": text,
+            "инцидент_id": incident_id,
+        }
+        with self._lock:
+            self._items.append(item)
+            self.unread += 1
+        for callback in list(self._listeners):
+            callback(item)
+
+    def items(self):
+        """Уведомления от новых к старым"""
+        with self._lock:
+            return list(reversed(self._items))
+
+    def mark_read(self):
+        with self._lock:
+            self.unread = 0
@@ -0,0 +1,64 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    Замер времени фаз холодного старта (флаг --profile-startup).
+    Фазы могут выполняться как в главном, так и в фоновых потоках.
+    """
+
+    def __init__(self, enabled: bool = False, t0: float = None):
+        self.enabled = enabled
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.phases = []  # (название, поток, начало, длительность)
+        self._lock = threading.Lock()
+        self._reported = False
+
+    @contextmanager
+    def phase(self, name: str):
+        """Контекстный менеджер для замера одной фазы"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start)
+
+    def record(self, name: str, start: float, duration: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.phases.append((name, threading.current_thread().name, start - self.t0, duration))
+
+    def mark(self, name: str):
+        """Отметка момента времени (фаза нулевой длительности)"""
+        self.record(name, time.perf_counter(), 0.0)
+
+    def report(self):
+        """Выводит отчёт по фазам старта (один раз)"""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[2])
+
+        lines = ["Профиль холодного старта:",
+                 f"{'Фаза':<40} {'Поток':<14} {'Старт, мс':>10} {'Время, мс':>10}"]
+        for name, thread, offset, duration in phases:
+            lines.append(f"{name:<40} {thread[:14]:<14} {offset * 1000:>10.1f} {duration * 1000:>10.1f}")
+        total = max((offset + duration for _, _, offset, duration in phases), default=0.0)
+        lines.append(f"{'Итого до готовности':<40} {'':<14} {'':>10} {total * 1000:>10.1f}")
+
+        text = "\n".join(lines)
+        print(text)
+        logging.info(text)
+
+
+# Профилировщик процесса; включается в main.py по флагу --profile-startup
+profiler = StartupProfiler()
@@ -0,0 +1,217 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import logging
+import threading
+
+import numpy as np
+
+from src.change_batch import ChangeBatcher
+
+# Рекомендации мер реагирования по истории Инцидент_Меры.
+# Признаки инцидента: критичность, тип и категория из паспорта, техники
+# ATT&CK (подтехники — по родительской) и их тактики. Статистика по
+# инцидентам, у которых есть хотя бы одна мера:
+#   features[f, m] — инцидентов с признаком f и мерой m;
+#   together[s, m] — инцидентов с мерами s и m;
+#   feature_count[f], measure_count[m] — частоты.
+# Оценка меры m для инцидента — средняя по его признакам сглаженная
+# P(m | f) плюс средняя P(m | s) по уже привязанным мерам s: несколько
+# строк матриц суммируются NumPy, без цикла по мерам.
+SMOOTHING = 1.0
+BUILD_CHUNK = 8192
+
+_PASSPORT_QUERY = """
+    SELECT инцидент_id, уровень_критичности, тип_инцидента, категория_инцидента
+    FROM ПаспортаИнцидентов
+"""
+_TECHNIQUES_QUERY = """
+    SELECT ит.инцидент_id, ит.техника_id, тт.тактика_id
+    FROM ИнцидентыТехники ит
+    LEFT JOIN АтакаТехникиТактик тт ON тт.техника_id = ит.техника_id
+"""
+_MEASURES_QUERY = "SELECT инцидент_id, мера_реагирования_id FROM Инцидент_Меры"
+
+
+def _capacity(current: int, needed: int) -> int:
+    return current if needed <= current else max(needed, current * 2, 16)
+
+
+def _grow(matrix: np.ndarray, rows: int, columns: int) -> np.ndarray:
+    """Матрица с запасом (удвоение), чтобы новые признаки и меры не копировали её каждый раз"""
+    shape = (_capacity(matrix.shape[0], rows), _capacity(matrix.shape[1], columns))
+    if shape == matrix.shape:
+        return matrix
+    grown = np.zeros(shape, dtype=matrix.dtype)
+    grown[:matrix.shape[0], :matrix.shape[1]] = matrix
+    return grown
+
+
+class MeasureRecommender:
+    """
+    Матрицы совместной встречаемости строятся при первом запросе и дальше
+    обновляются по изменённым инцидентам (ChangeBatcher): вклад инцидента
+    вычитается и добавляется заново. Вызывать из UI-потока.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._built = False
+        self._changes = ChangeBatcher(db, None, ("Инциденты", "ПаспортаИнцидентов", "Инцидент_Меры",
+                                                 "ИнцидентыТехники"))
+        self._feature_index = {}     # признак -> строка матриц
+        self._measure_index = {}     # мера_реагирования_id -> столбец
+        self._measure_ids = []
+        self._incidents = {}         # инцидент_id -> (индексы признаков, индексы мер)
+        self.features = np.zeros((0, 0), dtype=np.float32)
+        self.together = np.zeros((0, 0), dtype=np.float32)
+        self.feature_count = np.zeros(0, dtype=np.float32)
+        self.measure_count = np.zeros(0, dtype=np.float32)
+        self.trained = 0             # инцидентов с мерами
+
+    # --- Признаки ---
+    def _read(self, where: str = "", params=()):
+        """{инцидент_id: (набор признаков, набор мер)} из БД"""
+        result = {}
+
+        def entry(incident_id):
+            if incident_id not in result:
+                result[incident_id] = (set(), set())
+            return result[incident_id]
+
+        for incident_id, level, kind, category in self.db.conn.execute(_PASSPORT_QUERY + where, params):
+            features = entry(incident_id)[0]
+            for prefix, value in (("критичность", level), ("тип", kind), ("категория", category)):
+                if value and value.strip():
+                    features.add(f"{prefix}:{value.strip().lower()}")
+        techniques_where = where.replace("инцидент_id", "ит.инцидент_id")
+        for incident_id, technique, tactic in self.db.conn.execute(_TECHNIQUES_QUERY + techniques_where, params):
+            features = entry(incident_id)[0]
+            features.add(f"техника:{technique.split('.')[0]}")
+            if tactic:
+                features.add(f"тактика:{tactic}")
+        for incident_id, measure_id in self.db.conn.execute(_MEASURES_QUERY + where, params):
+            entry(incident_id)[1].add(measure_id)
+        return result
+
+    def _indices(self, features, measures):
+        for feature in features:
+            if feature not in self._feature_index:
+                self._feature_index[feature] = len(self._feature_index)
+        for measure_id in measures:
+            if measure_id not in self._measure_index:
+                self._measure_index[measure_id] = len(self._measure_ids)
+                self._measure_ids.append(measure_id)
+        return (np.array(sorted(self._feature_index[f] for f in features), dtype=np.intp),
+                np.array(sorted(self._measure_index[m] for m in measures), dtype=np.intp))
+
+    def _reserve(self):
+        features, measures = len(self._feature_index), len(self._measure_ids)
+        self.features = _grow(self.features, features, measures)
+        self.together = _grow(self.together, measures, measures)
+        size = self.features.shape
+        if self.feature_count.shape[0] < size[0]:
+            self.feature_count = np.concatenate(
+                [self.feature_count, np.zeros(size[0] - self.feature_count.shape[0], dtype=np.float32)])
+        if self.measure_count.shape[0] < self.together.shape[1]:
+            self.measure_count = np.concatenate(
+                [self.measure_count, np.zeros(self.together.shape[1] - self.measure_count.shape[0], dtype=np.float32)])
+
+    def _apply(self, incident_id, sign: float):
+        """Добавляет (sign=1) или вычитает (sign=-1) вклад инцидента"""
+        feature_idx, measure_idx = self._incidents[incident_id]
+        if not len(measure_idx):
+            return
+        self.features[np.ix_(feature_idx, measure_idx)] += sign
+        self.together[np.ix_(measure_idx, measure_idx)] += sign
+        self.feature_count[feature_idx] += sign
+        self.measure_count[measure_idx] += sign
+        self.trained += int(sign)
+
+    # --- Построение и обновление ---
+    def _build(self):
+        data = self._read()
+        rows = []
+        for incident_id, (features, measures) in data.items():
+            self._incidents[incident_id] = self._indices(features, measures)
+            if measures:
+                rows.append(self._incidents[incident_id])
+        self._reserve()
+        # Полная сборка — произведения разреженных по сути матриц инцидентов
+        # кусками: X^T Y для признаков и Y^T Y для мер
+        n_features, n_measures = self.features.shape
+        for start in range(0, len(rows), BUILD_CHUNK):
+            part = rows[start:start + BUILD_CHUNK]
+            x = np.zeros((len(part), n_features), dtype=np.float32)
+            y = np.zeros((len(part), n_measures), dtype=np.float32)
+            for i, (feature_idx, measure_idx) in enumerate(part):
+                x[i, feature_idx] = 1
+                y[i, measure_idx] = 1
+            self.features += x.T @ y
+            self.together += y.T @ y
+            self.feature_count += x.sum(axis=0)
+            self.measure_count += y.sum(axis=0)
+        self.trained = len(rows)
+        self._built = True
+        logging.info(f"Рекомендации мер: инцидентов с мерами {self.trained}, признаков {len(self._feature_index)}, "
+                     f"мер {len(self._measure_ids)}")
+
+    def refresh(self):
+        """Строит статистику при первом вызове, затем учитывает изменённые инциденты"""
+        with self._lock:
+            changed = self._changes.take()
+            if not self._built:
+                self._build()
+                return
+            if not changed:
+                return
+            changed = sorted(changed)
+            data = {}
+            for start in range(0, len(changed), 500):
+                part = changed[start:start + 500]
+                data.update(self._read(f" WHERE инцидент_id IN ({','.join('?' * len(part))})", part))
+            for incident_id in changed:
+                if incident_id in self._incidents:
+                    self._apply(incident_id, -1.0)
+                features, measures = data.get(incident_id, (set(), set()))
+                if features or measures:
+                    self._incidents[incident_id] = self._indices(features, measures)
+                    self._reserve()
+                    self._apply(incident_id, 1.0)
+                else:
+                    self._incidents.pop(incident_id, None)
+
+    # --- Рекомендации ---
+    def scores(self, инцидент_id) -> np.ndarray:
+        """Оценки всех известных мер для инцидента (порядок — measure_ids)"""
+        self.refresh()
+        n_measures = len(self._measure_ids)
+        if not n_measures or not self.trained:
+            return np.zeros(n_measures, dtype=np.float32)
+        prior = self.measure_count[:n_measures] / self.trained
+        feature_idx, measure_idx = self._incidents.get(инцидент_id, ((), ()))
+        feature_idx, measure_idx = np.asarray(feature_idx, dtype=np.intp), np.asarray(measure_idx, dtype=np.intp)
+
+        parts = []
+        for counts, totals, idx in ((self.features, self.feature_count, feature_idx),
+                                    (self.together, self.measure_count, measure_idx)):
+            if len(idx):
+                conditional = ((counts[idx, :n_measures] + SMOOTHING * prior) /
+                               (totals[idx, None] + SMOOTHING))
+                parts.append(conditional.mean(axis=0))
+        return sum(parts) if parts else prior
+
+    def recommend(self, инцидент_id, k: int = 5):
+        """Топ-k мер, ещё не привязанных к инциденту: [(мера_реагирования_id, оценка)]"""
+        with self._lock:
+            scores = self.scores(инцидент_id).astype(np.float64)
+            if not len(scores):
+                return []
+            _, measure_idx = self._incidents.get(инцидент_id, ((), ()))
+            scores[np.asarray(measure_idx, dtype=np.intp)] = -np.inf
+            scores[self.measure_count[:len(scores)] <= 0] = -np.inf    # мера удалена или больше не используется
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._measure_ids[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
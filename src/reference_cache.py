@@ -0,0 +1,107 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+from src.text_index import NameIndex
+
+
+class Reference:
+    """Загруженный справочник: строки, id -> строка и название -> id"""
+
+    def __init__(self, rows, version):
+        self.rows = rows
+        self.version = version
+        self.by_id = {row[0]: row for row in rows}
+        self.id_by_name = {}
+        for row in rows:
+            # При одинаковых названиях побеждает первая строка, как раньше у next(...)
+            self.id_by_name.setdefault(row[1], row[0])
+        self._index = None
+        self._groups = {}
+        self._subsets = {}
+
+    @property
+    def index(self) -> NameIndex:
+        """Индекс названий для автодополнения (строится при первом обращении)"""
+        if self._index is None:
+            self._index = NameIndex((row[0], row[1]) for row in self.rows)
+        return self._index
+
+    def subset(self, column: int, value) -> "Reference":
+        """
+        Строки, у которых в колонке column значение value, как отдельный
+        справочник со своим индексом (например, ответственные организации).
+        """
+        key = (column, value)
+        if key not in self._subsets:
+            groups = self._groups.get(column)
+            if groups is None:
+                groups = {}
+                for row in self.rows:
+                    groups.setdefault(row[column], []).append(row)
+                self._groups[column] = groups
+            self._subsets[key] = Reference(groups.get(value, []), self.version)
+        return self._subsets[key]
+
+    def name(self, row_id, default="Неизвестно"):
+        row = self.by_id.get(row_id)
+        return row[1] if row else default
+
+    def id(self, name):
+        return self.id_by_name.get(name)
+
+    def names(self):
+        return [row[1] for row in self.rows]
+
+
+class ReferenceCache:
+    """
+    Общий для всех вкладок кэш справочников SecureDB.
+
+    Справочник загружается одним запросом и хранится до тех пор, пока
+    триггеры БД не сообщат о записи в его таблицу (см. SecureDB.subscribe).
+    Все поиски id/названия — обращения к словарю.
+    """
+    QUERIES = {
+        "СтатусыИнцидентов":
+            "SELECT статус_инцидента_id, статус FROM СтатусыИнцидентов",
+        "Организации":
+            "SELECT организация_id, название, адрес, контактный_телефон FROM Организации",
+        "Ответственные":
+            "SELECT ответственный_id, имя, должность, электронная_почта, организация_id FROM Ответственные",
+    }
+
+    def __init__(self, db):
+        self._db = db
+        self._versions = {table: 0 for table in self.QUERIES}
+        self._loaded = {}
+        for table in self.QUERIES:
+            db.subscribe(table, self._invalidate)
+
+    def _invalidate(self, table, operation, row_id):
+        # Вызывается из триггера во время записи: только отмечаем устаревание
+        self._versions[table] += 1
+
+    def get(self, table) -> Reference:
+        version = self._versions[table]
+        reference = self._loaded.get(table)
+        if reference is None or reference.version != version:
+            rows = self._db.conn.execute(self.QUERIES[table]).fetchall()
+            reference = Reference(rows, version)
+            self._loaded[table] = reference
+        return reference
+
+    @property
+    def statuses(self) -> Reference:
+        return self.get("СтатусыИнцидентов")
+
+    @property
+    def organizations(self) -> Reference:
+        return self.get("Организации")
+
+    @property
+    def responsibles(self) -> Reference:
+        return self.get("Ответственные")
+
+    def responsibles_of(self, организация_id) -> Reference:
+        """Ответственные указанной организации"""
+        return self.responsibles.subset(4, организация_id)
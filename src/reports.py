@@ -0,0 +1,571 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import csv
+import datetime
+import html
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# Отчёты для регулятора (ГосСОПКА, ФСТЭК). Шаблон — набор разделов:
+#   сводные — счётчики по ключам за месяц (аддитивны, поэтому квартал —
+#             сумма месяцев); результаты закрытых месяцев хранятся в
+#             КэшОтчетов, и считается только текущий месяц;
+#   перечни — строки, которые читаются курсором и сразу пишутся в файл.
+# Изменение инцидента, паспорта, мер или журнала удаляет кэш месяца, к
+# которому относится запись (триггеры ниже), так что кэш не устаревает.
+#
+# Формирование идёт в фоновом потоке по копии БД (sqlite3 backup), чтобы
+# долгие запросы не мешали UI-потоку работать с основным соединением.
+FORMATS = ("csv", "html", "pdf")
+PERIOD_MONTH = "месяц"
+PERIOD_QUARTER = "квартал"
+
+_TABLES = """
+    CREATE TABLE IF NOT EXISTS КэшОтчетов (
+        шаблон TEXT NOT NULL,
+        раздел TEXT NOT NULL,
+        период TEXT NOT NULL,
+        данные TEXT NOT NULL,
+        создан TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (шаблон, раздел, период)
+    );
+    CREATE INDEX IF NOT EXISTS idx_кэш_отчетов_период ON КэшОтчетов(период);
+    CREATE INDEX IF NOT EXISTS idx_инциденты_дата ON Инциденты(дата_обнаружения);
+    CREATE INDEX IF NOT EXISTS idx_история_дата ON ИсторияИзменений(дата_изменения)
+"""
+
+_INCIDENT_MONTH = "(SELECT strftime('%Y-%m', дата_обнаружения) FROM Инциденты WHERE инцидент_id = {row}.инцидент_id)"
+
+# Сводки хранят названия из справочников: переименование или удаление
+# записи справочника сбрасывает разделы, где они выводятся, за все месяцы
+_REFERENCE_SECTIONS = {
+    "Организации": ("название", "организации"),
+    "СтатусыИнцидентов": ("статус", "статусы"),
+    "МерыРеагирования": ("описание", "меры"),
+}
+_REFERENCE_TRIGGERS = "".join(f"""
+    CREATE TRIGGER IF NOT EXISTS отчеты_{table}_изменён AFTER UPDATE OF {column} ON {table}
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE раздел = '{section}';
+    END;
+    CREATE TRIGGER IF NOT EXISTS отчеты_{table}_удалён AFTER DELETE ON {table}
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE раздел = '{section}';
+    END;""" for table, (column, section) in _REFERENCE_SECTIONS.items())
+
+_TRIGGERS = f"""
+    CREATE TRIGGER IF NOT EXISTS отчеты_инцидент_добавлен AFTER INSERT ON Инциденты
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE период = strftime('%Y-%m', NEW.дата_обнаружения);
+    END;
+    CREATE TRIGGER IF NOT EXISTS отчеты_инцидент_изменён AFTER UPDATE ON Инциденты
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE период IN (strftime('%Y-%m', OLD.дата_обнаружения),
+                                                strftime('%Y-%m', NEW.дата_обнаружения));
+    END;
+    CREATE TRIGGER IF NOT EXISTS отчеты_инцидент_удалён AFTER DELETE ON Инциденты
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE период = strftime('%Y-%m', OLD.дата_обнаружения);
+    END;
+    CREATE TRIGGER IF NOT EXISTS отчеты_паспорт_добавлен AFTER INSERT ON ПаспортаИнцидентов
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE период = {_INCIDENT_MONTH.format(row='NEW')};
+    END;
+    CREATE TRIGGER IF NOT EXISTS отчеты_паспорт_изменён AFTER UPDATE ON ПаспортаИнцидентов
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE период = {_INCIDENT_MONTH.format(row='NEW')};
+    END;
+    CREATE TRIGGER IF NOT EXISTS отчеты_паспорт_удалён AFTER DELETE ON ПаспортаИнцидентов
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE период = {_INCIDENT_MONTH.format(row='OLD')};
+    END;
+    CREATE TRIGGER IF NOT EXISTS отчеты_мера_привязана AFTER INSERT ON Инцидент_Меры
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE период = {_INCIDENT_MONTH.format(row='NEW')};
+    END;
+    CREATE TRIGGER IF NOT EXISTS отчеты_мера_отвязана AFTER DELETE ON Инцидент_Меры
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE период = {_INCIDENT_MONTH.format(row='OLD')};
+    END;
+    CREATE TRIGGER IF NOT EXISTS отчеты_журнал AFTER INSERT ON ИсторияИзменений
+    BEGIN
+        DELETE FROM КэшОтчетов WHERE период = strftime('%Y-%m', NEW.дата_изменения);
+    END;
+{_REFERENCE_TRIGGERS}"""
+
+
+def ensure_reports(conn):
+    """Создаёт кэш отчётов, индексы по датам и триггеры сброса кэша"""
+    for statement in _TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    for part in _TRIGGERS.split("END;"):
+        if part.strip():
+            conn.execute(part.strip() + " END")
+
+
+# --- Периоды ---
+def month_bounds(month: str):
+    """'2025-03' -> ('2025-03-01', '2025-04-01')"""
+    year, number = map(int, month.split("-"))
+    following = f"{year + 1}-01" if number == 12 else f"{year}-{number + 1:02d}"
+    return f"{month}-01", f"{following}-01"
+
+
+def report_months(kind: str, year: int, number: int):
+    """Месяцы отчётного периода: месяц number или квартал number года year"""
+    if kind == PERIOD_MONTH:
+        if not 1 <= number <= 12:
+            raise ValueError("Месяц должен быть от 1 до 12")
+        return [f"{year}-{number:02d}"]
+    if kind == PERIOD_QUARTER:
+        if not 1 <= number <= 4:
+            raise ValueError("Квартал должен быть от 1 до 4")
+        return [f"{year}-{month:02d}" for month in range(3 * number - 2, 3 * number + 1)]
+    raise ValueError(f"Неизвестный период: {kind}")
+
+
+def is_closed(month: str, today: datetime.date = None) -> bool:
+    """Месяц закончился — его данные больше не должны меняться"""
+    today = today or datetime.date.today()
+    return month < f"{today.year}-{today.month:02d}"
+
+
+# --- Шаблоны ---
+class SummarySection:
+    """Сводный раздел: query(начало, конец) -> строки (ключи..., число)"""
+
+    def __init__(self, key, title, columns, query):
+        self.key = key
+        self.title = title
+        self.columns = columns
+        self.query = query
+
+    def compute(self, conn, month):
+        return [list(row) for row in conn.execute(self.query, month_bounds(month))]
+
+    @staticmethod
+    def merge(parts):
+        """Сумма счётчиков по месяцам с сортировкой по убыванию"""
+        totals = {}
+        for rows in parts:
+            for *keys, count in rows:
+                key = tuple(keys)
+                totals[key] = totals.get(key, 0) + count
+        return sorted(([*keys, count] for keys, count in totals.items()),
+                      key=lambda row: (-row[-1], [str(value) for value in row[:-1]]))
+
+
+class ListSection:
+    """Перечень: строки запроса за весь период отчёта, без кэширования"""
+
+    def __init__(self, key, title, columns, query, count_query):
+        self.key = key
+        self.title = title
+        self.columns = columns
+        self.query = query
+        self.count_query = count_query
+
+
+class ReportTemplate:
+    def __init__(self, key, title, sections):
+        self.key = key
+        self.title = title
+        self.sections = sections
+
+
+_PERIOD_INCIDENTS = "и.дата_обнаружения >= ? AND и.дата_обнаружения < ?"
+_NOT_SET = "'Не указано'"
+
+TEMPLATES = {
+    "госсопка": ReportTemplate("госсопка", "Сведения о компьютерных инцидентах (ГосСОПКА)", [
+        SummarySection("категории", "Инциденты по категориям и типам", ("Категория", "Тип", "Инцидентов"), f"""
+            SELECT COALESCE(п.категория_инцидента, {_NOT_SET}), COALESCE(п.тип_инцидента, {_NOT_SET}), COUNT(*)
+            FROM Инциденты и LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+            WHERE {_PERIOD_INCIDENTS} GROUP BY 1, 2
+        """),
+        SummarySection("критичность", "Инциденты по уровню критичности", ("Уровень", "Инцидентов"), f"""
+            SELECT COALESCE(п.уровень_критичности, {_NOT_SET}), COUNT(*)
+            FROM Инциденты и LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+            WHERE {_PERIOD_INCIDENTS} GROUP BY 1
+        """),
+        SummarySection("статусы", "Инциденты по статусам", ("Статус", "Инцидентов"), f"""
+            SELECT COALESCE(с.статус, {_NOT_SET}), COUNT(*)
+            FROM Инциденты и LEFT JOIN СтатусыИнцидентов с ON с.статус_инцидента_id = и.статус_инцидента_id
+            WHERE {_PERIOD_INCIDENTS} GROUP BY 1
+        """),
+        SummarySection("организации", "Инциденты по организациям", ("Организация", "Инцидентов"), f"""
+            SELECT COALESCE(о.название, {_NOT_SET}), COUNT(*)
+            FROM Инциденты и LEFT JOIN Организации о ON о.организация_id = и.организация_id
+            WHERE {_PERIOD_INCIDENTS} GROUP BY 1
+        """),
+        ListSection(
+            "перечень", "Перечень инцидентов",
+            ("ID", "Дата обнаружения", "Название", "Организация", "Категория", "Тип", "Критичность", "Статус",
+             "Принятые меры"),
+            f"""
+            SELECT и.инцидент_id, и.дата_обнаружения, и.название, о.название, п.категория_инцидента,
+                   п.тип_инцидента, п.уровень_критичности, с.статус,
+                   (SELECT group_concat(м.описание, '; ') FROM Инцидент_Меры им
+                    JOIN МерыРеагирования м ON м.мера_реагирования_id = им.мера_реагирования_id
+                    WHERE им.инцидент_id = и.инцидент_id)
+            FROM Инциденты и
+            LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+            LEFT JOIN Организации о ON о.организация_id = и.организация_id
+            LEFT JOIN СтатусыИнцидентов с ON с.статус_инцидента_id = и.статус_инцидента_id
+            WHERE {_PERIOD_INCIDENTS} ORDER BY и.дата_обнаружения, и.инцидент_id
+            """,
+            f"SELECT COUNT(*) FROM Инциденты и WHERE {_PERIOD_INCIDENTS}",
+        ),
+    ]),
+    "фстэк": ReportTemplate("фстэк", "Отчёт о реагировании на инциденты (ФСТЭК)", [
+        SummarySection("меры", "Применённые меры реагирования", ("Мера", "Инцидентов"), f"""
+            SELECT м.описание, COUNT(*)
+            FROM Инциденты и
+            JOIN Инцидент_Меры им ON им.инцидент_id = и.инцидент_id
+            JOIN МерыРеагирования м ON м.мера_реагирования_id = им.мера_реагирования_id
+            WHERE {_PERIOD_INCIDENTS} GROUP BY 1
+        """),
+        SummarySection("без_мер", "Инциденты без мер реагирования", ("Уровень", "Инцидентов"), f"""
+            SELECT COALESCE(п.уровень_критичности, {_NOT_SET}), COUNT(*)
+            FROM Инциденты и LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+            WHERE {_PERIOD_INCIDENTS}
+              AND NOT EXISTS (SELECT 1 FROM Инцидент_Меры им WHERE им.инцидент_id = и.инцидент_id)
+            GROUP BY 1
+        """),
+        SummarySection("журнал", "Действия в журнале изменений", ("Таблица", "Действие", "Записей"), """
+            SELECT таблица, действие, COUNT(*) FROM ИсторияИзменений
+            WHERE дата_изменения >= ? AND дата_изменения < ? GROUP BY 1, 2
+        """),
+        ListSection(
+            "меры_инцидентов", "Меры по инцидентам",
+            ("ID", "Дата обнаружения", "Название", "Критичность", "Мера"),
+            f"""
+            SELECT и.инцидент_id, и.дата_обнаружения, и.название, п.уровень_критичности, м.описание
+            FROM Инциденты и
+            JOIN Инцидент_Меры им ON им.инцидент_id = и.инцидент_id
+            JOIN МерыРеагирования м ON м.мера_реагирования_id = им.мера_реагирования_id
+            LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+            WHERE {_PERIOD_INCIDENTS} ORDER BY и.дата_обнаружения, и.инцидент_id
+            """,
+            f"""SELECT COUNT(*) FROM Инциденты и JOIN Инцидент_Меры им ON им.инцидент_id = и.инцидент_id
+                WHERE {_PERIOD_INCIDENTS}""",
+        ),
+    ]),
+}
+
+
+# --- Вывод ---
+class CSVWriter:
+    """CSV для Excel: UTF-8 с BOM, разделитель ';', разделы через пустую строку"""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file, delimiter=";")
+
+    def begin(self, title, subtitle):
+        self._writer.writerows([[title], [subtitle]])
+
+    def table(self, title, columns):
+        self._writer.writerows([[], [title], list(columns)])
+
+    def row(self, values):
+        self._writer.writerow(["" if value is None else value for value in values])
+
+    def end_table(self):
+        pass
+
+    def finish(self):
+        self._file.close()
+
+    def abort(self):
+        self._file.close()
+
+
+class HTMLWriter:
+    """Самодостаточная HTML-страница; строки пишутся в файл по мере чтения"""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def begin(self, title, subtitle):
+        self._file.write(
+            "<!DOCTYPE html>\n<html lang=\"ru\"><head><meta charset=\"utf-8\">"
+            f"<title>{html.escape(title)}</title><style>"
+            "body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:2em}"
+            "th,td{border:1px solid #999;padding:3px 6px;text-align:left}th{background:#eee}"
+            f"</style></head><body>\n<h1>{html.escape(title)}</h1>\n<p>{html.escape(subtitle)}</p>\n"
+        )
+
+    def table(self, title, columns):
+        self._file.write(f"<h2>{html.escape(title)}</h2>\n<table><tr>"
+                         + "".join(f"<th>{html.escape(str(c))}</th>" for c in columns) + "</tr>\n")
+
+    def row(self, values):
+        self._file.write("<tr>" + "".join(
+            f"<td>{html.escape('' if value is None else str(value))}</td>" for value in values) + "</tr>\n")
+
+    def end_table(self):
+        self._file.write("</table>\n")
+
+    def finish(self):
+        self._file.write("</body></html>\n")
+        self._file.close()
+
+    def abort(self):
+        self._file.close()
+
+
+# Шрифты с кириллицей: встроенные шрифты PDF её не содержат
+_PDF_FONTS = (
+    os.getenv("REPORT_FONT", ""),
+    "C:/Windows/Fonts/arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+)
+
+
+class PDFWriter:
+    """
+    PDF через reportlab (необязательная зависимость). Перечни режутся на
+    таблицы по TABLE_ROWS строк: вёрстка одной огромной таблицы в
+    reportlab квадратична по памяти и времени.
+    """
+    TABLE_ROWS = 500
+
+    def __init__(self, path):
+        try:
+            from reportlab.lib import colors
+            from reportlab.lib.pagesizes import A4, landscape
+            from reportlab.lib.styles import getSampleStyleSheet
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+            from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+        except ImportError:
+            raise RuntimeError("Для отчётов в PDF установите пакет reportlab")
+        self._Paragraph, self._Spacer, self._Table = Paragraph, Spacer, Table
+
+        font = "Helvetica"
+        for candidate in _PDF_FONTS:
+            if candidate and Path(candidate).is_file():
+                if "ОтчётШрифт" not in pdfmetrics.getRegisteredFontNames():
+                    pdfmetrics.registerFont(TTFont("ОтчётШрифт", candidate))
+                font = "ОтчётШрифт"
+                break
+        else:
+            logging.warning("Шрифт с кириллицей не найден (REPORT_FONT), PDF может отображаться неверно")
+
+        styles = getSampleStyleSheet()
+        self._styles = {name: styles[name].clone(f"{name}-отчёт", fontName=font)
+                        for name in ("Title", "Heading2", "Normal")}
+        self._cell = styles["Normal"].clone("ячейка-отчёт", fontName=font, fontSize=7, leading=8)
+        self._style = TableStyle([
+            ("FONTNAME", (0, 0), (-1, -1), font),
+            ("FONTSIZE", (0, 0), (-1, -1), 7),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ])
+        self._document = SimpleDocTemplate(str(path), pagesize=landscape(A4))
+        self._story = []
+        self._columns = None
+        self._rows = []
+
+    def begin(self, title, subtitle):
+        self._story += [self._Paragraph(html.escape(title), self._styles["Title"]),
+                        self._Paragraph(html.escape(subtitle), self._styles["Normal"])]
+
+    def table(self, title, columns):
+        self._story += [self._Spacer(1, 8), self._Paragraph(html.escape(title), self._styles["Heading2"])]
+        self._columns = [str(column) for column in columns]
+        self._rows = []
+
+    def _flush(self):
+        if self._rows:
+            table = self._Table([self._columns] + self._rows, repeatRows=1)
+            table.setStyle(self._style)
+            self._story.append(table)
+            self._rows = []
+
+    def row(self, values):
+        self._rows.append([self._Paragraph(html.escape("" if value is None else str(value)), self._cell)
+                           for value in values])
+        if len(self._rows) >= self.TABLE_ROWS:
+            self._flush()
+
+    def end_table(self):
+        self._flush()
+
+    def finish(self):
+        self._document.build(self._story)
+
+    def abort(self):
+        self._story = []
+
+
+WRITERS = {"csv": CSVWriter, "html": HTMLWriter, "pdf": PDFWriter}
+
+
+# --- Формирование ---
+class ReportCancelled(Exception):
+    pass
+
+
+class ReportJob:
+    """
+    Задание на отчёт. run() выполняется в фоновом потоке над копией БД;
+    progress (0..1) и stage читает GUI. Посчитанные сводки закрытых
+    месяцев копятся в new_cache — их сохраняет store_cache() в UI-потоке.
+    """
+
+    def __init__(self, snapshot, template_key, months, fmt, path, today=None, generation=0):
+        if fmt not in WRITERS:
+            raise ValueError(f"Неизвестный формат: {fmt}")
+        self.snapshot = snapshot
+        self.template = TEMPLATES[template_key]
+        self.months = months
+        self.format = fmt
+        self.path = Path(path)
+        self.today = today
+        self.generation = generation     # ReportService.generation на момент копии БД
+        self.progress = 0.0
+        self.stage = "Подготовка"
+        self.new_cache = []              # (шаблон, раздел, период, данные)
+        self.cached_months = 0
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _check(self):
+        if self._cancelled.is_set():
+            raise ReportCancelled()
+
+    def _summaries(self, weight):
+        """Сводки разделов: закрытые месяцы из кэша, остальные — запросом"""
+        conn = self.snapshot
+        sections = [s for s in self.template.sections if isinstance(s, SummarySection)]
+        cached = {}
+        for section_key, month, data in conn.execute(
+                f"SELECT раздел, период, данные FROM КэшОтчетов WHERE шаблон = ? "
+                f"AND период IN ({','.join('?' * len(self.months))})", (self.template.key, *self.months)):
+            cached[(section_key, month)] = json.loads(data)
+
+        results = {}
+        steps = max(1, len(sections) * len(self.months))
+        done = 0
+        for section in sections:
+            parts = []
+            for month in self.months:
+                self._check()
+                self.stage = f"{section.title}: {month}"
+                rows = cached.get((section.key, month))
+                if rows is None:
+                    rows = section.compute(conn, month)
+                    if is_closed(month, self.today):
+                        self.new_cache.append((self.template.key, section.key, month, json.dumps(rows)))
+                else:
+                    self.cached_months += 1
+                parts.append(rows)
+                done += 1
+                self.progress = weight * done / steps
+            results[section.key] = SummarySection.merge(parts)
+        return results
+
+    def run(self):
+        """Формирует файл отчёта; возвращает путь"""
+        start, end = month_bounds(self.months[0])[0], month_bounds(self.months[-1])[1]
+        try:
+            summaries = self._summaries(weight=0.3)
+            lists = [s for s in self.template.sections if isinstance(s, ListSection)]
+            totals = {s.key: self.snapshot.execute(s.count_query, (start, end)).fetchone()[0] for s in lists}
+            total_rows = max(1, sum(totals.values()))
+
+            writer = WRITERS[self.format](self.path)
+            try:
+                period = self.months[0] if len(self.months) == 1 else f"{self.months[0]} — {self.months[-1]}"
+                writer.begin(self.template.title,
+                             f"Период: {period}. Сформирован: {datetime.datetime.now():%Y-%m-%d %H:%M}")
+                written = 0
+                for section in self.template.sections:
+                    writer.table(section.title, section.columns)
+                    if isinstance(section, SummarySection):
+                        for row in summaries[section.key]:
+                            writer.row(row)
+                    else:
+                        self.stage = section.title
+                        for row in self.snapshot.execute(section.query, (start, end)):
+                            writer.row(row)
+                            written += 1
+                            if written % 1000 == 0:
+                                self._check()
+                                self.progress = 0.3 + 0.6 * written / total_rows
+                    writer.end_table()
+                self.stage = "Запись файла"
+                self.progress = 0.9
+                writer.finish()
+            except BaseException:
+                writer.abort()
+                self.path.unlink(missing_ok=True)
+                raise
+        finally:
+            self.snapshot.close()
+        self.progress = 1.0
+        self.stage = "Готово"
+        return self.path
+
+
+class ReportService:
+    """Отчёты SecureDB: задания и кэш сводок (методы — из UI-потока)"""
+    SOURCE_TABLES = ("Инциденты", "ПаспортаИнцидентов", "Инцидент_Меры", *_REFERENCE_SECTIONS)
+
+    def __init__(self, db):
+        self.db = db
+        # Счётчик изменений исходных таблиц: если данные поменялись, пока
+        # отчёт считался по копии, его сводки в кэш не попадают
+        self.generation = 0
+        for table in self.SOURCE_TABLES:
+            db.subscribe(table, self._on_change)
+
+    def _on_change(self, table, operation, row_id):
+        self.generation += 1
+
+    def snapshot(self):
+        """Копия БД в памяти для фонового потока"""
+        copy = sqlite3.connect(":memory:", check_same_thread=False)
+        self.db.conn.backup(copy)
+        return copy
+
+    def create_job(self, template_key, kind, year, number, fmt, path) -> ReportJob:
+        months = report_months(kind, year, number)
+        return ReportJob(self.snapshot(), template_key, months, fmt, path, generation=self.generation)
+
+    def store_cache(self, job: ReportJob, username: str):
+        """Сохраняет сводки закрытых месяцев и пишет журнал"""
+        if job.generation != self.generation:
+            logging.info("Данные изменились во время формирования отчёта, сводки не кэшируются")
+            job.new_cache = []
+        with self.db.conn:
+            self.db.conn.executemany(
+                "INSERT INTO КэшОтчетов (шаблон, раздел, период, данные) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(шаблон, раздел, период) DO UPDATE SET данные = excluded.данные, "
+                "создан = CURRENT_TIMESTAMP",
+                job.new_cache
+            )
+            self.db._insert_audit([(
+                username, "КэшОтчетов", "Формирование отчёта", "шаблон", None,
+                f"{job.template.title}, {job.months[0]}–{job.months[-1]}, {job.format}", None
+            )])
+        logging.info(f"Отчёт {job.template.key} за {job.months[0]}–{job.months[-1]}: {job.path}, "
+                     f"месяцев из кэша {job.cached_months}, сохранено в кэш {len(job.new_cache)}")
+
+    def clear_cache(self):
+        with self.db.conn:
+            self.db.conn.execute("DELETE FROM КэшОтчетов")
@@ -0,0 +1,188 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import logging
+
+# История смены статусов и время реагирования. Всё поддерживается
+# постоянными триггерами, как и сводки в src.statistics:
+#   ПереходыСтатусов — запись на каждое изменение статуса (и начальный статус);
+#   ВремяРеагирования — по инциденту: обнаружен / принят в работу / закрыт;
+#   АгрегатыРеагирования — суммы и количества для MTTA (обнаружение -> первый
+#     уход из 'Открыт') и MTTR (обнаружение -> 'Закрыт') по измерениям
+#     'всего', 'организация', 'ответственный', 'критичность'.
+# Агрегаты меняются на каждом переходе, история для расчёта не сканируется.
+# Инцидент относится к организации/ответственному/критичности, которые были
+# у него в момент перехода. Повторное открытие закрытого инцидента вычитает
+# его вклад в MTTR (по сохранённым ключам), следующее закрытие добавляет снова.
+STATUS_OPEN = "Открыт"
+STATUS_CLOSED = "Закрыт"
+
+_TABLES = """
+    CREATE TABLE IF NOT EXISTS ПереходыСтатусов (
+        переход_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        инцидент_id INTEGER NOT NULL,
+        старый_статус_id INTEGER,
+        новый_статус_id INTEGER,
+        дата_перехода TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_переходы_инцидент ON ПереходыСтатусов(инцидент_id);
+    CREATE TABLE IF NOT EXISTS ВремяРеагирования (
+        инцидент_id INTEGER PRIMARY KEY,
+        обнаружен TEXT NOT NULL,
+        принят TEXT,
+        закрыт TEXT,
+        закрыт_организация INTEGER,
+        закрыт_ответственный INTEGER,
+        закрыт_критичность TEXT
+    );
+    CREATE TABLE IF NOT EXISTS АгрегатыРеагирования (
+        измерение TEXT NOT NULL,
+        ключ NOT NULL,
+        mtta_сумма REAL NOT NULL DEFAULT 0,
+        mtta_число INTEGER NOT NULL DEFAULT 0,
+        mttr_сумма REAL NOT NULL DEFAULT 0,
+        mttr_число INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (измерение, ключ)
+    );
+"""
+
+_STATUS = "(SELECT статус FROM СтатусыИнцидентов WHERE статус_инцидента_id = {id})"
+_TIMES = "(SELECT {column} FROM ВремяРеагирования WHERE инцидент_id = NEW.инцидент_id)"
+_INCIDENT = "(SELECT COALESCE({column}, 0) FROM Инциденты WHERE инцидент_id = NEW.инцидент_id)"
+_LEVEL = ("COALESCE((SELECT уровень_критичности FROM ПаспортаИнцидентов "
+          "WHERE инцидент_id = NEW.инцидент_id), '')")
+
+# Измерение -> (ключ в момент перехода, ключ, сохранённый при закрытии)
+_DIMENSIONS = {
+    "всего": ("0", "0"),
+    "организация": (_INCIDENT.format(column="организация_id"), _TIMES.format(column="закрыт_организация")),
+    "ответственный": (_INCIDENT.format(column="ответственный_id"), _TIMES.format(column="закрыт_ответственный")),
+    "критичность": (_LEVEL, _TIMES.format(column="закрыт_критичность")),
+}
+
+
+def _seconds(column):
+    return (f"(SELECT (julianday({column}) - julianday(обнаружен)) * 86400 "
+            f"FROM ВремяРеагирования WHERE инцидент_id = NEW.инцидент_id)")
+
+
+def _add(metric, seconds, count, stored_keys=False):
+    statements = []
+    for dimension, keys in _DIMENSIONS.items():
+        key = keys[1] if stored_keys else keys[0]
+        statements.append(
+            f"INSERT INTO АгрегатыРеагирования (измерение, ключ, {metric}_сумма, {metric}_число) "
+            f"VALUES ('{dimension}', {key}, {seconds}, {count}) "
+            f"ON CONFLICT(измерение, ключ) DO UPDATE SET "
+            f"{metric}_сумма = {metric}_сумма + excluded.{metric}_сумма, "
+            f"{metric}_число = {metric}_число + excluded.{metric}_число;"
+        )
+    return "\n".join(statements)
+
+
+def _triggers():
+    new_status = _STATUS.format(id="NEW.новый_статус_id")
+    old_status = _STATUS.format(id="NEW.старый_статус_id")
+    has_times = "EXISTS (SELECT 1 FROM ВремяРеагирования WHERE инцидент_id = NEW.инцидент_id AND {condition})"
+    return [
+        # Начальный статус и каждое изменение статуса попадают в историю
+        """
+        CREATE TRIGGER IF NOT EXISTS переход_инцидент_добавлен AFTER INSERT ON Инциденты
+        BEGIN
+            INSERT INTO ВремяРеагирования (инцидент_id, обнаружен)
+            VALUES (NEW.инцидент_id, COALESCE(NEW.дата_обнаружения, CURRENT_TIMESTAMP));
+            INSERT INTO ПереходыСтатусов (инцидент_id, старый_статус_id, новый_статус_id)
+            VALUES (NEW.инцидент_id, NULL, NEW.статус_инцидента_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS переход_статус_изменён
+        AFTER UPDATE OF статус_инцидента_id ON Инциденты
+        WHEN OLD.статус_инцидента_id IS NOT NEW.статус_инцидента_id
+        BEGIN
+            INSERT INTO ПереходыСтатусов (инцидент_id, старый_статус_id, новый_статус_id)
+            VALUES (NEW.инцидент_id, OLD.статус_инцидента_id, NEW.статус_инцидента_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS переход_инцидент_удалён AFTER DELETE ON Инциденты
+        BEGIN
+            DELETE FROM ВремяРеагирования WHERE инцидент_id = OLD.инцидент_id;
+        END
+        """,
+        # Первый уход из 'Открыт' — инцидент принят в работу (MTTA)
+        f"""
+        CREATE TRIGGER IF NOT EXISTS переход_принят AFTER INSERT ON ПереходыСтатусов
+        WHEN {new_status} != '{STATUS_OPEN}'
+             AND {has_times.format(condition="принят IS NULL")}
+        BEGIN
+            UPDATE ВремяРеагирования SET принят = NEW.дата_перехода WHERE инцидент_id = NEW.инцидент_id;
+            {_add("mtta", _seconds("принят"), 1)}
+        END
+        """,
+        # Закрытие (MTTR); ключи сохраняются для возможного повторного открытия
+        f"""
+        CREATE TRIGGER IF NOT EXISTS переход_закрыт AFTER INSERT ON ПереходыСтатусов
+        WHEN {new_status} = '{STATUS_CLOSED}'
+             AND {has_times.format(condition="закрыт IS NULL")}
+        BEGIN
+            UPDATE ВремяРеагирования
+            SET закрыт = NEW.дата_перехода,
+                закрыт_организация = {_DIMENSIONS["организация"][0]},
+                закрыт_ответственный = {_DIMENSIONS["ответственный"][0]},
+                закрыт_критичность = {_DIMENSIONS["критичность"][0]}
+            WHERE инцидент_id = NEW.инцидент_id;
+            {_add("mttr", _seconds("закрыт"), 1)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS переход_переоткрыт AFTER INSERT ON ПереходыСтатусов
+        WHEN {old_status} = '{STATUS_CLOSED}'
+             AND COALESCE({new_status}, '') != '{STATUS_CLOSED}'
+             AND {has_times.format(condition="закрыт IS NOT NULL")}
+        BEGIN
+            {_add("mttr", "-" + _seconds("закрыт"), -1, stored_keys=True)}
+            UPDATE ВремяРеагирования SET закрыт = NULL WHERE инцидент_id = NEW.инцидент_id;
+        END
+        """,
+    ]
+
+
+def ensure_response_metrics(conn):
+    """
+    Создаёт таблицы и триггеры времени реагирования, если их ещё нет.
+    Для уже существующих инцидентов история переходов неизвестна: время
+    отсчитывается только для тех, что сейчас в статусе 'Открыт'.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ВремяРеагирования'"
+    ).fetchone()
+    for statement in _TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    if not exists:
+        conn.execute(f"""
+            INSERT INTO ВремяРеагирования (инцидент_id, обнаружен)
+            SELECT и.инцидент_id, COALESCE(и.дата_обнаружения, CURRENT_TIMESTAMP)
+            FROM Инциденты и
+            WHERE {_STATUS.format(id="и.статус_инцидента_id")} = '{STATUS_OPEN}'
+        """)
+        logging.info("Создана история переходов статусов и агрегаты времени реагирования")
+    for statement in _triggers():
+        conn.execute(statement)
+
+
+def read_response_metrics(conn, dimension: str = "всего"):
+    """
+    Среднее время реагирования по измерению:
+    [(ключ, mtta_сек или None, число, mttr_сек или None, число)]
+    """
+    rows = conn.execute("""
+        SELECT ключ,
+               CASE WHEN mtta_число > 0 THEN mtta_сумма / mtta_число END, mtta_число,
+               CASE WHEN mttr_число > 0 THEN mttr_сумма / mttr_число END, mttr_число
+        FROM АгрегатыРеагирования
+        WHERE измерение = ? AND (mtta_число > 0 OR mttr_число > 0)
+        ORDER BY mttr_число DESC, mtta_число DESC
+    """, (dimension,))
+    return rows.fetchall()
@@ -0,0 +1,358 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import hashlib
+import logging
+import operator
+import re
+import threading
+from array import array
+
+from src.change_batch import ChangeBatcher
+
+# Поиск почти одинаковых инцидентов (повторы одного алерта) по MinHash/LSH.
+# Текст инцидента — название и поля паспорта — режется на символьные
+# 3-граммы; сигнатура — NUM_PERM минимумов хэшей шинглов (256 байт в
+# ИнцидентыСигнатуры). Доля совпавших позиций двух сигнатур оценивает
+# коэффициент Жаккара множеств шинглов. Сигнатура делится на BANDS полос
+# по ROWS значений: инциденты с одинаковой полосой попадают в одну корзину,
+# и сравниваются только они, а не все пары.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 3
+DEFAULT_THRESHOLD = 0.6
+# Для кластеров порог выше: объединение транзитивно, и при низком пороге
+# цепочки умеренно похожих инцидентов слипаются в один большой кластер.
+# Полосы длиннее (10 x 6): пары со сходством ~0.5 реже попадают в кандидаты
+# (15% против 64%), а пары от 0.8 находятся в 95% случаев
+CLUSTER_THRESHOLD = 0.8
+CLUSTER_BANDS = 10
+CLUSTER_ROWS = 6
+
+_WORDS = re.compile(r"\w+")
+
+_TABLES = """
+    CREATE TABLE IF NOT EXISTS ИнцидентыСигнатуры (
+        инцидент_id INTEGER PRIMARY KEY,
+        сигнатура BLOB NOT NULL,
+        FOREIGN KEY (инцидент_id) REFERENCES Инциденты(инцидент_id)
+    );
+    CREATE TABLE IF NOT EXISTS СвязанныеИнциденты (
+        инцидент_id INTEGER NOT NULL,
+        связанный_id INTEGER NOT NULL,
+        сходство REAL,
+        дата TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        username TEXT,
+        PRIMARY KEY (инцидент_id, связанный_id),
+        CHECK (инцидент_id < связанный_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_связанные_инциденты ON СвязанныеИнциденты(связанный_id);
+"""
+
+# Сохранённая сигнатура удаляется, как только меняется её исходный текст
+# (в любом сеансе, в том числе без обращений к индексу): при загрузке индекса
+# такие инциденты досчитываются как новые. Сигнатуры, сохранённые до
+# появления триггеров, могли устареть: при создании триггеров они сбрасываются.
+_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS сигнатуры_инцидент_изменён AFTER UPDATE OF название ON Инциденты
+    BEGIN
+        DELETE FROM ИнцидентыСигнатуры WHERE инцидент_id = NEW.инцидент_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS сигнатуры_инцидент_удалён AFTER DELETE ON Инциденты
+    BEGIN
+        DELETE FROM ИнцидентыСигнатуры WHERE инцидент_id = OLD.инцидент_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS сигнатуры_паспорт_добавлен AFTER INSERT ON ПаспортаИнцидентов
+    BEGIN
+        DELETE FROM ИнцидентыСигнатуры WHERE инцидент_id = NEW.инцидент_id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS сигнатуры_паспорт_изменён AFTER UPDATE ON ПаспортаИнцидентов
+    BEGIN
+        DELETE FROM ИнцидентыСигнатуры WHERE инцидент_id IN (OLD.инцидент_id, NEW.инцидент_id);
+    END;
+    CREATE TRIGGER IF NOT EXISTS сигнатуры_паспорт_удалён AFTER DELETE ON ПаспортаИнцидентов
+    BEGIN
+        DELETE FROM ИнцидентыСигнатуры WHERE инцидент_id = OLD.инцидент_id;
+    END;
+"""
+
+_TEXT_QUERY = """
+    SELECT и.инцидент_id, и.название, п.уровень_критичности, п.источник_угрозы, п.последствия,
+           п.тип_инцидента, п.категория_инцидента
+    FROM Инциденты и
+    LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+"""
+
+
+def ensure_similarity(conn):
+    """Создаёт таблицы сигнатур и связей инцидентов и триггеры сброса сигнатур"""
+    for statement in _TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    has_triggers = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'сигнатуры_инцидент_изменён'"
+    ).fetchone()
+    if not has_triggers:
+        conn.execute("DELETE FROM ИнцидентыСигнатуры")
+    for part in _TRIGGERS.split("END;"):
+        if part.strip():
+            conn.execute(part.strip() + " END")
+
+
+def shingles(text: str) -> set:
+    """Символьные 3-граммы нормализованного текста (регистр, ё, пунктуация)"""
+    normalized = " ".join(_WORDS.findall(text.lower().replace("ё", "е")))
+    if len(normalized) <= SHINGLE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + SHINGLE] for i in range(len(normalized) - SHINGLE + 1)}
+
+
+def signature(text: str):
+    """
+    MinHash-сигнатура текста (bytes) или None для пустого текста.
+    NUM_PERM независимых хэшей шингла дают 256 байт SHAKE-128 за один вызов,
+    а минимумы по позициям считает zip/min без цикла на Python.
+    """
+    items = shingles(text)
+    if not items:
+        return None
+    hashes = [array("I", hashlib.shake_128(item.encode("utf-8")).digest(NUM_PERM * 4)) for item in items]
+    return array("I", map(min, zip(*hashes))).tobytes()
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Оценка коэффициента Жаккара по двум сигнатурам"""
+    return sum(map(operator.eq, array("I", a), array("I", b))) / NUM_PERM
+
+
+def incident_text(row) -> str:
+    """Текст для сигнатуры: название и заполненные поля паспорта"""
+    return " ".join(value for value in row if value)
+
+
+class LSHIndex:
+    """Корзины LSH: (полоса, её байты) -> ID инцидентов"""
+
+    def __init__(self, bands: int = BANDS, rows: int = ROWS):
+        self.signatures = {}
+        self._buckets = {}
+        self._bands = [(band, band * rows * 4, (band + 1) * rows * 4) for band in range(bands)]
+
+    def _band_keys(self, sig: bytes):
+        return [(band, sig[start:end]) for band, start, end in self._bands]
+
+    def add(self, key, sig: bytes):
+        self.remove(key)
+        self.signatures[key] = sig
+        for bucket_key in self._band_keys(sig):
+            self._buckets.setdefault(bucket_key, set()).add(key)
+
+    def remove(self, key):
+        sig = self.signatures.pop(key, None)
+        if sig is None:
+            return
+        for bucket_key in self._band_keys(sig):
+            bucket = self._buckets[bucket_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[bucket_key]
+
+    def candidates(self, sig: bytes) -> set:
+        found = set()
+        for bucket_key in self._band_keys(sig):
+            found |= self._buckets.get(bucket_key, set())
+        return found
+
+    def query(self, sig: bytes, threshold: float = DEFAULT_THRESHOLD, exclude=None):
+        """Похожие: [(ID, сходство)] по убыванию сходства"""
+        found = [
+            (key, similarity(sig, self.signatures[key]))
+            for key in self.candidates(sig) if key != exclude
+        ]
+        return sorted([item for item in found if item[1] >= threshold], key=lambda item: (-item[1], item[0]))
+
+    def pairs(self, threshold: float = DEFAULT_THRESHOLD, skip=None):
+        """
+        Пары (a, b, сходство), a < b, из общих корзин — без перебора всех пар.
+        skip(a, b) позволяет не сравнивать заведомо ненужную пару.
+        """
+        seen = set()
+        for members in self._buckets.values():
+            if len(members) < 2:
+                continue
+            members = sorted(members)
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    if (a, b) in seen or (skip is not None and skip(a, b)):
+                        continue
+                    seen.add((a, b))
+                    score = similarity(self.signatures[a], self.signatures[b])
+                    if score >= threshold:
+                        yield a, b, score
+
+
+def cluster(signatures: dict, threshold: float = CLUSTER_THRESHOLD):
+    """
+    Кластеры почти одинаковых инцидентов по всей истории (без БД — можно
+    в фоне). Пары из LSH объединяются системой непересекающихся множеств.
+    Возвращает (кластеры — списки ID по возрастанию, длиной от 2;
+    связи для link() — пары, объединившие кластер, по одной на инцидент
+    кроме первого).
+    """
+    index = LSHIndex(CLUSTER_BANDS, CLUSTER_ROWS)
+    for key, sig in signatures.items():
+        index.add(key, sig)
+
+    parent = {}
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:     # сжатие путей
+            parent[x], x = root, parent[x]
+        return root
+
+    def same_cluster(a, b):
+        return a in parent and b in parent and find(a) == find(b)
+
+    links = []
+    # Пары внутри уже собранного кластера не сравниваются
+    for a, b, score in index.pairs(threshold, skip=same_cluster):
+        parent.setdefault(a, a)
+        parent.setdefault(b, b)
+        root_a, root_b = find(a), find(b)
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+        links.append((a, b, score))
+
+    groups = {}
+    for key in parent:
+        groups.setdefault(find(key), []).append(key)
+    clusters = sorted((sorted(members) for members in groups.values()),
+                      key=lambda members: (-len(members), members[0]))
+    return clusters, links
+
+
+class SimilarityIndex:
+    """
+    Индекс похожих инцидентов SecureDB. Сигнатуры хранятся в БД, корзины —
+    в памяти; изменённые инциденты и паспорта пересчитываются при следующем
+    запросе (ChangeBatcher). Вызывать из UI-потока.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._index = None
+        self._lock = threading.RLock()
+        self._changes = ChangeBatcher(db, None, ("Инциденты", "ПаспортаИнцидентов"))
+
+    def _compute(self, where: str = "", params=()):
+        rows = self.db.conn.execute(_TEXT_QUERY + where, params).fetchall()
+        return [(row[0], signature(incident_text(row[1:]))) for row in rows]
+
+    def _store(self, computed):
+        with self.db.conn:
+            self.db.conn.executemany(
+                "INSERT INTO ИнцидентыСигнатуры (инцидент_id, сигнатура) VALUES (?, ?) "
+                "ON CONFLICT(инцидент_id) DO UPDATE SET сигнатура = excluded.сигнатура",
+                [item for item in computed if item[1] is not None]
+            )
+            self.db.conn.executemany(
+                "DELETE FROM ИнцидентыСигнатуры WHERE инцидент_id = ?",
+                [(key,) for key, sig in computed if sig is None]
+            )
+
+    def index(self) -> LSHIndex:
+        """Актуальный индекс: при первом обращении загружает сигнатуры, потом досчитывает изменённые"""
+        with self._lock:
+            changed = self._changes.take()
+            if self._index is None:
+                # Изменённые с запуска инциденты триггеры уже лишили сигнатур:
+                # они досчитываются вместе с отсутствующими
+                self._index = LSHIndex()
+                missing = self._compute(
+                    " WHERE и.инцидент_id NOT IN (SELECT инцидент_id FROM ИнцидентыСигнатуры)")
+                if missing:
+                    self._store(missing)
+                for key, sig in self.db.conn.execute("SELECT инцидент_id, сигнатура FROM ИнцидентыСигнатуры"):
+                    self._index.add(key, sig)
+                logging.info(f"Индекс похожих инцидентов загружен: {len(self._index.signatures)}, "
+                             f"досчитано сигнатур {len(missing)}")
+            elif changed:
+                changed = sorted(changed)
+                computed = dict.fromkeys(changed)    # удалённых инцидентов в выборке нет -> None
+                for start in range(0, len(changed), 500):
+                    part = changed[start:start + 500]
+                    computed.update(self._compute(
+                        f" WHERE и.инцидент_id IN ({','.join('?' * len(part))})", part))
+                self._store(list(computed.items()))
+                for key, sig in computed.items():
+                    if sig is None:
+                        self._index.remove(key)
+                    else:
+                        self._index.add(key, sig)
+            return self._index
+
+    def similar_to_text(self, text: str, threshold: float = DEFAULT_THRESHOLD, limit: int = 5):
+        """Похожие на ещё не созданный инцидент: [(ID, сходство)]"""
+        sig = signature(text)
+        if sig is None:
+            return []
+        return self.index().query(sig, threshold)[:limit]
+
+    def similar(self, инцидент_id, threshold: float = DEFAULT_THRESHOLD, limit: int = 10):
+        index = self.index()
+        sig = index.signatures.get(инцидент_id)
+        if sig is None:
+            return []
+        return index.query(sig, threshold, exclude=инцидент_id)[:limit]
+
+    def snapshot(self) -> dict:
+        """Копия сигнатур для cluster() в фоновом потоке"""
+        return dict(self.index().signatures)
+
+    # --- Связи ---
+    def link(self, pairs, username: str) -> int:
+        """Сохраняет связи [(a, b, сходство)]; уже связанные пары пропускаются"""
+        added = []
+        with self.db.conn:
+            for a, b, score in pairs:
+                if a == b:
+                    continue
+                a, b = min(a, b), max(a, b)
+                cursor = self.db.conn.execute(
+                    "INSERT OR IGNORE INTO СвязанныеИнциденты (инцидент_id, связанный_id, сходство, username) "
+                    "VALUES (?, ?, ?, ?)", (a, b, score, username)
+                )
+                if cursor.rowcount:
+                    added.append((a, b))
+            if len(added) <= 100:
+                self.db._insert_audit([
+                    (username, "СвязанныеИнциденты", "Связывание", "связанный_id", None, str(b), a)
+                    for a, b in added
+                ])
+            else:
+                self.db._insert_audit([
+                    (username, "СвязанныеИнциденты", "Связывание похожих", None, None, f"связей: {len(added)}", None)
+                ])
+        return len(added)
+
+    def unlink(self, a, b, username: str):
+        with self.db.conn:
+            cursor = self.db.conn.execute(
+                "DELETE FROM СвязанныеИнциденты WHERE инцидент_id = ? AND связанный_id = ?", (min(a, b), max(a, b))
+            )
+            if cursor.rowcount:
+                self.db._insert_audit([
+                    (username, "СвязанныеИнциденты", "Удаление связи", "связанный_id", str(max(a, b)), None, min(a, b))
+                ])
+
+    def links(self, инцидент_id):
+        """Связанные инциденты: [(ID, сходство)]"""
+        return self.db.conn.execute(
+            "SELECT связанный_id, сходство FROM СвязанныеИнциденты WHERE инцидент_id = ? "
+            "UNION ALL SELECT инцидент_id, сходство FROM СвязанныеИнциденты WHERE связанный_id = ? "
+            "ORDER BY 1",
+            (инцидент_id, инцидент_id)
+        ).fetchall()
@@ -0,0 +1,196 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import calendar
+import datetime
+import heapq
+import logging
+import time
+
+from src.change_batch import ChangeBatcher
+from src.response_metrics import STATUS_OPEN
+
+STATUS_IN_PROGRESS = "В работе"
+
+# Срок (в часах) пребывания в статусе по уровню критичности паспорта.
+# Уровень сравнивается без учёта регистра; неизвестный — по DEFAULT_LEVEL.
+SLA_HOURS = {
+    "критический": {STATUS_OPEN: 0.25, STATUS_IN_PROGRESS: 4},
+    "высокий": {STATUS_OPEN: 1, STATUS_IN_PROGRESS: 8},
+    "средний": {STATUS_OPEN: 4, STATUS_IN_PROGRESS: 24},
+    "низкий": {STATUS_OPEN: 24, STATUS_IN_PROGRESS: 72},
+}
+DEFAULT_LEVEL = "средний"
+
+ESCALATION_ACTION = "Эскалация SLA"
+ESCALATION_USER = "SLA"
+
+# Состояние инцидента для расчёта срока: статус, уровень и время входа в статус
+# (время последней смены статуса, а для начального статуса — время обнаружения)
+_STATE_QUERY = f"""
+    SELECT и.инцидент_id, с.статус, п.уровень_критичности,
+           COALESCE(
+               (SELECT дата_перехода FROM ПереходыСтатусов
+                WHERE инцидент_id = и.инцидент_id AND старый_статус_id IS NOT NULL
+                ORDER BY переход_id DESC LIMIT 1),
+               и.дата_обнаружения
+           ) AS с_момента,
+           EXISTS (
+               SELECT 1 FROM ИсторияИзменений ж
+               WHERE ж.объект_id = и.инцидент_id AND ж.таблица = 'Инциденты'
+                 AND ж.действие = '{ESCALATION_ACTION}'
+                 AND ж.дата_изменения > COALESCE(
+                     (SELECT дата_перехода FROM ПереходыСтатусов
+                      WHERE инцидент_id = и.инцидент_id AND старый_статус_id IS NOT NULL
+                      ORDER BY переход_id DESC LIMIT 1),
+                     и.дата_обнаружения)
+           ) AS эскалирован
+    FROM Инциденты и
+    JOIN СтатусыИнцидентов с ON с.статус_инцидента_id = и.статус_инцидента_id
+    LEFT JOIN ПаспортаИнцидентов п ON п.инцидент_id = и.инцидент_id
+    WHERE с.статус IN ('{STATUS_OPEN}', '{STATUS_IN_PROGRESS}')
+"""
+
+
+def _timestamp(value) -> float:
+    """Время из БД (UTC, 'ГГГГ-ММ-ДД[ ЧЧ:ММ:СС]') в секунды эпохи"""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return calendar.timegm(datetime.datetime.strptime(str(value)[:19], fmt).timetuple())
+        except ValueError:
+            continue
+    return time.time()
+
+
+def sla_seconds(level, status):
+    hours = SLA_HOURS.get((level or "").strip().lower(), SLA_HOURS[DEFAULT_LEVEL])
+    return hours[status] * 3600
+
+
+class SLAEngine:
+    """
+    Планировщик эскалаций по SLA.
+
+    Хранит кучу (срок, инцидент_id, версия) для открытых инцидентов и
+    ставит один таймер after() на ближайший срок. Изменение инцидента или
+    паспорта (через SecureDB.subscribe) кладёт в кучу новую запись с новой
+    версией за O(log n); устаревшие записи отбрасываются при извлечении.
+    Эскалация пишется в ИсторияИзменений один раз на пребывание в статусе.
+    """
+    MAX_SLEEP_MS = 60000   # таймер не спит дольше: подбирает изменения из фоновых потоков
+
+    def __init__(self, db, root, on_escalation=None):
+        self.db = db
+        self.root = root
+        self.on_escalation = on_escalation
+
+        self._heap = []
+        self._versions = {}     # инцидент_id -> версия актуальной записи в куче
+        self._deadlines = {}    # инцидент_id -> (срок, статус, уровень)
+        self._job = None
+        self._stopped = False
+
+        self._changes = ChangeBatcher(db, root, ("Инциденты", "ПаспортаИнцидентов"), self._on_changes)
+
+    def start(self):
+        """Загружает сроки открытых инцидентов одним запросом и ставит таймер"""
+        for row in self.db.conn.execute(_STATE_QUERY):
+            self._apply_state(row)
+        logging.info(f"SLA: отслеживается инцидентов: {len(self._deadlines)}")
+        self._reschedule()
+
+    def stop(self):
+        self._stopped = True
+        self._changes.stop()
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    # --- Изменения ---
+    def _on_changes(self, incident_ids):
+        self._apply_changes(incident_ids)
+        self._reschedule()
+
+    def _apply_changes(self, incident_ids):
+        """Пересчитывает сроки изменённых инцидентов одним запросом на пачку"""
+        if not incident_ids:
+            return
+        ids = sorted(incident_ids)
+        states = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            query = _STATE_QUERY + f" AND и.инцидент_id IN ({', '.join('?' * len(chunk))})"
+            for row in self.db.conn.execute(query, chunk):
+                states[row[0]] = row
+        for incident_id in ids:
+            state = states.get(incident_id)
+            if state is None:
+                # Закрыт или удалён: запись в куче станет устаревшей
+                self._versions.pop(incident_id, None)
+                self._deadlines.pop(incident_id, None)
+            else:
+                self._apply_state(state)
+
+    def _apply_state(self, row):
+        incident_id, status, level, since, escalated = row
+        deadline = _timestamp(since) + sla_seconds(level, status)
+        if self._deadlines.get(incident_id, (None,))[0] == deadline and incident_id in self._versions:
+            return
+        version = self._versions.get(incident_id, 0) + 1
+        self._versions[incident_id] = version
+        self._deadlines[incident_id] = (deadline, status, level)
+        if not escalated:
+            heapq.heappush(self._heap, (deadline, incident_id, version))
+
+    # --- Таймер ---
+    def _reschedule(self):
+        if self._stopped:
+            return
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+        self._drop_stale()
+        delay_ms = self.MAX_SLEEP_MS
+        if self._heap:
+            delay_ms = min(delay_ms, max(0, int((self._heap[0][0] - time.time()) * 1000)))
+        self._job = self.root.after(delay_ms, self._on_timer)
+
+    def _drop_stale(self):
+        while self._heap and self._versions.get(self._heap[0][1]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+
+    def _on_timer(self):
+        self._job = None
+        # Изменения из фоновых потоков планировщик не будит — забираем их здесь
+        self._apply_changes(self._changes.take())
+        now = time.time()
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, incident_id, version = heapq.heappop(self._heap)
+            if self._versions.get(incident_id) == version:
+                expired.append(incident_id)
+        if expired:
+            self._escalate(expired)
+        self._reschedule()
+
+    def _escalate(self, incident_ids):
+        entries = []
+        for incident_id in incident_ids:
+            deadline, status, level = self._deadlines[incident_id]
+            entries.append((
+                ESCALATION_USER, "Инциденты", ESCALATION_ACTION, status,
+                datetime.datetime.fromtimestamp(deadline, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                f"критичность: {level or 'не указана'}", incident_id
+            ))
+        try:
+            self.db.log_changes(entries)
+        except Exception as e:
+            logging.error(f"SLA: не удалось записать эскалации: {e}")
+            return
+        logging.warning(f"SLA: просрочено инцидентов: {len(incident_ids)}")
+        if self.on_escalation:
+            for incident_id in incident_ids:
+                self.on_escalation(incident_id, *self._deadlines[incident_id])
+
+    def pending(self):
+        """Сроки отслеживаемых инцидентов: [(срок, инцидент_id)] по возрастанию"""
+        return sorted((deadline, incident_id) for incident_id, (deadline, _, _) in self._deadlines.items())
@@ -0,0 +1,152 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import logging
+
+# Сводные таблицы статистики инцидентов. Поддерживаются постоянными
+# триггерами (сохраняются в зашифрованном файле вместе с БД), поэтому
+# чтение сводки не зависит от количества инцидентов.
+#   СтатистикаИнцидентов: (измерение, ключ) -> количество;
+#     измерения 'всего' (ключ 0), 'статус', 'организация', 'ответственный'
+#     (ключ — ID, 0 если не задан) и 'критичность' (ключ — уровень из паспорта)
+#   СтатистикаПоДням: день обнаружения -> количество
+NO_DATE = "без даты"
+
+_TABLES = """
+    CREATE TABLE IF NOT EXISTS СтатистикаИнцидентов (
+        измерение TEXT NOT NULL,
+        ключ NOT NULL,
+        количество INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (измерение, ключ)
+    );
+    CREATE TABLE IF NOT EXISTS СтатистикаПоДням (
+        день TEXT PRIMARY KEY,
+        количество INTEGER NOT NULL DEFAULT 0
+    );
+"""
+
+# Измерения инцидента: имя -> выражение от строки ({row} = NEW/OLD)
+_INCIDENT_DIMENSIONS = {
+    "всего": "0",
+    "статус": "COALESCE({row}.статус_инцидента_id, 0)",
+    "организация": "COALESCE({row}.организация_id, 0)",
+    "ответственный": "COALESCE({row}.ответственный_id, 0)",
+}
+_DAY = f"COALESCE(date({{row}}.дата_обнаружения), '{NO_DATE}')"
+_CRITICALITY = "COALESCE({row}.уровень_критичности, '')"
+
+
+def _bump(dimension, key, delta):
+    return (f"INSERT INTO СтатистикаИнцидентов (измерение, ключ, количество) "
+            f"VALUES ('{dimension}', {key}, {delta}) "
+            f"ON CONFLICT(измерение, ключ) DO UPDATE SET количество = количество + excluded.количество;")
+
+
+def _bump_day(day, delta):
+    return (f"INSERT INTO СтатистикаПоДням (день, количество) VALUES ({day}, {delta}) "
+            f"ON CONFLICT(день) DO UPDATE SET количество = количество + excluded.количество;")
+
+
+def _incident_statements(row, delta):
+    statements = [_bump(name, expr.format(row=row), delta) for name, expr in _INCIDENT_DIMENSIONS.items()]
+    statements.append(_bump_day(_DAY.format(row=row), delta))
+    return "\n".join(statements)
+
+
+def _triggers():
+    add_incident = _incident_statements("NEW", 1)
+    remove_incident = _incident_statements("OLD", -1)
+    add_level = _bump("критичность", _CRITICALITY.format(row="NEW"), 1)
+    remove_level = _bump("критичность", _CRITICALITY.format(row="OLD"), -1)
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS стат_инцидент_добавлен AFTER INSERT ON Инциденты
+        BEGIN
+            {add_incident}
+        END;
+        CREATE TRIGGER IF NOT EXISTS стат_инцидент_удалён AFTER DELETE ON Инциденты
+        BEGIN
+            {remove_incident}
+        END;
+        CREATE TRIGGER IF NOT EXISTS стат_инцидент_изменён
+        AFTER UPDATE OF статус_инцидента_id, организация_id, ответственный_id, дата_обнаружения ON Инциденты
+        BEGIN
+            {remove_incident}
+            {add_incident}
+        END;
+        CREATE TRIGGER IF NOT EXISTS стат_паспорт_добавлен AFTER INSERT ON ПаспортаИнцидентов
+        BEGIN
+            {add_level}
+        END;
+        CREATE TRIGGER IF NOT EXISTS стат_паспорт_удалён AFTER DELETE ON ПаспортаИнцидентов
+        BEGIN
+            {remove_level}
+        END;
+        CREATE TRIGGER IF NOT EXISTS стат_паспорт_изменён
+        AFTER UPDATE OF уровень_критичности ON ПаспортаИнцидентов
+        BEGIN
+            {remove_level}
+            {add_level}
+        END;
+    """
+
+
+def _backfill(conn):
+    """Однократно заполняет сводки по уже существующим данным"""
+    for name, expr in _INCIDENT_DIMENSIONS.items():
+        conn.execute(f"""
+            INSERT INTO СтатистикаИнцидентов (измерение, ключ, количество)
+            SELECT '{name}', {expr.format(row='и')}, COUNT(*) FROM Инциденты и GROUP BY 2
+        """)
+    conn.execute(f"""
+        INSERT INTO СтатистикаПоДням (день, количество)
+        SELECT {_DAY.format(row='и')}, COUNT(*) FROM Инциденты и GROUP BY 1
+    """)
+    conn.execute(f"""
+        INSERT INTO СтатистикаИнцидентов (измерение, ключ, количество)
+        SELECT 'критичность', {_CRITICALITY.format(row='п')}, COUNT(*) FROM ПаспортаИнцидентов п GROUP BY 2
+    """)
+
+
+def ensure_statistics(conn):
+    """
+    Создаёт сводные таблицы и триггеры, если их ещё нет.
+    Вызывается внутри транзакции миграции схемы.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'СтатистикаИнцидентов'"
+    ).fetchone()
+    for statement in _TABLES.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    if not exists:
+        _backfill(conn)
+        logging.info("Сводная статистика инцидентов построена по существующим данным")
+    for statement in _split_triggers(_triggers()):
+        conn.execute(statement)
+
+
+def _split_triggers(script):
+    """Разбивает скрипт на CREATE TRIGGER ... END (внутри триггера есть ';')"""
+    return [part.strip() + " END" for part in script.split("END;") if part.strip()]
+
+
+def read_statistics(conn, days: int = 14):
+    """
+    Сводка для панели: {'всего': n, 'статус': [(ключ, n)], ..., 'по_дням': [(день, n)]}.
+    Читает только сводные таблицы.
+    """
+    summary = {"всего": 0, "статус": [], "организация": [], "ответственный": [], "критичность": []}
+    rows = conn.execute(
+        "SELECT измерение, ключ, количество FROM СтатистикаИнцидентов "
+        "WHERE количество > 0 ORDER BY измерение, количество DESC"
+    ).fetchall()
+    for dimension, key, count in rows:
+        if dimension == "всего":
+            summary["всего"] = count
+        elif dimension in summary:
+            summary[dimension].append((key, count))
+    summary["по_дням"] = conn.execute(
+        "SELECT день, количество FROM СтатистикаПоДням WHERE количество > 0 AND день != ? "
+        "ORDER BY день DESC LIMIT ?", (NO_DATE, days)
+    ).fetchall()[::-1]
+    return summary
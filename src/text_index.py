@@ -0,0 +1,75 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import bisect
+import re
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class NameIndex:
+    """
+    Индекс названий для автодополнения.
+
+    Хранит два отсортированных массива: полные названия и отдельные слова
+    (в нижнем регистре). Совпадения по началу названия и по началу слова
+    находятся двоичным поиском; полный перебор подстрок выполняется только
+    если этих совпадений меньше, чем нужно показать.
+    """
+
+    def __init__(self, items):
+        """items — пары (id, название)"""
+        self._names = {}
+        full = []
+        words = []
+        for item_id, name in items:
+            if name is None:
+                continue
+            self._names[item_id] = name
+            lowered = name.lower()
+            full.append((lowered, item_id))
+            for match in _WORD_RE.finditer(lowered):
+                if match.start() > 0:
+                    words.append((match.group(), item_id))
+        full.sort()
+        words.sort()
+        self._full = full
+        self._full_keys = [key for key, _ in full]
+        self._words = words
+        self._word_keys = [key for key, _ in words]
+
+    def __len__(self):
+        return len(self._full)
+
+    @staticmethod
+    def _prefix_scan(keys, pairs, prefix, limit, seen, out):
+        start = bisect.bisect_left(keys, prefix)
+        for index in range(start, len(keys)):
+            if len(out) >= limit or not keys[index].startswith(prefix):
+                break
+            item_id = pairs[index][1]
+            if item_id not in seen:
+                seen.add(item_id)
+                out.append(item_id)
+
+    def search(self, query: str, limit: int = 15):
+        """
+        Возвращает до limit пар (id, название): сначала совпадения по началу
+        названия, затем по началу слова, затем по произвольной подстроке.
+        """
+        query = query.strip().lower()
+        if not query:
+            return [(item_id, self._names[item_id]) for _, item_id in self._full[:limit]]
+
+        seen = set()
+        out = []
+        self._prefix_scan(self._full_keys, self._full, query, limit, seen, out)
+        self._prefix_scan(self._word_keys, self._words, query, limit, seen, out)
+        if len(out) < limit:
+            for lowered, item_id in self._full:
+                if query in lowered and item_id not in seen:
+                    seen.add(item_id)
+                    out.append(item_id)
+                    if len(out) >= limit:
+                        break
+        return [(item_id, self._names[item_id]) for item_id in out]
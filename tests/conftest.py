@@ -0,0 +1,28 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import pytest
+from cryptography.fernet import Fernet
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Новая SecureDB во временном каталоге (бэкапы — туда же)"""
+    monkeypatch.setenv("DB_ENCRYPTION_KEY", Fernet.generate_key().decode())
+    monkeypatch.setenv("LOG_HMAC_KEY", "test")
+    monkeypatch.setenv("PASSWORD_HMAC_KEY", "test")
+    monkeypatch.chdir(tmp_path)
+
+    from src.database import SecureDB
+
+    database = SecureDB(tmp_path / "incidents.db.enc")
+    yield database
+    database.conn.close()
+
+
+@pytest.fixture
+def organizations(db):
+    """Три организации: ID 1..3 (внешний ключ инцидентов)"""
+    with db.conn:
+        db.conn.executemany("INSERT INTO Организации (название) VALUES (?)", [("О1",), ("О2",), ("О3",)])
+    return [1, 2, 3]
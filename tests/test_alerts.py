@@ -0,0 +1,39 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import pytest
+
+from src.alerts import AlertLog
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_HMAC_KEY", "test")
+    return tmp_path / "alerts.log"
+
+
+def _entry(number, text="сообщение"):
+    return {"время": "2025-01-01 00:00:00", "правило": "Правило", "инцидент_id": number, "сообщение": text}
+
+
+def test_chain_continues_after_long_last_line(log_path):
+    # Последняя строка длиннее куска чтения с конца
+    AlertLog(log_path).append([_entry(1), _entry(2, "длинное поле паспорта " * 1000)])
+    AlertLog(log_path).append([_entry(3)])
+    assert AlertLog(log_path).verify()
+
+
+def test_verify_detects_changes_and_malformed_lines(log_path):
+    AlertLog(log_path).append([_entry(number) for number in range(5)])
+    lines = log_path.read_text(encoding="utf-8").splitlines(keepends=True)
+
+    log_path.write_text("".join(lines[:2] + lines[3:]), encoding="utf-8")
+    assert not AlertLog(log_path).verify()
+
+    log_path.write_text("".join(lines[:4]) + "{не json\n", encoding="utf-8")
+    assert not AlertLog(log_path).verify()
+
+    log_path.write_text("".join(lines) + "[]\n", encoding="utf-8")
+    assert not AlertLog(log_path).verify()
+
+    assert AlertLog(log_path.with_name("нет.log")).verify()
@@ -0,0 +1,111 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import datetime
+import random
+from collections import Counter
+
+import numpy as np
+
+from src.analytics import AnalyticsSnapshot, Frame, floor_time
+
+LEVELS = ["Критический", "Высокий", "Низкий"]
+
+
+def _rows(snapshot):
+    """Живые строки снимка по инцидент_id с расшифрованными значениями"""
+    frame = snapshot.incidents
+    alive = frame.columns["alive"]
+    result = {}
+    for i in np.flatnonzero(alive):
+        row = {name: frame.decode(name, frame.columns[name][i].item()) if name in frame.dictionaries
+               else frame.columns[name][i].item() for name in frame.schema}
+        result[row.pop("инцидент_id")] = row
+    return result
+
+
+def test_incremental_refresh_matches_full_rebuild(db, organizations):
+    rng = random.Random(17)
+    snapshot = AnalyticsSnapshot(db)
+    snapshot.COMPACT_RATIO = 0.1          # уплотнение тоже проверяется
+    snapshot.refresh()
+
+    incidents = []
+    for step in range(300):
+        action = rng.random()
+        if action < 0.35 or not incidents:
+            detected = datetime.date(2024, 1, 1) + datetime.timedelta(days=rng.randrange(400))
+            incident_id = db.add_incident(f"Инцидент {step}", detected.isoformat(), rng.choice([1, 2]),
+                                          rng.choice(organizations))
+            if rng.random() < 0.7:
+                db.add_passport(incident_id, rng.choice(LEVELS), "", "", rng.choice(["Фишинг", "DDoS"]), "")
+            incidents.append(incident_id)
+        elif action < 0.55:
+            db.update_incident_status(rng.choice(incidents), rng.choice([1, 2, 3]))
+        elif action < 0.7:
+            db.update_incident(rng.choice(incidents), организация_id=rng.choice(organizations))
+        elif action < 0.85:
+            db.log_change("test", rng.choice(["Инциденты", "Инцидент_Меры", "Система"]), "Изменение",
+                          объект_id=rng.choice(incidents))
+        else:
+            victim = incidents.pop(rng.randrange(len(incidents)))
+            db.bulk_delete_incidents([victim], "test")
+        if rng.random() < 0.1:
+            snapshot.refresh()
+
+    snapshot.refresh()
+    rebuilt = AnalyticsSnapshot(db).refresh()
+
+    assert _rows(snapshot) == _rows(rebuilt)
+    assert snapshot.watermark == rebuilt.watermark
+    keys = ("организация", "месяц", "критичность")
+    assert sorted(snapshot.incidents_by(keys), key=repr) == sorted(rebuilt.incidents_by(keys), key=repr)
+    assert (sorted(snapshot.audit_by(("таблица", "действие")))
+            == sorted(rebuilt.audit_by(("таблица", "действие"))))
+
+
+def test_group_count_matches_brute_force():
+    rng = random.Random(2)
+    for size, spread in ((500, 4), (300, 1000)):         # плотные и разреженные сочетания ключей
+        frame = Frame({"a": np.int32, "b": np.int32, "c": np.int32}, dictionary_columns=("c",))
+        names = [f"v{n}" for n in range(spread)] + [None]
+        rows = [(rng.randrange(spread), rng.randrange(spread), rng.choice(names)) for _ in range(size)]
+        frame.append({"a": [a for a, _, _ in rows], "b": [b for _, b, _ in rows],
+                      "c": frame.dictionaries["c"].encode_many([c for _, _, c in rows])})
+        frame.columns["alive"][::5] = False
+
+        expected = Counter((a, b, c) for i, (a, b, c) in enumerate(rows) if i % 5)
+        result = frame.group_count(("a", "b", "c"))
+        assert {values: count for values, count in result} == expected
+        counts = [count for _, count in result]
+        assert counts == sorted(counts, reverse=True)
+
+
+def test_floor_time_week_starts_on_monday():
+    days = np.arange(np.datetime64("2025-01-01"), np.datetime64("2025-03-01")).astype("datetime64[s]")
+    weeks = floor_time(days, "W")
+    assert all(week.astype(datetime.date).weekday() == 0 for week in weeks)
+    assert all(np.timedelta64(0, "D") <= day - week < np.timedelta64(7, "D") for day, week in zip(days, weeks))
+
+
+def test_recent_series_is_anchored_and_zero_filled(db, organizations):
+    today = datetime.date(2025, 3, 12)                   # среда
+    for detected, level in (("2025-03-10", "Высокий"), ("2025-03-12", "Высокий"), ("2025-02-24", "Низкий"),
+                            ("2024-12-01", "Высокий"), ("2025-03-17", "Высокий")):
+        incident_id = db.add_incident("Инцидент", detected, 1, 1)
+        db.add_passport(incident_id, level, "", "", "", "")
+
+    snapshot = AnalyticsSnapshot(db)
+    starts, series = snapshot.recent_series("неделя", 4, by="критичность", today=today)
+    assert [str(start)[:10] for start in starts] == ["2025-02-17", "2025-02-24", "2025-03-03", "2025-03-10"]
+    # Периоды вне окна (декабрь, следующая неделя) не попадают в ряд
+    assert {key: counts.tolist() for key, counts in series.items()} == {
+        "Высокий": [0, 0, 0, 2], "Низкий": [0, 1, 0, 0]}
+
+    starts, series = snapshot.recent_series("месяц", 3, today=today)
+    assert [str(start)[:7] for start in starts] == ["2025-01", "2025-02", "2025-03"]
+    assert series[None].tolist() == [0, 1, 3]
+
+    # Без инцидентов в окне — все нули нужной длины
+    _, series = snapshot.recent_series("неделя", 5, today=datetime.date(2030, 1, 1))
+    assert series[None].tolist() == [0] * 5
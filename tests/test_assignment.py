@@ -0,0 +1,106 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import random
+
+from src.assignment import AssignmentEngine, IndexedHeap
+
+
+def _check_heap(heap, expected):
+    """Свойство кучи, индекс позиций и минимум совпадают с полным перебором"""
+    items = heap._items
+    for index in range(1, len(items)):
+        assert tuple(items[(index - 1) // 2]) <= tuple(items[index])
+    assert {key: index for index, (_, key) in enumerate(items)} == heap._position
+    assert heap.priorities() == expected
+    assert heap.peek() == (min((p, k) for k, p in expected.items()) if expected else None)
+
+
+def test_indexed_heap_matches_brute_force_after_updates():
+    rng = random.Random(11)
+    heap, expected = IndexedHeap(), {}
+    for _ in range(3000):
+        key = rng.randrange(60)
+        if rng.random() < 0.2:
+            heap.remove(key)
+            expected.pop(key, None)
+        else:
+            # Изменение приоритета в обе стороны, в том числе на равный
+            priority = rng.randrange(-20, 20)
+            heap.set(key, priority)
+            expected[key] = priority
+        _check_heap(heap, expected)
+    assert len(heap) == len(expected)
+    assert all(key in heap for key in expected)
+
+
+def test_indexed_heap_ties_break_by_key():
+    heap = IndexedHeap()
+    for key in (5, 3, 9):
+        heap.set(key, 1)
+    assert heap.peek() == (1, 3)
+    heap.set(3, 2)
+    assert heap.peek() == (1, 5)
+    heap.remove(5)
+    heap.remove(404)
+    assert heap.peek() == (1, 9)
+
+
+def _add_responsibles(db, count, organization_id):
+    for number in range(count):
+        db.add_responsible(f"Ответственный {number}", организация_id=organization_id)
+    return [row[0] for row in db.conn.execute(
+        "SELECT ответственный_id FROM Ответственные WHERE организация_id = ? ORDER BY ответственный_id",
+        (organization_id,))]
+
+
+def test_pick_least_loaded_with_weights(db, organizations):
+    first, second = _add_responsibles(db, 2, 1)
+    engine = AssignmentEngine(db, weighted=True)
+    assert engine.pick(1) == first                  # равная нагрузка — меньший ID
+
+    critical = db.add_incident("Критический", None, 1, 1, first)
+    db.add_passport(critical, "Критический", "", "", "", "")
+    db.add_incident("Низкий", None, 1, 1, second)
+    db.add_incident("Низкий 2", None, 1, 1, second)
+    assert engine.loads(1) == {first: 4, second: 2}
+    assert engine.pick(1) == second
+    assert engine.pick(2) is None                   # у организации нет ответственных
+
+    db.update_incident_status(critical, 3)          # закрытые не считаются
+    assert engine.loads(1) == {first: 0, second: 2}
+    assert engine.pick(1) == first
+
+
+def test_incremental_loads_match_full_reload(db, organizations):
+    rng = random.Random(5)
+    responsibles = {org_id: _add_responsibles(db, 3, org_id) for org_id in organizations}
+    engine = AssignmentEngine(db, weighted=True)
+    engine.pick(1)
+
+    incidents = []
+    for step in range(150):
+        action = rng.random()
+        if action < 0.5 or not incidents:
+            org_id = rng.choice(organizations)
+            incident_id = db.add_incident(f"Инцидент {step}", None, 1, org_id, auto_assign=True)
+            incidents.append(incident_id)
+        elif action < 0.7:
+            incident_id, level = rng.choice(incidents), rng.choice(["Критический", "Высокий", "Низкий"])
+            if db.get_passport(incident_id):
+                db.update_passport(incident_id, level, "", "", "", "")
+            else:
+                db.add_passport(incident_id, level, "", "", "", "")
+        elif action < 0.8:
+            db.update_incident_status(rng.choice(incidents), rng.choice([1, 2, 3]))
+        elif action < 0.9:
+            org_id = rng.choice(organizations)
+            db.update_incident(rng.choice(incidents), ответственный_id=rng.choice(responsibles[org_id]))
+        else:
+            victim = incidents.pop(rng.randrange(len(incidents)))
+            db.bulk_delete_incidents([victim], "test")
+
+    fresh = AssignmentEngine(db, weighted=True)
+    for org_id in organizations:
+        assert engine.loads(org_id) == fresh.loads(org_id)
+        assert engine.pick(org_id) == fresh.pick(org_id)
@@ -0,0 +1,79 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import random
+
+import pytest
+
+from src.ioc import KIND_DOMAIN, KIND_HASH, KIND_IP, IntervalIndex, IOCIndex, parse_indicator
+
+
+def _brute(ranges, start, end):
+    return {owner for first, last, owner in ranges if first <= end and last >= start}
+
+
+def test_interval_lookup_matches_brute_force():
+    rng = random.Random(7)
+    ranges = []
+    for owner in range(300):
+        first = rng.randrange(10_000)
+        ranges.append((first, first + rng.randrange(200), owner % 120))
+    index = IntervalIndex(ranges)
+
+    for _ in range(2000):
+        start = rng.randrange(-50, 10_300)
+        end = start + rng.choice((0, 0, rng.randrange(500)))
+        assert index.lookup(start, end) == _brute(ranges, start, end)
+
+
+def test_interval_adjacent_ranges_of_one_owner_are_merged():
+    index = IntervalIndex([(0, 9, 1), (10, 19, 1), (30, 39, 2)])
+    assert len(index) == 2
+    assert index.lookup(19) == {1}
+    assert index.lookup(20, 29) == set()
+    assert index.lookup(25, 30) == {2}
+
+
+def test_interval_nested_ranges():
+    index = IntervalIndex([(0, 100, 1), (40, 60, 2), (50, 50, 3)])
+    assert index.lookup(50) == {1, 2, 3}
+    assert index.lookup(61) == {1}
+    assert index.lookup(101) == set()
+
+
+def test_parse_indicator_kinds():
+    assert parse_indicator("10.0.0.1") == (KIND_IP, (4, 0x0A000001, 0x0A000001))
+    assert parse_indicator("10.0.0.0/24") == (KIND_IP, (4, 0x0A000000, 0x0A0000FF))
+    assert parse_indicator("*.Example.COM.") == (KIND_DOMAIN, "com.example.")
+    kind, (algorithm, digest) = parse_indicator("a" * 64)
+    assert kind == KIND_HASH and len(digest) == 32
+    with pytest.raises(ValueError):
+        parse_indicator("10.0.0.300")
+    with pytest.raises(ValueError):
+        parse_indicator("")
+
+
+def test_index_matches_subdomains_and_ranges():
+    rows = [
+        (1, KIND_IP, 4, 0x0A000000, 0x0A0000FF, None, None),
+        (2, KIND_DOMAIN, None, None, None, None, "com.example."),
+        (3, KIND_HASH, None, None, None, bytes.fromhex("ab" * 16), None),
+    ]
+    index = IOCIndex(rows)
+    assert index.match_text("10.0.0.77") == {1}
+    assert index.match_text("10.0.1.1") == set()
+    assert index.match_text("mail.example.com") == {2}
+    assert index.match_text("example.org") == set()
+    assert index.match_text("AB" * 16) == {3}
+
+
+def test_store_index_follows_changes(db, organizations):
+    incident = db.add_incident("Фишинг", организация_id=1)
+    ids = db.iocs.add_many(incident, ["192.168.0.0/16", "evil.example"], "tester")
+    assert db.iocs.incidents_for("192.168.5.5") == {incident}
+    assert db.iocs.incidents_for("a.evil.example") == {incident}
+
+    db.iocs.delete(ids[0], "tester")
+    assert db.iocs.incidents_for("192.168.5.5") == set()
+    with pytest.raises(ValueError):
+        db.iocs.add(incident, "not an indicator!", "tester")
@@ -0,0 +1,106 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import random
+
+import numpy as np
+import pytest
+
+from src.recommender import MeasureRecommender
+
+LEVELS = ["Критический", "Высокий", "Средний", "Низкий"]
+KINDS = ["Фишинг", "DDoS", "Утечка"]
+TECHNIQUES = ["T1566.001", "T1566.002", "T1110", "T1498"]
+
+
+def _statistics(recommender):
+    """Счётчики по именам признаков и ID мер — не зависят от порядка строк матриц"""
+    features = recommender._feature_index
+    measures = {measure_id: column for column, measure_id in enumerate(recommender._measure_ids)}
+
+    def nonzero(pairs):
+        return {key: value for key, value in pairs if value}
+
+    return {
+        "trained": recommender.trained,
+        "features": nonzero(((f, m), float(recommender.features[row, column]))
+                            for f, row in features.items() for m, column in measures.items()),
+        "together": nonzero(((s, m), float(recommender.together[measures[s], column]))
+                            for s in measures for m, column in measures.items()),
+        "feature_count": nonzero((f, float(recommender.feature_count[row])) for f, row in features.items()),
+        "measure_count": nonzero((m, float(recommender.measure_count[column])) for m, column in measures.items()),
+    }
+
+
+def _scores(recommender, incident_id):
+    return dict(zip(recommender._measure_ids, recommender.scores(incident_id).tolist()))
+
+
+@pytest.fixture
+def measures(db):
+    for number in range(6):
+        db.add_response_measure(f"Мера {number}")
+    return [row[0] for row in db.get_response_measures()]
+
+
+def test_incremental_update_matches_full_rebuild(db, organizations, measures):
+    rng = random.Random(21)
+    recommender = MeasureRecommender(db)
+    recommender.refresh()
+
+    incidents = []
+    for step in range(200):
+        action = rng.random()
+        if action < 0.3 or not incidents:
+            incident_id = db.add_incident(f"Инцидент {step}", None, 1, 1)
+            db.add_passport(incident_id, rng.choice(LEVELS), "", "", rng.choice(KINDS), "")
+            incidents.append(incident_id)
+        elif action < 0.55:
+            db.link_incident_measure(rng.choice(incidents), rng.choice(measures))
+        elif action < 0.65:
+            with db.conn:
+                db.conn.execute("DELETE FROM Инцидент_Меры WHERE инцидент_id = ? AND мера_реагирования_id = ?",
+                                (rng.choice(incidents), rng.choice(measures)))
+        elif action < 0.8:
+            db.update_passport(rng.choice(incidents), rng.choice(LEVELS), "", "", rng.choice(KINDS), "")
+        elif action < 0.9:
+            db.attack.tag(rng.choice(incidents), [rng.choice(TECHNIQUES)], "test")
+        else:
+            victim = incidents.pop(rng.randrange(len(incidents)))
+            db.bulk_delete_incidents([victim], "test")
+        if step % 20 == 0:
+            recommender.refresh()      # обновления пачками разного размера
+
+    recommender.refresh()
+    rebuilt = MeasureRecommender(db)
+    rebuilt.refresh()
+
+    assert rebuilt.trained > 0
+    assert _statistics(recommender) == _statistics(rebuilt)
+    for incident_id in incidents[:20]:
+        expected = _scores(rebuilt, incident_id)
+        actual = _scores(recommender, incident_id)
+        assert actual.keys() >= expected.keys()
+        assert all(np.isclose(actual[m], expected[m]) for m in expected)
+
+
+def test_recommend_skips_linked_measures(db, organizations, measures):
+    phishing, other = measures[0], measures[1]
+    for number in range(5):
+        incident_id = db.add_incident(f"Фишинг {number}", None, 1, 1)
+        db.add_passport(incident_id, "Высокий", "", "", "Фишинг", "")
+        db.link_incident_measure(incident_id, phishing)
+        if number == 0:
+            db.link_incident_measure(incident_id, other)
+    target = db.add_incident("Новый фишинг", None, 1, 1)
+    db.add_passport(target, "Высокий", "", "", "Фишинг", "")
+
+    recommender = MeasureRecommender(db)
+    top = recommender.recommend(target, k=2)
+    assert [measure_id for measure_id, _ in top] == [phishing, other]
+    assert top[0][1] > top[1][1]
+
+    db.link_incident_measure(target, phishing)
+    assert [measure_id for measure_id, _ in recommender.recommend(target, k=2)] == [other]
+    # Неиспользуемые меры не предлагаются
+    assert all(measure_id in (phishing, other) for measure_id, _ in recommender.recommend(target, k=6))
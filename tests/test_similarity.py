@@ -0,0 +1,101 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import random
+
+from src.similarity import NUM_PERM, LSHIndex, SimilarityIndex, cluster, shingles, signature, similarity
+
+_WORDS = ["фишинг", "письмо", "сервер", "вредонос", "учётная", "запись", "доступ", "узел",
+          "отказ", "сканирование", "порт", "пароль", "утечка", "база", "шифровальщик", "vpn"]
+
+
+def _text(rng, words=8):
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def _jaccard(a, b):
+    a, b = shingles(a), shingles(b)
+    return len(a & b) / len(a | b)
+
+
+def test_shingles_are_normalized():
+    assert shingles("Ёж, ЁЖ!") == shingles("еж еж")
+    assert shingles("ab") == {"ab"}
+    assert shingles(" ...") == set()
+    assert signature("!!!") is None
+
+
+def test_minhash_estimates_jaccard():
+    rng = random.Random(3)
+    errors = []
+    for _ in range(200):
+        a = _text(rng)
+        b = " ".join(word if rng.random() < 0.6 else rng.choice(_WORDS) for word in a.split())
+        errors.append(abs(similarity(signature(a), signature(b)) - _jaccard(a, b)))
+    # Стандартная ошибка оценки по 64 позициям — не больше 1/16
+    assert max(errors) < 4 / NUM_PERM ** 0.5
+    assert sum(errors) / len(errors) < 1 / NUM_PERM ** 0.5
+    assert similarity(signature("одинаковый текст"), signature("Одинаковый  текст!")) == 1.0
+
+
+def test_lsh_pairs_match_brute_force_over_shared_buckets():
+    rng = random.Random(9)
+    index = LSHIndex()
+    signatures = {}
+    for key in range(120):
+        text = _text(rng) if key % 3 else " ".join(_text(rng, 4).split() + ["повтор", str(key // 6)])
+        signatures[key] = signature(text)
+        index.add(key, signatures[key])
+    for key in range(0, 120, 7):
+        index.remove(key)
+        del signatures[key]
+
+    def shares_bucket(a, b):
+        return any(signatures[a][start:end] == signatures[b][start:end] for _, start, end in index._bands)
+
+    expected = {
+        (a, b) for a in signatures for b in signatures
+        if a < b and shares_bucket(a, b) and similarity(signatures[a], signatures[b]) >= 0.5
+    }
+    assert {(a, b) for a, b, _ in index.pairs(0.5)} == expected
+    assert all(key in index.signatures for bucket in index._buckets.values() for key in bucket)
+
+    probe = next(iter(signatures))
+    found = index.query(signatures[probe], threshold=0.0, exclude=probe)
+    assert probe not in [key for key, _ in found]
+    assert [score for _, score in found] == sorted((score for _, score in found), reverse=True)
+
+
+def test_cluster_groups_near_duplicates():
+    base = [
+        "Фишинговое письмо с вложением на почтовый сервер бухгалтерии",
+        "Сканирование портов внешнего периметра с одного адреса",
+        "Подбор пароля к учётной записи администратора VPN",
+    ]
+    signatures = {}
+    for group, text in enumerate(base):
+        for copy in range(3):
+            signatures[group * 10 + copy] = signature(text + "!" * copy)
+    signatures[99] = signature("Отказ в обслуживании веб-портала")
+
+    clusters, links = cluster(signatures)
+    assert clusters == [[0, 1, 2], [10, 11, 12], [20, 21, 22]]
+    # Одна связь на каждый инцидент кластера, кроме первого
+    assert len(links) == sum(len(members) - 1 for members in clusters)
+    assert all(score >= 0.8 for _, _, score in links)
+
+
+def test_stored_signatures_follow_text_changes(db, organizations):
+    title = "Фишинговое письмо с вложением на почтовый сервер бухгалтерии"
+    first = db.add_incident(title, None, 1, 1)
+    second = db.add_incident("Сканирование портов внешнего периметра", None, 1, 1)
+    db.similar.index()                               # сигнатуры сохранены в БД
+
+    # Изменение без обращений к индексу (до первого запроса или в другом сеансе)
+    db.update_incident(second, название=title)
+    assert SimilarityIndex(db).similar(first) == [(second, 1.0)]
+
+    db.add_passport(second, "Высокий", "Внешний", "Простой", "Сканирование", "Разведка")
+    assert SimilarityIndex(db).similar(first, threshold=0.9) == []
+    stored = db.conn.execute("SELECT сигнатура FROM ИнцидентыСигнатуры WHERE инцидент_id = ?", (second,)).fetchone()
+    assert stored[0] == signature(f"{title} Высокий Внешний Простой Сканирование Разведка")
@@ -0,0 +1,119 @@
+# Copyright 2025 Schrodinger71
+# Licensed under the Apache License, Version 2.0 (see LICENSE file)
+
+import threading
+import time
+
+from src.response_metrics import STATUS_OPEN
+from src.sla import ESCALATION_ACTION, STATUS_IN_PROGRESS, SLAEngine, sla_seconds
+
+
+class FakeRoot:
+    """Планировщик вместо окна tkinter: задания выполняются вручную"""
+
+    def __init__(self):
+        self.jobs = {}
+        self._next = 0
+
+    def after(self, delay_ms, callback):
+        self._next += 1
+        self.jobs[self._next] = (delay_ms, callback)
+        return self._next
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_idle(self):
+        for job, (delay_ms, callback) in list(self.jobs.items()):
+            if delay_ms == 0 and job in self.jobs:
+                del self.jobs[job]
+                callback()
+
+
+def _escalations(db):
+    return db.conn.execute(
+        "SELECT объект_id FROM ИсторияИзменений WHERE действие = ? ORDER BY объект_id", (ESCALATION_ACTION,)
+    ).fetchall()
+
+
+def test_sla_seconds_by_level_and_status():
+    assert sla_seconds("Критический", STATUS_OPEN) == 0.25 * 3600
+    assert sla_seconds(" высокий ", STATUS_IN_PROGRESS) == 8 * 3600
+    # Неизвестный и пустой уровень — по умолчанию (средний)
+    assert sla_seconds("какой-то", STATUS_OPEN) == sla_seconds(None, STATUS_OPEN) == 4 * 3600
+
+
+def test_pending_is_ordered_by_deadline(db, organizations):
+    root = FakeRoot()
+    engine = SLAEngine(db, root)
+    first = db.add_incident("Поздний", "2024-01-01 12:00:00", 1, 1)
+    second = db.add_incident("Ранний", "2024-01-01 10:00:00", 1, 1)
+    db.add_passport(first, "Критический", "", "", "", "")
+    engine.start()
+
+    # Критический: 12:00 + 15 мин раньше среднего 10:00 + 4 ч
+    assert [incident_id for _, incident_id in engine.pending()] == [first, second]
+    assert engine._heap[0][1] == first
+
+
+def test_expired_incidents_are_escalated_once(db, organizations):
+    root = FakeRoot()
+    escalated = []
+    engine = SLAEngine(db, root, on_escalation=lambda incident_id, *_: escalated.append(incident_id))
+    old = db.add_incident("Просрочен", "2024-01-01 10:00:00", 1, 1)
+    fresh = db.add_incident("Свежий", None, 1, 1)
+    engine.start()
+
+    engine._on_timer()
+    engine._on_timer()
+
+    assert escalated == [old]
+    assert _escalations(db) == [(old,)]
+    assert fresh in dict((i, d) for d, i in engine.pending())
+
+    # После перезапуска эскалация не повторяется: отметка берётся из журнала
+    restarted = SLAEngine(db, FakeRoot())
+    restarted.start()
+    restarted._on_timer()
+    assert _escalations(db) == [(old,)]
+
+
+def test_changes_replace_heap_entries(db, organizations):
+    root = FakeRoot()
+    engine = SLAEngine(db, root)
+    incident_id = db.add_incident("Инцидент", "2024-01-01 10:00:00", 1, 1)
+    engine.start()
+    deadline = engine.pending()[0][0]
+
+    db.add_passport(incident_id, "Низкий", "", "", "", "")
+    root.run_idle()
+    assert engine.pending()[0][0] == deadline + (24 - 4) * 3600
+    # Прежняя запись осталась в куче, но отбрасывается как устаревшая
+    engine._drop_stale()
+    live = [entry for entry in engine._heap if engine._versions.get(entry[1]) == entry[2]]
+    assert len(live) == 1 and engine._heap[0] == live[0]
+
+    # Закрытый инцидент больше не отслеживается и не эскалируется
+    db.update_incident_status(incident_id, 3)
+    root.run_idle()
+    assert engine.pending() == []
+    engine._on_timer()
+    assert _escalations(db) == []
+
+
+def test_background_changes_are_taken_on_timer(db, organizations):
+    root = FakeRoot()
+    engine = SLAEngine(db, root)
+    engine.start()
+
+    worker = threading.Thread(target=db.add_incident, args=("Из потока", "2024-01-01 10:00:00", 1, 1))
+    worker.start()
+    worker.join()
+    assert engine.pending() == []          # фоновый поток не планирует обработку
+
+    engine._on_timer()
+    assert _escalations(db) != []
+    assert engine.pending()[0][0] < time.time()